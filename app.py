@@ -1,8 +1,14 @@
 # app.py
 
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response, session, g
+from collections import OrderedDict
+from functools import partial
+from jinja2 import pass_context
 import link_core # Your refactored core logic
+import hashlib
+import json
 import os
+import threading
 from datetime import datetime as dt # Aliased to avoid conflict with Jinja filter
 import time
 
@@ -12,7 +18,8 @@ app = Flask(__name__) # Create the Flask app instance
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'a_very_strong_random_default_secret_for_dev_only_32_chars_MAKE_SURE_THIS_IS_DIFFERENT_AND_STRONG_IN_PROD')
 
 # --- Custom Jinja2 Filter for datetime formatting ---
-def format_datetime_filter(value, fmt=None):
+@pass_context
+def format_datetime_filter(context, value, fmt=None):
     if value == "now":
         value = dt.now()
     if not isinstance(value, dt):
@@ -26,7 +33,8 @@ def format_datetime_filter(value, fmt=None):
 
     if fmt:
         return value.strftime(fmt)
-    return value.strftime(link_core.get_active_date_format_str())
+    # DATE_FORMAT is resolved once per render by the context processor
+    return value.strftime(context.get('DATE_FORMAT') or link_core.get_active_date_format_str())
 app.jinja_env.filters['datetime'] = format_datetime_filter
 
 
@@ -42,19 +50,105 @@ def _ts_to_datetime_strings(timestamp):
 
 @app.context_processor
 def inject_global_vars():
-    if not link_core.CONFIG:
-        print("Warning: link_core.CONFIG not loaded. Attempting to load now.")
-        link_core.load_config() # This will now try to load from KV first
+    # Runs once per render: the config is read (from the TTL cache) and the date format
+    # resolved here, so per-link formatting in the templates never looks at storage
+    config = link_core.get_config()
+    date_format = link_core.get_active_date_format_str(config)
     return dict(
-        APP_CONFIG=link_core.CONFIG,
-        format_timestamp=link_core.format_web_timestamp
+        APP_CONFIG=config,
+        DATE_FORMAT=date_format,
+        format_timestamp=partial(link_core.format_web_timestamp, date_format_str=date_format)
     )
 
+# Links shown in each "Most visited" / "Recently visited" list on the first page (0 hides them)
+DASHBOARD_TOP_K = int(os.getenv('LINK_DASHBOARD_TOP_K', '5'))
+
+# --- HTTP caching for the links listing ---
+# A listing page only depends on the links version, the settings, its query parameters
+# and (through the reminder statuses) the current minute, so a weak ETag over those lets
+# browsers and the Vercel CDN revalidate with a 304, and the same tag keys a small LRU of
+# rendered pages in this process. Pages that carry flashed messages are never tagged.
+PAGE_CACHE_SIZE = int(os.getenv('LINK_PAGE_CACHE_SIZE', '64')) # 0 disables the rendered-page cache
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+def listing_etag(version, *params):
+    """Weak ETag for a listing at the given links version, or None if the version is unknown."""
+    if version is None:
+        return None
+    stamp = json.dumps([version, link_core.get_config(), params], sort_keys=True, default=str)
+    return 'W/"%s"' % hashlib.sha1(stamp.encode()).hexdigest()[:24]
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag.removeprefix('W/') in tags
+
+def cached_page(etag):
+    with _page_cache_lock:
+        body = _page_cache.get(etag)
+        if body is not None:
+            _page_cache.move_to_end(etag)
+        return body
+
+def cache_page(etag, body):
+    if PAGE_CACHE_SIZE <= 0:
+        return
+    with _page_cache_lock:
+        _page_cache[etag] = body
+        _page_cache.move_to_end(etag)
+        while len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+
+def _tagged_response(body, etag, status=200):
+    response = make_response(body, status)
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache' # Caches may store it but must revalidate every time
+    return response
+
+# --- Request timing and /metrics ---
+# Every request is timed into link_http_request_seconds{route,method,status}, and its
+# response carries a Server-Timing header with the link_core storage calls and KV round
+# trips it made, which browsers' dev tools show next to the request. /metrics exposes this
+# process's counters and histograms for Prometheus to scrape.
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+@app.before_request
+def start_request_timer():
+    g.timing_token = link_core.start_request_timing()
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def add_server_timing(response):
+    started = g.pop('request_started', None)
+    if started is None or not link_core.METRICS_ENABLED:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched' # The rule, not the path, keeps labels bounded
+    link_core.observe('link_http_request_seconds', elapsed, route=route, method=request.method, status=response.status_code)
+    timings = link_core.finish_request_timing(g.pop('timing_token', None))
+    response.headers['Server-Timing'] = link_core.server_timing_header(timings, elapsed)
+    return response
+
+@app.teardown_request
+def stop_request_timer(_exc):
+    token = g.pop('timing_token', None)
+    if token is not None: # after_request didn't run (an unhandled error)
+        link_core.finish_request_timing(token)
+
+@app.route('/metrics')
+def metrics():
+    if not link_core.METRICS_ENABLED:
+        return "Metrics are disabled (LINK_METRICS=0).", 404
+    return link_core.render_metrics(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
+
 @app.route('/')
 @app.route('/links')
 def index():
-    all_links = link_core.get_all_links() # This will now get from KV
-
     sort_by_param = request.args.get('sort_by')
     sort_order_param = request.args.get('sort_order')
 
@@ -65,30 +159,76 @@ def index():
         current_sort_by = 'reminder_time'
         current_sort_order = 'asc'
 
-    displayable_links_intermediate = link_core.core_sort_links(all_links, current_sort_by, current_sort_order)
-
     page = request.args.get('page', 1, type=int)
-    # Ensure CONFIG is loaded before accessing page_size
-    page_size = link_core.CONFIG.get('page_size', 20) if link_core.CONFIG else 20
-    start_index = (page - 1) * page_size
-    end_index = start_index + page_size
-
-    paginated_links_slice = displayable_links_intermediate[start_index:end_index]
+    page_size = link_core.get_config().get('page_size', 20)
+    query_str = request.args.get('q', '').strip()
+
+    etag = None
+    if not session.get('_flashes'):
+        etag = listing_etag(link_core.get_links_version(), current_sort_by, current_sort_order, page, query_str,
+                            int(time.time() // 60)) # Reminder statuses change with the clock
+    if etag:
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return _tagged_response('', etag, 304)
+        body = cached_page(etag)
+        if body is not None:
+            return _tagged_response(body, etag)
+
+    if query_str:
+        # Advanced query syntax (title:x visits:>5 is:default OR ...), narrowed by link_core's indexes
+        try:
+            matched_links = link_core.query_links(query_str)
+        except link_core.QueryError as e:
+            flash(f"Invalid search query: {e}", "error")
+            matched_links = []
+        sorted_links = link_core.core_sort_links(matched_links, current_sort_by, current_sort_order)
+        start_index = (max(page, 1) - 1) * page_size
+        paginated_links_slice = sorted_links[start_index:start_index + page_size]
+        total_links = len(sorted_links)
+    else:
+        # Only the requested page is read, straight from the sort index
+        paginated_links_slice, total_links = link_core.get_links_page(current_sort_by, current_sort_order, page, page_size)
 
-    processed_paginated_links = []
-    for link in paginated_links_slice:
-        link_copy = link.copy()
-        link_copy['reminder_status_info'] = link_core.get_daily_time_status(link_copy.get('reminder_timestamp', 0))
-        processed_paginated_links.append(link_copy)
+    processed_paginated_links = link_core.prepare_links_for_display(paginated_links_slice)
+    most_visited = recently_visited = []
+    if page == 1 and not query_str and DASHBOARD_TOP_K > 0:
+        # Read from the top of the sort indexes, not by sorting the collection
+        most_visited = link_core.top_links('visit_count', DASHBOARD_TOP_K)
+        recently_visited = link_core.top_links('last_visited', DASHBOARD_TOP_K)
 
-    total_pages = (len(displayable_links_intermediate) + page_size - 1) // page_size
+    total_pages = (total_links + page_size - 1) // page_size
 
-    return render_template('index.html',
+    if session.get('_flashes'): # e.g. an invalid query: this render shows (and consumes) the message
+        etag = None
+    body = render_template('index.html',
                            links=processed_paginated_links,
                            current_page=page,
                            total_pages=total_pages,
                            sort_by=current_sort_by,
-                           sort_order=current_sort_order)
+                           sort_order=current_sort_order,
+                           q=query_str,
+                           most_visited=most_visited,
+                           recently_visited=recently_visited)
+    if not etag:
+        return body
+    cache_page(etag, body)
+    return _tagged_response(body, etag)
+
+
+@app.route('/reminders')
+def reminders_page():
+    now = dt.now() # One "now" for the index split and every row's status
+    now_ts = int(now.timestamp())
+    page_size = link_core.get_config().get('page_size', 20)
+    # Both lists come straight off the reminder index, so this page scales with the
+    # number of reminders shown rather than the number of links
+    due_links = link_core.due_reminders(now_ts)
+    upcoming_links = link_core.upcoming_reminders(now_ts, limit=page_size)
+    due_links = link_core.prepare_links_for_display(due_links, now=now)
+    upcoming_links = link_core.prepare_links_for_display(upcoming_links, now=now)
+    return render_template('reminders.html',
+                           due_links=due_links,
+                           upcoming_links=upcoming_links)
 
 
 @app.route('/add', methods=['GET'])
@@ -200,17 +340,23 @@ def edit_link_form(link_id):
             # You might want to update other fields like 'notes' here as well if your form allows it
         }
         updated_link_obj = link_core.update_link(link_id, updated_data) # This will now use KV
-        if updated_link_obj:
+        if isinstance(updated_link_obj, dict):
             flash(f"Link '{updated_link_obj.get('title', updated_link_obj.get('url'))}' updated successfully!", "success")
             return redirect(url_for('index'))
         else:
-            flash("Failed to update link. An internal error occurred during save.", "error")
             current_form_state_for_link = {
                 'id': link_id, 'url': url, 'title': title,
                 'notes': link_to_edit.get('notes', ''), # Use the original notes if not updating
                 'is_default': link_to_edit.get('is_default', False)
             }
             _new_date_val, new_time_val = _ts_to_datetime_strings(new_reminder_ts)
+            if updated_link_obj == "duplicate_url":
+                flash(f"The URL '{url}' already belongs to another link. Link not updated.", "error")
+                return render_template('edit_link.html',
+                                       link=current_form_state_for_link,
+                                       reminder_time_val=new_time_val,
+                                       error_source='validation'), 409
+            flash("Failed to update link. An internal error occurred during save.", "error")
             return render_template('edit_link.html',
                                    link=current_form_state_for_link,
                                    reminder_time_val=new_time_val,
@@ -236,33 +382,120 @@ def delete_link_action(link_id):
         flash(f"Failed to delete link '{link_display_name}'. An internal error may have occurred or the link was already removed.", "error")
     return redirect(url_for('index'))
 
+@app.route('/bulk', methods=['POST'])
+def bulk_action():
+    # Applies one action to every checked link on the index page in a single batch
+    link_ids = request.form.getlist('link_ids')
+    action = request.form.get('action')
+    return_args = {
+        'page': request.form.get('page', 1, type=int),
+        'sort_by': request.form.get('sort_by') or None,
+        'sort_order': request.form.get('sort_order') or None,
+        'q': request.form.get('q') or None,
+    }
+    bulk_updates = {
+        'set_default': {'is_default': True},
+        'unset_default': {'is_default': False},
+        'clear_reminder': {'reminder_timestamp': 0},
+    }
+    if not link_ids:
+        flash("No links selected.", "warning")
+        return redirect(url_for('index', **return_args))
+    if action == 'delete':
+        results = link_core.delete_links_bulk(link_ids)
+    elif action in bulk_updates:
+        results = link_core.update_links_bulk([(link_id, dict(bulk_updates[action])) for link_id in link_ids])
+    else:
+        flash("Unknown bulk action.", "error")
+        return redirect(url_for('index', **return_args))
+    ok_count = sum(1 for result in results if result['status'] == 'ok')
+    failed_count = len(results) - ok_count
+    verb = "Deleted" if action == 'delete' else "Updated"
+    if ok_count:
+        flash(f"{verb} {ok_count} link(s).", "success")
+    if failed_count:
+        flash(f"{failed_count} link(s) could not be changed (already removed or an internal error occurred).", "error")
+    return redirect(url_for('index', **return_args))
+
+# --- JSON API ---
+# GET /api/links?sort_by=title&sort_order=asc&limit=50&fields=id,title,url&cursor=...
+# pages through the whole collection in any SORT_FIELDS ordering. Each response carries
+# next_cursor (null on the last page); passing it back continues right after the last
+# link returned, so pages stay consistent while links are added or removed.
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 500
+
+def parse_api_links_args(args):
+    """Validated (sort_by, sort_order, cursor, limit, fields) from the query string; raises ValueError."""
+    sort_by = args.get('sort_by', 'created')
+    if sort_by not in link_core.SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of {', '.join(link_core.SORT_FIELDS)}")
+    sort_order = args.get('sort_order', 'asc')
+    if sort_order not in ('asc', 'desc'):
+        raise ValueError("sort_order must be asc or desc")
+    try:
+        limit = int(args.get('limit', API_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = min(max(limit, 1), API_MAX_LIMIT)
+    fields = None
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in link_core.LINK_FIELDS]
+        if unknown:
+            raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+    return sort_by, sort_order, args.get('cursor') or None, limit, fields
+
+def project_links(links, fields):
+    if not fields:
+        return [link.copy() for link in links]
+    return [{field: link.get(field) for field in fields} for link in links]
+
+@app.route('/api/links')
+def api_links():
+    try:
+        sort_by, sort_order, cursor, limit, fields = parse_api_links_args(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    etag = listing_etag(link_core.get_links_version(), 'api', sort_by, sort_order, cursor, limit, fields)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return _tagged_response('', etag, 304)
+    try:
+        links, next_cursor = link_core.get_links_after(sort_by, sort_order, cursor, limit)
+    except link_core.CursorError as e:
+        return jsonify(error=str(e)), 400
+    response = jsonify(links=project_links(links, fields), next_cursor=next_cursor)
+    if etag:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/settings', methods=['GET', 'POST'])
 def settings_page():
+    config = link_core.get_config()
     if request.method == 'POST':
         try:
             page_size_str = request.form.get('page_size')
             page_size = int(page_size_str)
             if page_size <= 0 or page_size > 100: # Max page size of 100 as an example
                 raise ValueError("Page size out of range.")
-            link_core.CONFIG['page_size'] = page_size
+            config['page_size'] = page_size
         except (ValueError, TypeError): # Catch if page_size_str is not a valid int
             flash("Invalid Page Size. Please enter a number between 1 and 100.", "error")
             return render_template('settings.html',
-                                   current_settings=link_core.CONFIG,
-                                   all_date_formats=link_core.CONFIG.get('date_formats', {}))
+                                   current_settings=config,
+                                   all_date_formats=config.get('date_formats', {}))
 
         date_format_choice = request.form.get('date_format_choice')
-        if date_format_choice not in link_core.CONFIG.get('date_formats', {}):
+        if date_format_choice not in config.get('date_formats', {}):
             flash("Invalid Date Format selected.", "error")
-            # Reload current settings before rendering
-            if not link_core.CONFIG: link_core.load_config()
             return render_template('settings.html',
-                                   current_settings=link_core.CONFIG,
-                                   all_date_formats=link_core.CONFIG.get('date_formats', {}))
-        link_core.CONFIG['date_format_choice'] = date_format_choice
+                                   current_settings=config,
+                                   all_date_formats=config.get('date_formats', {}))
+        config['date_format_choice'] = date_format_choice
 
         default_export_path = request.form.get('default_export_path', '~/' ).strip()
-        link_core.CONFIG['default_export_path'] = default_export_path
+        config['default_export_path'] = default_export_path
 
         if link_core.save_config(): # This will now save to KV
             flash("Settings saved successfully!", "success")
@@ -270,31 +503,25 @@ def settings_page():
             flash("Error saving settings. Please try again.", "error")
         return redirect(url_for('settings_page'))
 
-    if not link_core.CONFIG:
-        link_core.load_config() # This will now load from KV
-
     return render_template('settings.html',
-                           current_settings=link_core.CONFIG,
-                           all_date_formats=link_core.CONFIG.get('date_formats', {}))
+                           current_settings=config,
+                           all_date_formats=config.get('date_formats', {}))
 
 @app.route('/visit/<link_id>', methods=['GET'])
 def visit_link_action(link_id):
-    link_details = link_core.get_link_by_id(link_id) # This will now use KV
-    if not link_details:
+    target_url = link_core.visit_link(link_id) # Counts the visit and returns the url in one KV round trip
+    if target_url is False:
+        flash("Could not record visit for the link due to an internal error. Please try again.", "error")
+        return redirect(url_for('index'))
+    if target_url is None:
         flash("Link not found. Cannot record visit.", "error")
         return redirect(url_for('index'))
-
-    target_url = link_details.get('url')
     if not target_url:
         flash("Error: The selected link does not have a valid URL associated with it.", "error")
         return redirect(url_for('index'))
 
-    if link_core.record_link_visit(link_id): # This will now use KV
-        print(f"Redirecting to: {target_url} for link ID {link_id}")
-        return redirect(target_url)
-    else:
-        flash("Could not record visit for the link due to an internal error. Please try again.", "error")
-        return redirect(url_for('index'))
+    app.logger.debug("Redirecting to %s for link ID %s", target_url, link_id)
+    return redirect(target_url)
 
 if __name__ == '__main__':
     # For local development, Vercel CLI (vercel dev) will handle running this.
@@ -0,0 +1,423 @@
+# asgi_app.py
+# ASGI variant of app.py: the same routes and templates served by FastAPI, with storage
+# calls going through link_core_async so a worker never blocks on Redis I/O.
+# Run with e.g.: uvicorn asgi_app:app --host 0.0.0.0 --port 8080
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime as dt
+from urllib.parse import urlencode
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from jinja2 import pass_context
+from starlette.middleware.sessions import SessionMiddleware
+
+import link_core
+import link_core_async
+from app import (DASHBOARD_TOP_K, METRICS_CONTENT_TYPE, cache_page, cached_page, etag_matches, format_datetime_filter, inject_global_vars,
+                 listing_etag, parse_api_links_args, project_links, _ts_to_datetime_strings)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@asynccontextmanager
+async def lifespan(_app):
+    # Resolving the storage backend may connect to KV, so it happens here in a thread
+    # rather than on the event loop in the first request
+    await asyncio.to_thread(link_core.get_storage_backend)
+    await link_core_async.get_config()
+    yield
+    await link_core_async.flush_visits() # Write-behind visits still buffered in this worker
+    await link_core_async.close_async_kv_client()
+
+app = FastAPI(lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+app.add_middleware(SessionMiddleware, secret_key=os.getenv('FLASK_SECRET_KEY', 'a_very_strong_random_default_secret_for_dev_only_32_chars_MAKE_SURE_THIS_IS_DIFFERENT_AND_STRONG_IN_PROD'))
+app.mount('/static', StaticFiles(directory=os.path.join(BASE_DIR, 'static')), name='static')
+templates = Jinja2Templates(directory=os.path.join(BASE_DIR, 'templates'))
+
+@app.middleware('http')
+async def refresh_config(request: Request, call_next):
+    # Revalidates the cached config off the event loop once its TTL has passed, so the
+    # synchronous get_config() calls while handling and rendering the request stay in memory
+    await link_core_async.get_config()
+    return await call_next(request)
+
+@app.middleware('http')
+async def time_request(request: Request, call_next):
+    # Added last, so it is the outermost middleware; see app.add_server_timing
+    if not link_core.METRICS_ENABLED:
+        return await call_next(request)
+    token = link_core.start_request_timing()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        timings = link_core.finish_request_timing(token)
+    elapsed = time.perf_counter() - started
+    route = getattr(request.scope.get('route'), 'path', 'unmatched')
+    link_core.observe('link_http_request_seconds', elapsed, route=route, method=request.method, status=response.status_code)
+    response.headers['Server-Timing'] = link_core.server_timing_header(timings, elapsed)
+    return response
+
+# --- Flask-compatible template helpers ---
+# The templates are shared with app.py, so url_for, flash and get_flashed_messages
+# behave like Flask's: extra url_for arguments become the query string (None is
+# dropped) and flashes live in the session until the next page renders them.
+def url_for(endpoint, **values):
+    if endpoint == 'static':
+        return app.url_path_for('static', path=values.pop('filename'))
+    route = next(route for route in app.routes if getattr(route, 'name', None) == endpoint)
+    path_params = {name: values.pop(name) for name in route.param_convertors}
+    path = app.url_path_for(endpoint, **path_params)
+    query = {key: value for key, value in values.items() if value is not None}
+    return f"{path}?{urlencode(query)}" if query else path
+
+def flash(request, message, category="message"):
+    request.session.setdefault('_flashes', []).append([category, message])
+
+@pass_context
+def get_flashed_messages(context, with_categories=False):
+    flashes = context['request'].session.pop('_flashes', [])
+    return [tuple(f) for f in flashes] if with_categories else [message for _category, message in flashes]
+
+templates.env.globals.update(url_for=url_for, get_flashed_messages=get_flashed_messages)
+templates.env.filters['datetime'] = format_datetime_filter
+
+def render_template(request, template_name, status_code=200, **context):
+    # Same per-render globals as app.inject_global_vars
+    context.update(inject_global_vars())
+    return templates.TemplateResponse(request, template_name, context, status_code=status_code)
+
+def redirect(location):
+    return RedirectResponse(location, status_code=302) # 302 like Flask, so POSTs redirect to a GET
+
+def _tag(response, etag):
+    # Same headers as app._tagged_response
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _int_arg(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+# --- Routes (mirroring app.py) ---
+@app.get('/')
+@app.get('/links') # Registered first, so url_for('index') gives /links as in app.py
+async def index(request: Request):
+    sort_by_param = request.query_params.get('sort_by')
+    sort_order_param = request.query_params.get('sort_order')
+
+    if sort_by_param:
+        current_sort_by = sort_by_param
+        current_sort_order = sort_order_param if sort_order_param in ['asc', 'desc'] else 'asc'
+    else:
+        current_sort_by = 'reminder_time'
+        current_sort_order = 'asc'
+
+    page = _int_arg(request.query_params.get('page'), 1)
+    page_size = link_core.get_config().get('page_size', 20)
+    query_str = request.query_params.get('q', '').strip()
+
+    # HTTP caching as in app.index
+    etag = None
+    if not request.session.get('_flashes'):
+        etag = listing_etag(await link_core_async.get_links_version(), current_sort_by, current_sort_order, page, query_str,
+                            int(time.time() // 60))
+    if etag:
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return _tag(Response(status_code=304), etag)
+        body = cached_page(etag)
+        if body is not None:
+            return _tag(HTMLResponse(body), etag)
+
+    if query_str:
+        try:
+            matched_links = await link_core_async.query_links(query_str)
+        except link_core.QueryError as e:
+            flash(request, f"Invalid search query: {e}", "error")
+            matched_links = []
+        sorted_links = link_core.core_sort_links(matched_links, current_sort_by, current_sort_order)
+        start_index = (max(page, 1) - 1) * page_size
+        paginated_links_slice = sorted_links[start_index:start_index + page_size]
+        total_links = len(sorted_links)
+    else:
+        paginated_links_slice, total_links = await link_core_async.get_links_page(current_sort_by, current_sort_order, page, page_size)
+
+    processed_paginated_links = link_core.prepare_links_for_display(paginated_links_slice)
+    most_visited = recently_visited = []
+    if page == 1 and not query_str and DASHBOARD_TOP_K > 0:
+        most_visited = await link_core_async.top_links('visit_count', DASHBOARD_TOP_K)
+        recently_visited = await link_core_async.top_links('last_visited', DASHBOARD_TOP_K)
+
+    total_pages = (total_links + page_size - 1) // page_size
+
+    if request.session.get('_flashes'):
+        etag = None
+    response = render_template(request, 'index.html',
+                               links=processed_paginated_links,
+                               current_page=page,
+                               total_pages=total_pages,
+                               sort_by=current_sort_by,
+                               sort_order=current_sort_order,
+                               q=query_str,
+                               most_visited=most_visited,
+                               recently_visited=recently_visited)
+    if not etag:
+        return response
+    cache_page(etag, response.body.decode())
+    return _tag(response, etag)
+
+@app.get('/reminders')
+async def reminders_page(request: Request):
+    now = dt.now() # One "now" for the index split and every row's status
+    now_ts = int(now.timestamp())
+    page_size = link_core.get_config().get('page_size', 20)
+    due_links = await link_core_async.due_reminders(now_ts)
+    upcoming_links = await link_core_async.upcoming_reminders(now_ts, limit=page_size)
+    due_links = link_core.prepare_links_for_display(due_links, now=now)
+    upcoming_links = link_core.prepare_links_for_display(upcoming_links, now=now)
+    return render_template(request, 'reminders.html',
+                           due_links=due_links,
+                           upcoming_links=upcoming_links)
+
+@app.get('/add')
+async def add_link_form(request: Request):
+    args = request.query_params
+    return render_template(request, 'add_link.html',
+                           url=args.get('url', ''),
+                           title=args.get('title', ''),
+                           notes=args.get('notes', ''),
+                           is_default_val=args.get('is_default_val'),
+                           reminder_time=args.get('reminder_time', ''))
+
+@app.post('/add')
+async def add_link_action(request: Request):
+    form = await request.form()
+    url = form.get('url', '').strip()
+    title = form.get('title', '').strip()
+    notes = form.get('notes', '').strip()
+    is_default_val = form.get('is_default')
+    is_default = (is_default_val == 'yes')
+    reminder_time_str = form.get('reminder_time', "").strip()
+    reminder_ts = 0
+    if reminder_time_str:
+        try:
+            parsed_time_obj = dt.strptime(reminder_time_str, '%H:%M').time()
+            reminder_dt_obj = dt.combine(dt.now().date(), parsed_time_obj)
+            current_system_dt = dt.now()
+            if reminder_dt_obj < current_system_dt and (current_system_dt - reminder_dt_obj).total_seconds() > 60:
+                flash(request, "Warning: Reminder time is in the past for today.", "warning")
+            reminder_ts = int(reminder_dt_obj.timestamp())
+        except ValueError:
+            flash(request, "Invalid reminder time format. Reminder not set.", "error")
+            reminder_ts = 0
+    form_state = dict(url=url, title=title, notes=notes, is_default_val=is_default_val, reminder_time=reminder_time_str)
+    if not url or not (url.startswith("http://") or url.startswith("https://")):
+        flash(request, "URL is required and must start with http:// or https://.", "error")
+        return render_template(request, 'add_link.html', 400, **form_state)
+    result = await link_core_async.add_new_link(
+        url=url, title=title, notes=notes, is_default=is_default, reminder_timestamp=reminder_ts
+    )
+    if isinstance(result, dict):
+        flash(request, f"Link '{result.get('title', result.get('url'))}' added successfully!", "success")
+        return redirect(url_for('index'))
+    elif result == "duplicate_url":
+        flash(request, f"The URL '{url}' already exists. Link not added.", "error")
+        return render_template(request, 'add_link.html', 409, **form_state)
+    else:
+        flash(request, "Failed to add link. An internal error occurred.", "error")
+        return render_template(request, 'add_link.html', 500, **form_state)
+
+@app.api_route('/edit/{link_id}', methods=['GET', 'POST'])
+async def edit_link_form(request: Request, link_id: str):
+    link_to_edit = await link_core_async.get_link_by_id(link_id)
+    if not link_to_edit:
+        flash(request, f"Error: Link with ID {link_id} not found.", "error")
+        return redirect(url_for('index'))
+    if request.method == 'GET':
+        _date_str_val, time_str_val = _ts_to_datetime_strings(link_to_edit.get('reminder_timestamp'))
+        return render_template(request, 'edit_link.html', link=link_to_edit, reminder_time_val=time_str_val)
+
+    form = await request.form()
+    url = form.get('url', '').strip()
+    title = form.get('title', '').strip()
+    current_form_state_for_link = {
+        'id': link_id, 'url': url, 'title': title,
+        'notes': link_to_edit.get('notes', ''),
+        'is_default': link_to_edit.get('is_default', False)
+    }
+    if not url or not (url.startswith("http://") or url.startswith("https://")):
+        flash(request, "URL is required and must start with http:// or https://.", "error")
+        _original_date_str, original_time_str = _ts_to_datetime_strings(link_to_edit.get('reminder_timestamp', 0))
+        return render_template(request, 'edit_link.html', 400,
+                               link=current_form_state_for_link,
+                               reminder_time_val=form.get('reminder_time', original_time_str),
+                               error_source='validation')
+    original_reminder_ts = link_to_edit.get('reminder_timestamp', 0)
+    new_reminder_ts = original_reminder_ts
+    submitted_reminder_time_str = form.get('reminder_time', "").strip()
+    if not submitted_reminder_time_str:
+        if original_reminder_ts != 0:
+            flash(request, "Reminder time cleared.", "info")
+        new_reminder_ts = 0
+    else:
+        try:
+            parsed_time_obj = dt.strptime(submitted_reminder_time_str, '%H:%M').time()
+            if original_reminder_ts != 0:
+                target_date_for_reminder = dt.fromtimestamp(original_reminder_ts).date()
+            else:
+                target_date_for_reminder = dt.now().date()
+            new_reminder_dt_obj = dt.combine(target_date_for_reminder, parsed_time_obj)
+            new_reminder_ts = int(new_reminder_dt_obj.timestamp())
+            current_system_dt = dt.now()
+            if new_reminder_dt_obj < current_system_dt and (current_system_dt - new_reminder_dt_obj).total_seconds() > 60:
+                flash(request, "Warning: Reminder time is in the past (considering its date).", "warning")
+        except ValueError:
+            flash(request, "Invalid reminder time format. Reminder remains unchanged from its original value.", "error")
+            new_reminder_ts = original_reminder_ts
+    updated_data = {"url": url, "title": title if title else url, "reminder_timestamp": new_reminder_ts}
+    updated_link_obj = await link_core_async.update_link(link_id, updated_data)
+    if isinstance(updated_link_obj, dict):
+        flash(request, f"Link '{updated_link_obj.get('title', updated_link_obj.get('url'))}' updated successfully!", "success")
+        return redirect(url_for('index'))
+    _new_date_val, new_time_val = _ts_to_datetime_strings(new_reminder_ts)
+    if updated_link_obj == "duplicate_url":
+        flash(request, f"The URL '{url}' already belongs to another link. Link not updated.", "error")
+        return render_template(request, 'edit_link.html', 409,
+                               link=current_form_state_for_link,
+                               reminder_time_val=new_time_val,
+                               error_source='validation')
+    flash(request, "Failed to update link. An internal error occurred during save.", "error")
+    return render_template(request, 'edit_link.html', 500,
+                           link=current_form_state_for_link,
+                           reminder_time_val=new_time_val,
+                           error_source='save_fail')
+
+@app.post('/delete/{link_id}')
+async def delete_link_action(request: Request, link_id: str):
+    link_to_delete = await link_core_async.get_link_by_id(link_id)
+    if not link_to_delete:
+        flash(request, f"Error: Link with ID {link_id} not found. Cannot delete.", "error")
+        return redirect(url_for('index'))
+    link_display_name = link_to_delete.get('title', '').strip() or link_to_delete.get('url', f"ID {link_id}")
+    if await link_core_async.delete_link_by_id(link_id):
+        flash(request, f"Link '{link_display_name}' deleted successfully.", "success")
+    else:
+        flash(request, f"Failed to delete link '{link_display_name}'. An internal error may have occurred or the link was already removed.", "error")
+    return redirect(url_for('index'))
+
+@app.post('/bulk')
+async def bulk_action(request: Request):
+    form = await request.form()
+    link_ids = form.getlist('link_ids')
+    action = form.get('action')
+    return_args = {
+        'page': _int_arg(form.get('page'), 1),
+        'sort_by': form.get('sort_by') or None,
+        'sort_order': form.get('sort_order') or None,
+        'q': form.get('q') or None,
+    }
+    bulk_updates = {
+        'set_default': {'is_default': True},
+        'unset_default': {'is_default': False},
+        'clear_reminder': {'reminder_timestamp': 0},
+    }
+    if not link_ids:
+        flash(request, "No links selected.", "warning")
+        return redirect(url_for('index', **return_args))
+    if action == 'delete':
+        results = await link_core_async.delete_links_bulk(link_ids)
+    elif action in bulk_updates:
+        results = await link_core_async.update_links_bulk([(link_id, dict(bulk_updates[action])) for link_id in link_ids])
+    else:
+        flash(request, "Unknown bulk action.", "error")
+        return redirect(url_for('index', **return_args))
+    ok_count = sum(1 for result in results if result['status'] == 'ok')
+    failed_count = len(results) - ok_count
+    verb = "Deleted" if action == 'delete' else "Updated"
+    if ok_count:
+        flash(request, f"{verb} {ok_count} link(s).", "success")
+    if failed_count:
+        flash(request, f"{failed_count} link(s) could not be changed (already removed or an internal error occurred).", "error")
+    return redirect(url_for('index', **return_args))
+
+@app.get('/metrics')
+async def metrics():
+    if not link_core.METRICS_ENABLED:
+        return Response("Metrics are disabled (LINK_METRICS=0).", status_code=404, media_type='text/plain')
+    return Response(link_core.render_metrics(), headers={'Content-Type': METRICS_CONTENT_TYPE})
+
+@app.get('/api/links')
+async def api_links(request: Request):
+    # See app.api_links
+    try:
+        sort_by, sort_order, cursor, limit, fields = parse_api_links_args(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    etag = listing_etag(await link_core_async.get_links_version(), 'api', sort_by, sort_order, cursor, limit, fields)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return _tag(Response(status_code=304), etag)
+    try:
+        links, next_cursor = await link_core_async.get_links_after(sort_by, sort_order, cursor, limit)
+    except link_core.CursorError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    response = JSONResponse({'links': project_links(links, fields), 'next_cursor': next_cursor})
+    return _tag(response, etag) if etag else response
+
+@app.api_route('/settings', methods=['GET', 'POST'])
+async def settings_page(request: Request):
+    config = await link_core_async.get_config()
+    if request.method == 'POST':
+        form = await request.form()
+        try:
+            page_size = int(form.get('page_size'))
+            if page_size <= 0 or page_size > 100:
+                raise ValueError("Page size out of range.")
+            config['page_size'] = page_size
+        except (ValueError, TypeError):
+            flash(request, "Invalid Page Size. Please enter a number between 1 and 100.", "error")
+            return render_template(request, 'settings.html',
+                                   current_settings=config,
+                                   all_date_formats=config.get('date_formats', {}))
+        date_format_choice = form.get('date_format_choice')
+        if date_format_choice not in config.get('date_formats', {}):
+            flash(request, "Invalid Date Format selected.", "error")
+            return render_template(request, 'settings.html',
+                                   current_settings=config,
+                                   all_date_formats=config.get('date_formats', {}))
+        config['date_format_choice'] = date_format_choice
+        config['default_export_path'] = form.get('default_export_path', '~/').strip()
+        if await link_core_async.save_config():
+            flash(request, "Settings saved successfully!", "success")
+        else:
+            flash(request, "Error saving settings. Please try again.", "error")
+        return redirect(url_for('settings_page'))
+
+    return render_template(request, 'settings.html',
+                           current_settings=config,
+                           all_date_formats=config.get('date_formats', {}))
+
+@app.get('/visit/{link_id}')
+async def visit_link_action(request: Request, link_id: str):
+    target_url = await link_core_async.visit_link(link_id)
+    if target_url is False:
+        flash(request, "Could not record visit for the link due to an internal error. Please try again.", "error")
+        return redirect(url_for('index'))
+    if target_url is None:
+        flash(request, "Link not found. Cannot record visit.", "error")
+        return redirect(url_for('index'))
+    if not target_url:
+        flash(request, "Error: The selected link does not have a valid URL associated with it.", "error")
+        return redirect(url_for('index'))
+    return redirect(target_url)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get("PORT", 8080)))
@@ -0,0 +1,79 @@
+# benchmarks/import_time.py
+#
+# Measures the cold-start cost of importing link_core (and optionally the web apps) in
+# fresh interpreters, and checks that the import itself does no network or file I/O.
+#
+#   python benchmarks/import_time.py [--runs N] [--modules link_core app asgi_app] [--top K]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child after the import: nothing may have connected to KV or loaded the config
+NO_IO_CHECK = """
+import link_core
+assert link_core.kv_client is None, 'KV client was created at import time'
+assert not link_core._kv_connect_attempted, 'KV connection was attempted at import time'
+assert not link_core.CONFIG, 'config was loaded at import time'
+"""
+
+def run_python(args, env=None):
+    return subprocess.run([sys.executable] + args, cwd=REPO_DIR, env=env, capture_output=True, text=True)
+
+def import_wall_time(module, runs):
+    # Wall time of a whole fresh interpreter importing the module, minus a bare interpreter
+    def timed(code):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run_python(['-c', code])
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
+    return timed(f"import {module}") - timed("pass")
+
+def import_time_breakdown(module):
+    # Parses `python -X importtime` output: "import time: self [us] | cumulative | imported package"
+    result = run_python(['-X', 'importtime', '-c', f"import {module}"])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of link_core and the web apps.")
+    parser.add_argument('--runs', type=int, default=10, help="Fresh interpreters per measurement (median is reported)")
+    parser.add_argument('--modules', nargs='+', default=['link_core'], help="Modules to import (e.g. link_core app asgi_app)")
+    parser.add_argument('--top', type=int, default=10, help="Slowest imported modules to list")
+    args = parser.parse_args()
+
+    # The no-I/O check runs with a KV_URL that would fail loudly if anything tried to connect
+    env = dict(os.environ, KV_URL='redis://127.0.0.1:1/0')
+    check = run_python(['-c', NO_IO_CHECK], env=env)
+    if check.returncode != 0 or check.stdout.strip():
+        print("FAIL: importing link_core did I/O or printed output:")
+        print(check.stdout + check.stderr)
+        sys.exit(1)
+    print("OK: importing link_core opens no connection, loads no config and prints nothing.\n")
+
+    for module in args.modules:
+        rows = import_time_breakdown(module)
+        total = next((cumulative for cumulative, _, name in rows if name.strip() == module), None)
+        print(f"== {module} ==")
+        print(f"fresh interpreter wall time (median of {args.runs}): {import_wall_time(module, args.runs) * 1000:.1f} ms")
+        if total is not None:
+            print(f"-X importtime cumulative: {total / 1000:.1f} ms")
+        print("slowest imports (cumulative ms / self ms):")
+        for cumulative, self_us, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"  {cumulative / 1000:8.1f} {self_us / 1000:8.1f}  {name.strip()}")
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/render_index.py
+#
+# Micro-benchmark of the links page with 100 rows: the per-row display fields (old
+# uncached path vs link_core.prepare_links_for_display) and a full index() render through
+# Flask's test client. Runs against the JSON-file backend in a temporary directory, so the
+# repo's links.json and config.json are never touched. The rendered-page cache is turned
+# off so every index() call renders.
+#
+#   python benchmarks/render_index.py [--rows 100] [--repeat 200]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+def legacy_daily_time_status(reminder_timestamp):
+    # get_daily_time_status before the render cache: two strftimes and a now() per row
+    if not reminder_timestamp:
+        return {'display_time': "N/A", 'status': "n_a"}
+    reminder_datetime_obj = datetime.fromtimestamp(reminder_timestamp)
+    hour_12 = reminder_datetime_obj.strftime('%I')
+    if hour_12.startswith('0'):
+        hour_12 = hour_12[1:]
+    display_time = f"{hour_12}:{reminder_datetime_obj.strftime('%M %p')}"
+    status = "elapsed" if reminder_datetime_obj < datetime.now() else "upcoming"
+    return {'display_time': display_time, 'status': status}
+
+def legacy_prepare(links):
+    processed = []
+    for link in links:
+        link_copy = link.copy()
+        link_copy['reminder_status_info'] = legacy_daily_time_status(link_copy.get('reminder_timestamp', 0))
+        processed.append(link_copy)
+    return processed
+
+def per_call_ms(fn, repeat):
+    fn() # Warm up (and fill the render cache, as a steady-state server would)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rendering of the links page.")
+    parser.add_argument('--rows', type=int, default=100, help="Links on the page (page_size, max 100)")
+    parser.add_argument('--repeat', type=int, default=200, help="Timed iterations per measurement")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='render_bench_'))
+    os.environ.pop('KV_URL', None)
+    os.environ['LINK_STORAGE_BACKEND'] = 'json'
+    os.environ['LINK_VISIT_WRITE_BEHIND'] = ''
+    os.environ['LINK_PAGE_CACHE_SIZE'] = '0' # Time the render, not a cache hit
+
+    import link_core
+    import app as flask_app
+
+    now = int(time.time())
+    link_core.add_links_bulk([{'url': f"https://example.com/{i}", 'title': f"Link {i}", 'notes': '',
+                               'is_default': False, 'reminder_timestamp': now + (i - args.rows // 2) * 600}
+                              for i in range(args.rows)])
+    link_core.get_config()['page_size'] = args.rows
+    link_core.save_config()
+    links, _total = link_core.get_links_page('title', 'asc', 1, args.rows)
+
+    client = flask_app.app.test_client()
+    assert client.get('/links?sort_by=title').status_code == 200
+
+    results = [
+        (f"display fields, legacy per-row datetime ({len(links)} rows)", per_call_ms(lambda: legacy_prepare(links), args.repeat)),
+        (f"display fields, prepare_links_for_display ({len(links)} rows)", per_call_ms(lambda: link_core.prepare_links_for_display(links), args.repeat)),
+        ("index() render, GET /links?sort_by=title", per_call_ms(lambda: client.get('/links?sort_by=title'), args.repeat)),
+    ]
+    for label, ms in results:
+        print(f"{label:60s} {ms:8.3f} ms")
+
+if __name__ == '__main__':
+    main()
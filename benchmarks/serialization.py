@@ -0,0 +1,72 @@
+# benchmarks/serialization.py
+#
+# Compares link_core's collection codecs: bytes on the wire, encode time and decode time
+# (into Link records) for synthetic collections of 1k, 10k and 100k links. Codecs whose
+# optional dependency (msgpack, Brotli) is not installed are reported as skipped.
+#
+#   python benchmarks/serialization.py [--sizes 1000 10000 100000] [--repeat 3]
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import link_core
+
+CODECS = ['json', 'json+zlib', 'columnar', 'columnar+zlib', 'columnar+brotli', 'msgpack', 'msgpack+zlib']
+
+def make_links(count, seed=42):
+    rng = random.Random(seed)
+    now = int(time.time())
+    words = ['python', 'redis', 'vercel', 'flask', 'notes', 'docs', 'blog', 'video', 'paper', 'tool']
+    return [link_core.Link(
+        id=str(uuid.UUID(int=rng.getrandbits(128))),
+        url=f"https://{rng.choice(words)}.example.com/{i}/{rng.choice(words)}",
+        title=f"{rng.choice(words).title()} {rng.choice(words)} #{i}",
+        notes=rng.choice(['', '', 'read later', f"see also {rng.choice(words)}"]),
+        is_default=rng.random() < 0.05,
+        reminder_timestamp=now + rng.randint(-86400, 86400) if rng.random() < 0.3 else 0,
+        last_visited_timestamp=now - rng.randint(0, 10 ** 7) if rng.random() < 0.6 else 0,
+        visit_count=rng.randint(0, 500),
+        created_timestamp=now - rng.randint(0, 10 ** 8),
+    ) for i in range(count)]
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark link_core's collection codecs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        links = make_links(size)
+        baseline = None
+        print(f"== {size} links ==")
+        print(f"{'codec':18s} {'bytes':>12s} {'vs json':>8s} {'encode ms':>10s} {'decode ms':>10s}")
+        for codec in CODECS:
+            try:
+                encode_s, data = best_of(lambda: link_core.encode_links(links, codec), args.repeat)
+                decode_s, decoded = best_of(lambda: link_core.decode_links(data), args.repeat)
+            except ImportError as e:
+                print(f"{codec:18s} skipped ({e})")
+                continue
+            assert len(decoded) == size and decoded[-1] == links[-1]
+            baseline = baseline or len(data)
+            print(f"{codec:18s} {len(data):12,d} {len(data) / baseline:8.2f} {encode_s * 1000:10.1f} {decode_s * 1000:10.1f}")
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+# benchmarks/suite.py
+#
+# Benchmark suite for link_core and the Flask routes. For each storage backend and
+# collection size it seeds a synthetic collection (the same generator as
+# serialization.py), then times get_all_links (cold and warm), add_new_link,
+# record_link_visit, core_search_links, core_sort_links and GET /links and /visit/<id>
+# through Flask's test client. Every (backend, size) pair runs in a fresh interpreter in
+# its own temporary directory, so the repo's links.json, config.json and KV store are
+# never touched and no cache carries over between runs.
+#
+# Backends:
+#   local  the JSON links file
+#   kv     link_core's Redis layout on a stand-in: fakeredis (pip install fakeredis) by
+#          default, a throwaway redis-server with --spawn-redis, or --redis-url (that
+#          database is FLUSHED before every run, so never point it at real data)
+#
+# Results are printed as a table and, with --json, written as JSON (commit, environment
+# and one record per measurement) that --compare reads back to diff two runs:
+#
+#   python benchmarks/suite.py --json before.json
+#   git checkout my-branch && python benchmarks/suite.py --json after.json --compare before.json
+#   python benchmarks/suite.py --sizes 1000 10000 100000 1000000 --backends local
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+BACKENDS = ('local', 'kv')
+SEARCH_TERM = 'redis'
+ADVANCED_QUERY = 'title:python visits:>250'
+
+def measure(fn, calls, budget):
+    """Runs fn up to calls times (at least once, stopping early after budget seconds); returns timings in ms."""
+    samples = []
+    deadline = time.perf_counter() + budget
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        if time.perf_counter() > deadline:
+            break
+    return samples
+
+def summarize(backend, size, name, samples):
+    return {
+        'backend': backend, 'size': size, 'name': name, 'runs': len(samples),
+        'min_ms': round(min(samples), 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'max_ms': round(max(samples), 4),
+    }
+
+# --- Worker: one backend and size, in a fresh interpreter ---
+def seed_collection(link_core, backend, links):
+    if backend == 'local':
+        with open(link_core.LOCAL_DATA_FILE, 'wb') as f:
+            f.write(link_core.encode_links(links))
+    else:
+        # Stored as the legacy single blob, which the first KV access migrates into the
+        # per-link hashes and indexes, exactly as a real deployment would
+        link_core.get_kv_client().set(link_core.LINKS_DATA_KEY, link_core.encode_links(links, 'json'))
+    link_core.get_links_version()
+
+def invalidate_caches(link_core):
+    link_core._local_state['signature'] = None
+    link_core._kv_cache['version'] = None
+
+def run_worker(args):
+    backend, size = args.worker, args.size
+    os.chdir(tempfile.mkdtemp(prefix='link_bench_'))
+    os.environ['LINK_PAGE_CACHE_SIZE'] = '0' # Time the render, not a cache hit
+    if backend == 'local':
+        os.environ.pop('KV_URL', None)
+        os.environ['LINK_STORAGE_BACKEND'] = 'json'
+    else:
+        os.environ['LINK_STORAGE_BACKEND'] = 'redis'
+        if args.redis_url:
+            os.environ['KV_URL'] = args.redis_url
+
+    import link_core
+    from serialization import make_links # Same synthetic collection as the codec benchmark
+
+    if backend == 'kv':
+        if args.redis_url:
+            link_core.get_kv_client().flushdb()
+        else:
+            import fakeredis
+            import redis
+            link_core.redis = redis
+            link_core.kv_client = link_core._instrument_kv_client(fakeredis.FakeRedis(decode_responses=True))
+            link_core._kv_connect_attempted = True
+        link_core.set_storage_backend(None)
+
+    links = make_links(size)
+    seed_collection(link_core, backend, links)
+    import app as flask_app
+    client = flask_app.app.test_client()
+    rng = random.Random(size)
+    link_ids = [link['id'] for link in links]
+    added = iter(range(10 ** 9))
+    calls, budget = args.calls, args.budget
+    results = []
+
+    def record(name, fn, runs=calls):
+        results.append(summarize(backend, size, name, measure(fn, runs, budget)))
+
+    def cold_get_all_links():
+        invalidate_caches(link_core)
+        link_core.get_all_links()
+
+    record('get_all_links_cold', cold_get_all_links, args.repeat)
+    all_links = link_core.get_all_links()
+    record('get_all_links_warm', link_core.get_all_links, args.repeat)
+    record('core_search_links_basic', lambda: link_core.core_search_links(all_links, SEARCH_TERM), args.repeat)
+    record('core_search_links_advanced',
+           lambda: link_core.core_search_links(all_links, ADVANCED_QUERY, search_type='advanced'), args.repeat)
+    record('core_sort_links_title', lambda: link_core.core_sort_links(all_links, 'title', 'asc'), args.repeat)
+    record('core_sort_links_visit_count', lambda: link_core.core_sort_links(all_links, 'visit_count', 'desc'), args.repeat)
+    record('add_new_link', lambda: link_core.add_new_link(
+        f"https://bench.example.com/new/{next(added)}", 'Benchmark link', '', False, 0))
+    record('record_link_visit', lambda: link_core.record_link_visit(rng.choice(link_ids)))
+    record('route_links', lambda: client.get('/links'))
+    record('route_links_sorted_page2', lambda: client.get('/links?sort_by=visit_count&sort_order=desc&page=2'))
+    record('route_visit', lambda: client.get(f"/visit/{rng.choice(link_ids)}"))
+    link_core.flush_visits()
+
+    with open(args.worker_output, 'w') as f:
+        json.dump(results, f)
+
+# --- Runner ---
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def spawn_redis():
+    binary = shutil.which('redis-server')
+    if not binary:
+        sys.exit("--spawn-redis: redis-server is not on PATH")
+    port = free_port()
+    process = subprocess.Popen([binary, '--port', str(port), '--save', '', '--appendonly', 'no'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"redis://127.0.0.1:{port}/0"
+    for _ in range(50):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    sys.exit("--spawn-redis: redis-server did not start")
+
+def git_commit():
+    def git(*args):
+        result = subprocess.run(['git', *args], cwd=REPO_DIR, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def run_pair(args, backend, size, redis_url):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    command = [sys.executable, os.path.abspath(__file__), '--worker', backend, '--size', str(size),
+               '--worker-output', output, '--calls', str(args.calls), '--repeat', str(args.repeat),
+               '--budget', str(args.budget)]
+    if redis_url:
+        command += ['--redis-url', redis_url]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"  {backend} {size}: failed\n{result.stderr.strip()}")
+            return []
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+def print_table(results, baseline=None):
+    previous = {(r['backend'], r['size'], r['name']): r for r in (baseline or [])}
+    header = f"{'backend':8s} {'size':>9s} {'benchmark':30s} {'runs':>5s} {'median ms':>11s} {'min ms':>10s}"
+    print(header + (f" {'baseline':>10s} {'change':>8s}" if baseline else ''))
+    for r in results:
+        line = f"{r['backend']:8s} {r['size']:9,d} {r['name']:30s} {r['runs']:5d} {r['median_ms']:11.3f} {r['min_ms']:10.3f}"
+        old = previous.get((r['backend'], r['size'], r['name']))
+        if old:
+            line += f" {old['median_ms']:10.3f} {(r['median_ms'] / old['median_ms'] - 1) * 100 if old['median_ms'] else 0:+7.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark link_core and the Flask routes.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Collection sizes (add 1000000 for the full run)")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--calls', type=int, default=50, help="Calls per per-request benchmark (add, visit, routes)")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per whole-collection benchmark (load, search, sort)")
+    parser.add_argument('--budget', type=float, default=10.0, help="Seconds after which a benchmark stops early")
+    parser.add_argument('--redis-url', help="Use this Redis for the kv backend (the database is FLUSHED)")
+    parser.add_argument('--spawn-redis', action='store_true', help="Start a throwaway redis-server for the kv backend")
+    parser.add_argument('--json', help="Write machine-readable results to this file ('-' for stdout)")
+    parser.add_argument('--compare', help="A previous --json file to compare medians against")
+    parser.add_argument('--worker', choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    redis_process, redis_url = (spawn_redis() if args.spawn_redis else (None, args.redis_url))
+    started = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    results = []
+    try:
+        for backend in args.backends:
+            for size in args.sizes:
+                print(f"running {backend} with {size:,d} links...", file=sys.stderr)
+                results.extend(run_pair(args, backend, size, redis_url if backend == 'kv' else None))
+    finally:
+        if redis_process:
+            redis_process.terminate()
+            redis_process.wait()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+
+    if args.json:
+        report = {
+            'meta': dict(git_commit(), started=started, python=platform.python_version(),
+                         implementation=platform.python_implementation(), platform=platform.platform(),
+                         kv_stand_in='redis-server' if redis_url else 'fakeredis',
+                         settings={'calls': args.calls, 'repeat': args.repeat, 'budget': args.budget}),
+            'results': results,
+        }
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
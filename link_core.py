@@ -1,33 +1,263 @@
 # link_core.py
 
+import atexit
+import base64
+import bisect
+import contextvars
+import heapq
 import json
+import logging
 import os
+import re
+import sqlite3
+import tempfile
+import threading
 import uuid
 import time
+import zlib
+from array import array
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache, wraps
+from operator import attrgetter
 from datetime import datetime, time as dt_time # Keep your datetime imports
 
+try:
+    import fcntl # POSIX only; without it the local file lock only covers this process
+except ImportError:
+    fcntl = None
+
+# --- Logging and instrumentation ---
+# Messages go to the "link_core" logger (LINK_LOG_LEVEL, default WARNING) as logfmt-style
+# lines on stderr, and are only formatted when their level is enabled. Storage calls, KV
+# round trips, bytes serialized and (in the web apps) requests are timed into in-process
+# Prometheus-style counters and histograms, rendered by render_metrics() for /metrics.
+# With LINK_METRICS=0 the decorators hand back the undecorated functions and timed() is
+# a shared no-op, so instrumentation costs nothing.
+LOG_LEVEL = os.getenv('LINK_LOG_LEVEL', 'WARNING').strip().upper()
+METRICS_ENABLED = os.getenv('LINK_METRICS', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+METRIC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # Seconds
+
+logger = logging.getLogger('link_core')
+logger.setLevel(LOG_LEVEL if isinstance(logging.getLevelName(LOG_LEVEL), int) else logging.WARNING)
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter('time=%(asctime)s level=%(levelname)s logger=%(name)s msg="%(message)s"'))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
+
+_metrics_lock = threading.Lock()
+_counters = {} # (name, labels) -> value
+_histograms = {} # (name, labels) -> [bucket counts..., +Inf count, sum]
+_metric_help = {
+    'link_core_storage_seconds': ('histogram', "Time spent in link_core storage calls."),
+    'link_core_kv_round_trip_seconds': ('histogram', "Time per Redis round trip (one command or one pipeline)."),
+    'link_core_serialized_bytes_total': ('counter', "Bytes of link data encoded or decoded by the collection codecs."),
+    'link_http_request_seconds': ('histogram', "Time to handle an HTTP request, by route."),
+}
+# Per-request (name -> [seconds, calls]) totals for Server-Timing, set by start_request_timing()
+_request_timings = contextvars.ContextVar('link_request_timings', default=None)
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+def increment(name, amount=1, **labels):
+    """Adds amount to a counter."""
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels_key(labels))
+    with _metrics_lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name, seconds, **labels):
+    """Records one observation in a histogram (and in the current request's Server-Timing)."""
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels_key(labels))
+    position = bisect.bisect_left(METRIC_BUCKETS, seconds)
+    with _metrics_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(METRIC_BUCKETS) + 1) + [0.0]
+        histogram[position] += 1
+        histogram[-1] += seconds
+
+def _record_timing(timing_name, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        total = timings.get(timing_name)
+        if total is None:
+            timings[timing_name] = [seconds, 1]
+        else:
+            total[0] += seconds
+            total[1] += 1
+
+class _Timer:
+    __slots__ = ('name', 'timing_name', 'labels', 'started')
+
+    def __init__(self, name, timing_name, labels):
+        self.name = name
+        self.timing_name = timing_name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        observe(self.name, elapsed, **self.labels)
+        if self.timing_name:
+            _record_timing(self.timing_name, elapsed)
+        return False
+
+_NO_TIMER = nullcontext()
+
+def timed(name, timing_name=None, **labels):
+    """Context manager timing a block into histogram name (and Server-Timing entry timing_name)."""
+    if not METRICS_ENABLED:
+        return _NO_TIMER
+    return _Timer(name, timing_name, labels)
+
+def instrumented(op):
+    """Decorator timing a storage call as link_core_storage_seconds{op=...} and Server-Timing entry op."""
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+        @wraps(func)
+        def timed_call(*args, **kwargs):
+            with _Timer('link_core_storage_seconds', op, {'op': op}):
+                return func(*args, **kwargs)
+        return timed_call
+    return decorate
+
+def _instrument_kv_client(client):
+    # Counts and times every round trip: a plain command, or one pipeline execute()
+    if not METRICS_ENABLED:
+        return client
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    def timed_execute_command(*args, **options):
+        with _Timer('link_core_kv_round_trip_seconds', 'kv', {'kind': 'command'}):
+            return execute_command(*args, **options)
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        pipe_execute = pipe.execute
+        def timed_execute(*exec_args, **exec_kwargs):
+            with _Timer('link_core_kv_round_trip_seconds', 'kv', {'kind': 'pipeline'}):
+                return pipe_execute(*exec_args, **exec_kwargs)
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+    return client
+
+def start_request_timing():
+    """Starts collecting Server-Timing entries for the current request; returns a reset token."""
+    return _request_timings.set({}) if METRICS_ENABLED else None
+
+def finish_request_timing(token):
+    """Stops collecting for the request and returns its {timing name: [seconds, calls]}."""
+    if token is None:
+        return {}
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+def server_timing_header(timings, total_seconds=None):
+    """Formats request timings as a Server-Timing header value (durations in milliseconds)."""
+    entries = [f'{name};desc="{calls} call{"" if calls == 1 else "s"}";dur={seconds * 1000:.2f}'
+               for name, (seconds, calls) in timings.items()]
+    if total_seconds is not None:
+        entries.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ', '.join(entries)
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_label_value(value)}"' for key, value in pairs) + '}'
+
+def render_metrics():
+    """Every counter and histogram in the Prometheus text exposition format."""
+    with _metrics_lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(values)) for key, values in _histograms.items())
+    lines = []
+    described = set()
+    def describe(name, kind):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {_metric_help.get(name, (kind, name))[1]}")
+            lines.append(f"# TYPE {name} {kind}")
+    for (name, labels), value in counters:
+        describe(name, 'counter')
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), values in histograms:
+        describe(name, 'histogram')
+        cumulative = 0
+        for bound, count in zip(METRIC_BUCKETS + ('+Inf',), values[:-1]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+def reset_metrics():
+    """Clears every counter and histogram."""
+    with _metrics_lock:
+        _counters.clear()
+        _histograms.clear()
+
 # --- Vercel KV (Redis) Client Initialization ---
+# Importing this module does no I/O: the client is created (and pinged) by the first
+# get_kv_client() call, which every KV-backed code path goes through via
+# get_storage_backend() or the config functions. Cold starts that never touch data
+# (and CLI runs on the local backends) never open a connection.
 KV_URL = os.getenv('KV_URL') # You manually set this in Vercel project settings
 kv_client = None
+_kv_connect_attempted = False
 
-if KV_URL:
+def get_kv_client():
+    """Returns the Vercel KV client, connecting on first use, or None if KV is unavailable."""
+    global kv_client, _kv_connect_attempted, redis
+    if kv_client is not None or _kv_connect_attempted:
+        return kv_client
+    _kv_connect_attempted = True
+    if not KV_URL:
+        logger.info("KV_URL environment variable not found. KV store functionality will be disabled. Using local file fallback (not recommended for Vercel).")
+        return None
     try:
         import redis # Ensure redis is imported only if KV_URL exists
-        kv_client = redis.from_url(KV_URL)
+        kv_client = _instrument_kv_client(redis.from_url(KV_URL, decode_responses=True))
         kv_client.ping()
-        print("Successfully connected to Vercel KV in link_core.py!")
+        logger.info("Successfully connected to Vercel KV in link_core.py!")
     except ImportError:
-        print("The 'redis' library is not installed. Please add it to requirements.txt.")
+        logger.error("The 'redis' library is not installed. Please add it to requirements.txt.")
         kv_client = None
     except Exception as e:
-        print(f"Error connecting to Vercel KV in link_core.py: {e}")
+        logger.error("Error connecting to Vercel KV in link_core.py: %s", e)
         kv_client = None
-else:
-    print("KV_URL environment variable not found. KV store functionality will be disabled. Using local file fallback (not recommended for Vercel).")
+    return kv_client
 
 # Define keys for storing data in KV
-LINKS_DATA_KEY = "interactive_link_manager:links"
+LINKS_DATA_KEY = "interactive_link_manager:links" # Legacy single-blob layout, migrated on first use
+LINK_KEY_PREFIX = "interactive_link_manager:link:" # One hash per link, keyed by id
+LINK_IDS_KEY = "interactive_link_manager:link_ids" # Sorted set of link ids scored by created_timestamp
+LINK_URLS_KEY = "interactive_link_manager:link_urls" # Hash of normalized url -> link id
+SORT_INDEX_KEY_PREFIX = "interactive_link_manager:sort:" # One sorted set per sort key (created reuses LINK_IDS_KEY)
+SEARCH_INDEX_KEY_PREFIX = "interactive_link_manager:search:" # Set of link ids per trigram of title/url/notes
+LINKS_VERSION_KEY = "interactive_link_manager:links_version" # INCR'd by every write; validates in-process caches
+KV_LAYOUT_VERSION_KEY = "interactive_link_manager:layout_version" # Bumped whenever the KV indexes change shape
+REBUILD_KEY_PREFIX = "interactive_link_manager:rebuild:" # Indexes being rebuilt, renamed over the live ones when done
 CONFIG_DATA_KEY = "interactive_link_manager:config"
+CONFIG_VERSION_KEY = "interactive_link_manager:config_version" # INCR'd by save_config; tells other workers to reload
 
 # Fallback file paths for local development if KV is not available
 # These will NOT work for persistence on Vercel.
@@ -36,6 +266,12 @@ LOCAL_CONFIG_FILE = "config.json"
 
 # --- Configuration Management ---
 CONFIG = {} # Global CONFIG variable
+# get_config() serves CONFIG from memory for CONFIG_TTL seconds, then revalidates it with
+# one cheap read (the KV config version, or config.json's mtime/size) and only reloads
+# when another worker or process has saved new settings.
+CONFIG_TTL = float(os.getenv('LINK_CONFIG_TTL', '5'))
+_config_signature = None # KV config version or local file signature CONFIG was loaded at
+_config_checked_at = 0.0 # time.monotonic() of the last load or revalidation
 DEFAULT_CONFIG = {
     "page_size": 20,
     "date_format_choice": "1",
@@ -47,31 +283,37 @@ DEFAULT_CONFIG = {
     "default_export_path": "~/"
 }
 
+@instrumented('load_config')
 def load_config():
-    global CONFIG
-    if kv_client:
+    global CONFIG, _config_signature, _config_checked_at
+    _config_checked_at = time.monotonic()
+    if get_kv_client():
         try:
-            config_json = kv_client.get(CONFIG_DATA_KEY)
+            config_json, _config_signature = kv_client.mget(CONFIG_DATA_KEY, CONFIG_VERSION_KEY)
             if config_json:
                 loaded_config = json.loads(config_json)
                 # Ensure all default keys are present
                 for key, value in DEFAULT_CONFIG.items():
                     loaded_config.setdefault(key, value)
                 CONFIG = loaded_config
-                print("Config loaded from Vercel KV.")
+                logger.info("Config loaded from Vercel KV.")
                 return
             else:
-                print("No config found in Vercel KV, using default and saving.")
+                logger.info("No config found in Vercel KV, using default and saving.")
                 CONFIG = DEFAULT_CONFIG.copy()
                 save_config() # Save default to KV
                 return
         except Exception as e:
-            print(f"Error loading config from Vercel KV: {e}. Using default and attempting to save.")
+            if CONFIG: # A failed reload keeps the settings already in memory
+                logger.warning("Error reloading config from Vercel KV: %s. Keeping the cached settings.", e)
+                return
+            logger.error("Error loading config from Vercel KV: %s. Using default and attempting to save.", e)
             CONFIG = DEFAULT_CONFIG.copy()
             save_config() # Attempt to save default to KV
             return
     else: # Fallback to local file if KV client is not available (for local dev)
-        print("KV client not available. Attempting to load config from local file (for local dev ONLY).")
+        logger.info("KV client not available. Attempting to load config from local file (for local dev ONLY).")
+        _config_signature = _local_config_signature()
         if not os.path.exists(LOCAL_CONFIG_FILE):
             CONFIG = DEFAULT_CONFIG.copy()
             _save_config_local() # Save to local file
@@ -83,254 +325,2869 @@ def load_config():
                 loaded_config.setdefault(key, value)
             CONFIG = loaded_config
         except Exception as e:
-            print(f"Warning: Error loading local config: {e}. Using default settings.")
+            logger.warning("Error loading local config: %s. Using default settings.", e)
             CONFIG = DEFAULT_CONFIG.copy()
 
+@instrumented('save_config')
 def save_config():
-    global CONFIG
-    if kv_client:
+    global CONFIG, _config_signature, _config_checked_at
+    if get_kv_client():
         try:
-            kv_client.set(CONFIG_DATA_KEY, json.dumps(CONFIG))
-            print("Config saved to Vercel KV.")
+            pipe = kv_client.pipeline(transaction=True)
+            pipe.set(CONFIG_DATA_KEY, json.dumps(CONFIG))
+            pipe.incr(CONFIG_VERSION_KEY)
+            _config_signature = str(pipe.execute()[-1])
+            _config_checked_at = time.monotonic()
+            logger.info("Config saved to Vercel KV.")
             return True
         except Exception as e:
-            print(f"Error: Could not save configuration to Vercel KV: {e}")
+            logger.error("Could not save configuration to Vercel KV: %s", e)
             return False
     else: # Fallback for local dev
-        print("KV client not available. Attempting to save config to local file (for local dev ONLY).")
+        logger.info("KV client not available. Attempting to save config to local file (for local dev ONLY).")
         return _save_config_local()
 
 def _save_config_local(): # Helper for local file saving
-    global CONFIG
+    global CONFIG, _config_signature, _config_checked_at
     try:
-        with open(LOCAL_CONFIG_FILE, 'w') as f:
-            json.dump(CONFIG, f, indent=4)
+        _atomic_write_json(LOCAL_CONFIG_FILE, CONFIG)
+        _config_signature = _local_config_signature()
+        _config_checked_at = time.monotonic()
         return True
     except Exception as e:
-        print(f"Error saving local config: {e}")
+        logger.error("Error saving local config: %s", e)
         return False
 
 
-def get_active_date_format_str():
-    global CONFIG
-    if not CONFIG: load_config() # Ensure config is loaded
-    choice = CONFIG.get("date_format_choice", "1")
-    date_formats_dict = CONFIG.get("date_formats", DEFAULT_CONFIG["date_formats"])
+def _atomic_write_json(path, data):
+    _atomic_write_bytes(path, json.dumps(data, indent=4, default=_json_default).encode('utf-8'))
+
+# Read once: os.umask can only be read by setting it, which would race other threads
+_PROCESS_UMASK = os.umask(0o022)
+os.umask(_PROCESS_UMASK)
+
+def _atomic_write_bytes(path, payload):
+    # Write to a temp file next to path and rename it over the original, so readers
+    # (and a crash mid-write) only ever see the old file or the complete new one.
+    # mkstemp creates the temp file 0600; it gets the original file's mode (or a new
+    # file's default) first, so other users that could read the file still can.
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_PROCESS_UMASK
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        if hasattr(os, 'fchmod'): # POSIX only
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _local_config_signature():
+    try:
+        stat = os.stat(LOCAL_CONFIG_FILE)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def config_is_fresh():
+    """True while the cached CONFIG can be used without revalidating it."""
+    return bool(CONFIG) and time.monotonic() - _config_checked_at < CONFIG_TTL
+
+def get_config():
+    """Returns the CONFIG dict, loading it on first use and reloading it once it has changed elsewhere."""
+    global _config_checked_at
+    if not CONFIG:
+        load_config()
+    elif not config_is_fresh():
+        try:
+            client = get_kv_client()
+            signature = client.get(CONFIG_VERSION_KEY) if client else _local_config_signature()
+        except Exception as e:
+            logger.warning("Error checking config version: %s. Keeping the cached settings.", e)
+            signature = _config_signature
+        if signature != _config_signature:
+            load_config()
+        else:
+            _config_checked_at = time.monotonic()
+    return CONFIG
+
+def get_active_date_format_str(config=None):
+    config = config or get_config()
+    choice = config.get("date_format_choice", "1")
+    date_formats_dict = config.get("date_formats", DEFAULT_CONFIG["date_formats"])
     return date_formats_dict.get(choice, DEFAULT_CONFIG["date_formats"]["1"])
 
 
 # --- Link Data Management (Using Vercel KV) ---
+# Each link lives in its own Redis hash (LINK_KEY_PREFIX + id) and LINK_IDS_KEY is a
+# sorted set of ids scored by created_timestamp, so point reads/writes never touch
+# the rest of the collection. The old single JSON blob under LINKS_DATA_KEY is
+# migrated to this layout the first time the KV store is used.
+LINK_FIELDS = ('id', 'url', 'title', 'notes', 'is_default', 'reminder_timestamp',
+               'last_visited_timestamp', 'visit_count', 'created_timestamp')
+LINK_INT_FIELDS = ('reminder_timestamp', 'last_visited_timestamp', 'visit_count', 'created_timestamp')
+_LINK_FIELD_SET = frozenset(LINK_FIELDS)
+
+class Link(MutableMapping):
+    """One stored link: a fixed-slot record that reads and writes like the dict it replaces."""
+    # A slots record is a fraction of the size of a nine-key dict, and its defaults are
+    # applied once, when the record is built, instead of by a setdefault pass on every
+    # load. Any key outside LINK_FIELDS is kept in _extra so nothing is lost on a rewrite.
+    # A missing id or created_timestamp is not made up here (a fresh uuid or "now" would
+    # differ on every load); _fill_missing_link_fields assigns them once, and the
+    # loaders that call it write the result back.
+    # Read-only views (pages, search results, get_all_links) hand out Link records;
+    # copy() returns a plain dict for callers that want to modify or extend one.
+    __slots__ = LINK_FIELDS + ('_extra',)
+
+    def __init__(self, id=None, url=None, title=None, notes='', is_default=False, reminder_timestamp=0,
+                 last_visited_timestamp=0, visit_count=0, created_timestamp=0, **extra):
+        self.id = id
+        self.url = url if url is not None else ''
+        self.title = title if title is not None else (url if url is not None else 'N/A')
+        self.notes = notes
+        self.is_default = is_default
+        self.reminder_timestamp = reminder_timestamp
+        self.last_visited_timestamp = last_visited_timestamp
+        self.visit_count = visit_count
+        self.created_timestamp = created_timestamp if created_timestamp is not None else 0
+        self._extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(**data)
+
+    def __getitem__(self, key):
+        if key in _LINK_FIELD_SET:
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _LINK_FIELD_SET:
+            return getattr(self, key)
+        return self._extra.get(key, default) if self._extra else default
+
+    def __setitem__(self, key, value):
+        if key in _LINK_FIELD_SET:
+            setattr(self, key, value)
+        elif self._extra is None:
+            self._extra = {key: value}
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _LINK_FIELD_SET:
+            raise KeyError(f"{key} is a fixed link field")
+        if not self._extra or key not in self._extra:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __contains__(self, key):
+        return key in _LINK_FIELD_SET or bool(self._extra and key in self._extra)
+
+    def __iter__(self):
+        yield from LINK_FIELDS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return len(LINK_FIELDS) + (len(self._extra) if self._extra else 0)
+
+    def __repr__(self):
+        return f"Link({self.to_dict()!r})"
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in LINK_FIELDS}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    copy = to_dict
+
+def _fill_missing_link_fields(links):
+    # Gives records written without an id or created_timestamp their values. Returns how
+    # many it changed, so the caller knows to persist them.
+    now = int(time.time())
+    filled = 0
+    for link in links:
+        if not link['id'] or not link['created_timestamp']:
+            link['id'] = link['id'] or str(uuid.uuid4())
+            link['created_timestamp'] = link['created_timestamp'] or now
+            filled += 1
+    return filled
+
+def _link_dict(result):
+    # Single links returned by the public functions are plain dicts the caller owns
+    return result.to_dict() if isinstance(result, Link) else result
+
+def _json_default(obj):
+    if isinstance(obj, Link):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# --- Collection serialization codecs ---
+# How a whole collection is written to bytes (the local links file, and anything else
+# that stores every link in one payload). A codec name is a layout, optionally followed
+# by +compression:
+#   json      the original format: a pretty-printed array of link objects (default)
+#   columnar  one compact JSON object with a list per field, so the field names appear
+#             once instead of on every record
+#   msgpack   the columnar layout packed with msgpack (pip install msgpack)
+#   +zlib / +brotli compress the encoded layout (brotli needs pip install Brotli)
+# Every payload except plain json/columnar starts with a LINKS/<codec> header line, and
+# decode_links() reads any of them, as well as the legacy array, whatever codec is set.
+LINKS_CODEC = os.getenv('LINK_DATA_CODEC', 'json').strip().lower() or 'json'
+LINK_CODEC_LAYOUTS = ('json', 'columnar', 'msgpack')
+LINK_CODEC_COMPRESSIONS = ('zlib', 'brotli')
+_CODEC_HEADER = b'LINKS/'
+_COLUMNAR_FORMAT = 'links-columnar'
+
+def _parse_codec(codec):
+    layout, _, compression = codec.partition('+')
+    if layout not in LINK_CODEC_LAYOUTS or (compression and compression not in LINK_CODEC_COMPRESSIONS):
+        raise ValueError(f"unknown links codec '{codec}'")
+    return layout, compression
+
+def _columnar_payload(links):
+    columns = [[] for _ in LINK_FIELDS]
+    extra = {}
+    for position, link in enumerate(links):
+        link = Link.from_dict(link)
+        for column, field in zip(columns, LINK_FIELDS):
+            column.append(getattr(link, field))
+        if link._extra:
+            extra[str(position)] = link._extra
+    payload = {'format': _COLUMNAR_FORMAT, 'version': 1, 'fields': list(LINK_FIELDS), 'columns': columns}
+    if extra:
+        payload['extra'] = extra
+    return payload
+
+def _links_from_columnar(payload):
+    if not isinstance(payload, dict) or payload.get('format') != _COLUMNAR_FORMAT:
+        raise ValueError("not a columnar links payload")
+    fields = payload['fields']
+    if tuple(fields) == LINK_FIELDS:
+        links = [Link(*row) for row in zip(*payload['columns'])]
+    else: # Written with another field set: match the columns up by name
+        links = [Link(**dict(zip(fields, row))) for row in zip(*payload['columns'])]
+    for position, extra in payload.get('extra', {}).items():
+        for key, value in extra.items():
+            links[int(position)][key] = value
+    return links
+
+def _compress(compression, data):
+    if compression == 'zlib':
+        return zlib.compress(data, 6)
+    import brotli # Optional dependency, only needed for the +brotli codecs
+    return brotli.compress(data, quality=5)
+
+def _decompress(compression, data):
+    if compression == 'zlib':
+        return zlib.decompress(data)
+    import brotli
+    return brotli.decompress(data)
+
+def encode_links(links, codec=None):
+    """Serializes a list of links to bytes with the given codec (default LINKS_CODEC)."""
+    codec = codec or LINKS_CODEC
+    layout, compression = _parse_codec(codec)
+    if layout == 'msgpack':
+        import msgpack # Optional dependency, only needed for the msgpack codecs
+        data = msgpack.packb(_columnar_payload(links), use_bin_type=True)
+    elif layout == 'columnar':
+        data = json.dumps(_columnar_payload(links), separators=(',', ':')).encode('utf-8')
+    elif compression:
+        data = json.dumps(links, separators=(',', ':'), default=_json_default).encode('utf-8')
+    else:
+        return json.dumps(links, indent=4, default=_json_default).encode('utf-8')
+    if compression:
+        data = _compress(compression, data)
+    elif layout == 'columnar':
+        return data # Self-describing JSON, left readable
+    return _CODEC_HEADER + codec.encode('ascii') + b'\n' + data
+
+def decode_links(data):
+    """Parses bytes (or text) written by encode_links with any codec, or a legacy JSON array, into Link records."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if data.startswith(_CODEC_HEADER):
+        header, _, data = data.partition(b'\n')
+        layout, compression = _parse_codec(header[len(_CODEC_HEADER):].decode('ascii'))
+        if compression:
+            data = _decompress(compression, data)
+        if layout == 'msgpack':
+            import msgpack
+            return _links_from_columnar(msgpack.unpackb(data, raw=False, strict_map_key=False))
+    if not data.strip():
+        return []
+    if data.lstrip()[:1] == b'{':
+        return _links_from_columnar(json.loads(data))
+    return [Link(**link) for link in json.loads(data)] # The legacy array of link objects
+
+KV_PIPELINE_BATCH = 500 # Commands per pipeline round trip when reading/writing many links
+KV_LAYOUT_VERSION = 4 # 1: per-link hashes, 2: + url index, 3: + sort indexes, 4: + search index
+KV_CAS_RETRIES = 5 # Attempts at a WATCHed read-modify-write before giving up
+_kv_layout_checked = False
+
+# Sort keys accepted by get_links_page/core_sort_links and the link field each one orders by
+SORT_FIELDS = {
+    'title': 'title',
+    'created': 'created_timestamp',
+    'reminder_time': 'reminder_timestamp',
+    'last_visited': 'last_visited_timestamp',
+    'visit_count': 'visit_count',
+}
+
+def _link_key(link_id):
+    return LINK_KEY_PREFIX + link_id
+
+def _sort_index_key(sort_by):
+    return LINK_IDS_KEY if sort_by == 'created' else SORT_INDEX_KEY_PREFIX + sort_by
+
+def _title_sort_member(link):
+    # Titles share score 0 so Redis orders them by member bytes; the id suffix keeps
+    # members unique and is split back off when reading a page.
+    return f"{link.get('title', '').lower()}\x00{link['id']}"
+
+def _sort_member_id(sort_by, member):
+    return member.rsplit('\x00', 1)[-1] if sort_by == 'title' else member
+
+# Basic search matches a lower-cased substring of title, url or notes. Every such
+# substring of 3+ characters contains all of the term's trigrams, so intersecting the
+# posting sets of those trigrams gives a small candidate set that is then checked
+# with a plain substring test. Shorter terms fall back to a scan.
+SEARCH_FIELDS = ('title', 'url', 'notes')
+
+def _text_trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _link_trigrams(link):
+    grams = set()
+    for field in SEARCH_FIELDS:
+        grams |= _text_trigrams(str(link.get(field, '')).lower())
+    return grams
+
+def _link_matches_term(link, term_lower):
+    return any(term_lower in str(link.get(field, '')).lower() for field in SEARCH_FIELDS)
+
+def _search_key(gram):
+    return SEARCH_INDEX_KEY_PREFIX + gram
+
+def _encode_link_hash(link_fields):
+    # Redis hashes only hold strings/numbers, so booleans are stored as '1'/'0'
+    mapping = {}
+    for key, value in link_fields.items():
+        if isinstance(value, bool):
+            mapping[key] = '1' if value else '0'
+        elif value is None:
+            mapping[key] = ''
+        else:
+            mapping[key] = value
+    return mapping
+
+def _decode_link_hash(link_hash):
+    link = dict(link_hash)
+    for key in LINK_INT_FIELDS:
+        if key in link:
+            try:
+                link[key] = int(float(link[key] or 0))
+            except ValueError:
+                link[key] = 0
+    if 'is_default' in link:
+        link['is_default'] = link['is_default'] == '1'
+    return Link(**link)
+
+def _kv_add_to_indexes(pipe, link, grams=None):
+    pipe.zadd(_sort_index_key('title'), {_title_sort_member(link): 0})
+    for sort_by, field in SORT_FIELDS.items():
+        if sort_by != 'title':
+            pipe.zadd(_sort_index_key(sort_by), {link['id']: link.get(field, 0) or 0})
+    for gram in (_link_trigrams(link) if grams is None else grams):
+        pipe.sadd(_search_key(gram), link['id'])
+
+def _kv_remove_from_indexes(pipe, link, grams=None):
+    pipe.zrem(_sort_index_key('title'), _title_sort_member(link))
+    for sort_by in SORT_FIELDS:
+        if sort_by != 'title':
+            pipe.zrem(_sort_index_key(sort_by), link['id'])
+    for gram in (_link_trigrams(link) if grams is None else grams):
+        pipe.srem(_search_key(gram), link['id'])
+
+@instrumented('migrate_legacy_links_blob')
+def migrate_legacy_links_blob():
+    """Moves links from the old single-blob key into per-link hashes. Returns the number migrated."""
+    if not get_kv_client():
+        return 0
+    migrating_key = LINKS_DATA_KEY + ":migrating"
+    try:
+        # RENAME is atomic, so only one worker ever claims the blob
+        kv_client.rename(LINKS_DATA_KEY, migrating_key)
+    except redis.exceptions.ResponseError:
+        return 0 # Nothing to migrate, or another worker got there first
+    links_json = kv_client.get(migrating_key)
+    links_data = decode_links(links_json) if links_json else []
+    _fill_missing_link_fields(links_data)
+    for start in range(0, len(links_data), KV_PIPELINE_BATCH):
+        pipe = kv_client.pipeline(transaction=False)
+        for link in links_data[start:start + KV_PIPELINE_BATCH]:
+            link = Link.from_dict(link)
+            pipe.hset(_link_key(link['id']), mapping=_encode_link_hash(link))
+            _kv_add_to_indexes(pipe, link)
+            if link['url'].strip():
+                pipe.hsetnx(LINK_URLS_KEY, link['url'].strip(), link['id'])
+        pipe.execute()
+    # Keep the original blob around as a backup rather than deleting it
+    kv_client.rename(migrating_key, LINKS_DATA_KEY + ":migrated")
+    kv_client.incr(LINKS_VERSION_KEY)
+    logger.info("Migrated %s links to per-link storage in Vercel KV.", len(links_data))
+    return len(links_data)
+
+def _kv_delete_keys(keys):
+    for start in range(0, len(keys), KV_PIPELINE_BATCH):
+        kv_client.delete(*keys[start:start + KV_PIPELINE_BATCH])
+
+class _StagedIndexPipe:
+    """Pipeline stand-in that redirects index writes to their REBUILD_KEY_PREFIX copies."""
+    # Lets rebuild_kv_indexes reuse _kv_add_to_indexes unchanged while building the
+    # new indexes next to the live ones.
+    def __init__(self, staged):
+        self.staged = staged
+        self.pipe = None
+
+    def _key(self, key):
+        self.staged.add(key)
+        return REBUILD_KEY_PREFIX + key
+
+    def zadd(self, key, mapping):
+        self.pipe.zadd(self._key(key), mapping)
+
+    def sadd(self, key, *members):
+        self.pipe.sadd(self._key(key), *members)
+
+    def hsetnx(self, key, field, value):
+        self.pipe.hsetnx(self._key(key), field, value)
+
+def _kv_stage_indexes(link_ids):
+    # Writes the url, sort and search indexes for link_ids under REBUILD_KEY_PREFIX.
+    # Returns (live keys that were staged, ids whose hash is gone).
+    staged = set()
+    orphan_ids = []
+    staging = _StagedIndexPipe(staged)
+    for start in range(0, len(link_ids), KV_PIPELINE_BATCH):
+        batch_ids = link_ids[start:start + KV_PIPELINE_BATCH]
+        pipe = kv_client.pipeline(transaction=False)
+        for link_id in batch_ids:
+            pipe.hgetall(_link_key(link_id))
+        link_hashes = pipe.execute()
+        staging.pipe = kv_client.pipeline(transaction=False)
+        for link_id, link_hash in zip(batch_ids, link_hashes):
+            if not link_hash:
+                orphan_ids.append(link_id) # Id left behind by an interrupted delete
+                continue
+            link = _decode_link_hash(link_hash)
+            _kv_add_to_indexes(staging, link)
+            if link['url'].strip():
+                staging.hsetnx(LINK_URLS_KEY, link['url'].strip(), link_id)
+        staging.pipe.execute()
+    return staged, orphan_ids
+
+@instrumented('rebuild_kv_indexes')
+def rebuild_kv_indexes():
+    """Rebuilds every KV secondary index from the per-link hashes. Returns the number of links indexed, or None if it had to give up."""
+    # The new indexes are built under REBUILD_KEY_PREFIX and RENAMEd over the live ones
+    # in one MULTI. The live indexes, the version key and the migration key are WATCHed
+    # for the whole build, so a write that lands meanwhile (an add, a url claim, a visit,
+    # a legacy-blob migration on another worker) aborts the swap instead of being lost,
+    # and the build is retried from a fresh snapshot.
+    if not get_kv_client():
+        return None
+    migrating_key = LINKS_DATA_KEY + ":migrating"
+    live_sort_keys = [_sort_index_key(k) for k in SORT_FIELDS if k != 'created']
+    for attempt in range(KV_CAS_RETRIES):
+        _kv_delete_keys(list(kv_client.scan_iter(match=REBUILD_KEY_PREFIX + '*', count=KV_PIPELINE_BATCH)))
+        with kv_client.pipeline(transaction=True) as swap:
+            swap.watch(LINKS_VERSION_KEY, LINK_URLS_KEY, LINK_IDS_KEY, migrating_key, *live_sort_keys)
+            if swap.exists(migrating_key):
+                logger.warning("Not rebuilding KV indexes while a legacy-blob migration is in progress.")
+                return None
+            link_ids = swap.zrange(LINK_IDS_KEY, 0, -1)
+            live_search_keys = list(kv_client.scan_iter(match=SEARCH_INDEX_KEY_PREFIX + '*', count=KV_PIPELINE_BATCH))
+            staged, orphan_ids = _kv_stage_indexes(link_ids)
+            swap.multi()
+            for key in [LINK_URLS_KEY] + live_sort_keys + live_search_keys:
+                if key not in staged:
+                    swap.delete(key)
+            for key in staged:
+                swap.rename(REBUILD_KEY_PREFIX + key, key)
+            if orphan_ids:
+                swap.zrem(LINK_IDS_KEY, *orphan_ids)
+            swap.set(KV_LAYOUT_VERSION_KEY, KV_LAYOUT_VERSION)
+            swap.incr(LINKS_VERSION_KEY)
+            try:
+                swap.execute()
+                return len(link_ids) - len(orphan_ids)
+            except redis.WatchError:
+                logger.info("Links changed during the KV index rebuild; rebuilding again.")
+        time.sleep(0.002 * (2 ** attempt))
+    _kv_delete_keys(list(kv_client.scan_iter(match=REBUILD_KEY_PREFIX + '*', count=KV_PIPELINE_BATCH)))
+    logger.warning("Gave up rebuilding KV indexes after %s concurrent modifications; will retry on the next request.", KV_CAS_RETRIES)
+    return None
+
+def _ensure_kv_layout():
+    global _kv_layout_checked
+    if _kv_layout_checked:
+        return
+    if kv_client.exists(LINKS_DATA_KEY):
+        migrate_legacy_links_blob()
+    if int(kv_client.get(KV_LAYOUT_VERSION_KEY) or 0) < KV_LAYOUT_VERSION:
+        # Only one worker rebuilds; the others carry on with whatever is indexed so far
+        if kv_client.set(KV_LAYOUT_VERSION_KEY + ":lock", 1, nx=True, ex=300):
+            try:
+                indexed = rebuild_kv_indexes()
+                if indexed is None:
+                    return # Refused or raced; the next call tries again
+                logger.info("Rebuilt KV indexes for %s links.", indexed)
+            finally:
+                kv_client.delete(KV_LAYOUT_VERSION_KEY + ":lock")
+    _kv_layout_checked = True
+
+# Parsed copy of the whole collection, reused for as long as LINKS_VERSION_KEY still
+# holds the version it was loaded at. Any worker's write bumps the counter, so a stale
+# copy costs one GET to detect instead of a full reload on every request.
+_kv_cache = {'version': None, 'links': []}
+
+def _kv_links_version():
+    return kv_client.get(LINKS_VERSION_KEY) or '0'
+
+@instrumented('load_links_kv')
 def _load_links_from_kv():
     if not kv_client:
-        print("KV client not available in _load_links_from_kv. Falling back to local file (for local dev ONLY).")
-        return _load_links_local() # Fallback for local dev
+        logger.info("KV client not available in _load_links_from_kv. Falling back to local file (for local dev ONLY).")
+        return _load_normalized_links_local()[0] # Fallback for local dev
     try:
-        links_json = kv_client.get(LINKS_DATA_KEY)
-        if links_json:
-            links_data = json.loads(links_json)
-            # Your existing logic for ensuring default fields in links
-            for link in links_data:
-                link.setdefault('id', str(uuid.uuid4()))
-                link.setdefault('url', '')
-                link.setdefault('title', link.get('url', 'N/A'))
-                link.setdefault('notes', '')
-                link.setdefault('is_default', False)
-                link.setdefault('reminder_timestamp', 0)
-                link.setdefault('last_visited_timestamp', 0)
-                link.setdefault('visit_count', 0)
-                link.setdefault('created_timestamp', int(time.time()))
-            return links_data
-        return [] # No data in KV, return empty list
+        _ensure_kv_layout()
+        # Read the version before the data: a write racing the load leaves the cache
+        # tagged with the older version, so the next call reloads.
+        version = _kv_links_version()
+        if version == _kv_cache['version']:
+            return list(_kv_cache['links'])
+        link_ids = kv_client.zrange(LINK_IDS_KEY, 0, -1)
+        links_data = []
+        for start in range(0, len(link_ids), KV_PIPELINE_BATCH):
+            pipe = kv_client.pipeline(transaction=False)
+            for link_id in link_ids[start:start + KV_PIPELINE_BATCH]:
+                pipe.hgetall(_link_key(link_id))
+            links_data.extend(_decode_link_hash(h) for h in pipe.execute() if h)
+        _kv_cache.update(version=version, links=links_data)
+        return list(links_data)
     except Exception as e:
-        print(f"Error loading links from Vercel KV: {e}. Returning empty list.")
+        logger.error("Error loading links from Vercel KV: %s. Returning empty list.", e)
         return []
 
-def _save_links_to_kv(links_data_list):
-    if not kv_client:
-        print("KV client not available in _save_links_to_kv. Falling back to local file (for local dev ONLY).")
-        return _save_links_local(links_data_list) # Fallback for local dev
+# The KV reads and writes that link_core_async also serves natively are written once,
+# as "step" generators taking the client: every call that does I/O is yielded and its
+# result sent back in. On the sync client the yielded value already is that result; on
+# the redis.asyncio client it is a coroutine, which link_core_async._run_kv_steps
+# awaits. Commands queued on a pipeline do no I/O on either client and are not yielded.
+class _KvSleep(float):
+    """Yielded by a step generator to back off for this many seconds."""
+
+def _run_kv_steps(steps):
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        if isinstance(step, _KvSleep):
+            time.sleep(step)
+            step = None
+        result = step
+
+def _kv_get_links_by_ids_steps(client, link_ids):
+    link_ids = list(link_ids)
+    links_data = []
+    for start in range(0, len(link_ids), KV_PIPELINE_BATCH):
+        pipe = client.pipeline(transaction=False)
+        for link_id in link_ids[start:start + KV_PIPELINE_BATCH]:
+            pipe.hgetall(_link_key(link_id))
+        links_data.extend(_decode_link_hash(h) for h in (yield pipe.execute()) if h)
+    return links_data
+
+def _kv_links_page_steps(client, sort_by, sort_order, start_index, page_size):
+    index_key = _sort_index_key(sort_by)
+    pipe = client.pipeline(transaction=False)
+    pipe.zcard(index_key)
+    if sort_order == 'desc':
+        pipe.zrevrange(index_key, start_index, start_index + page_size - 1)
+    else:
+        pipe.zrange(index_key, start_index, start_index + page_size - 1)
+    total, members = yield pipe.execute()
+    links_data = yield from _kv_get_links_by_ids_steps(client, [_sort_member_id(sort_by, member) for member in members])
+    return links_data, total
+
+def _kv_get_link_steps(client, link_id):
+    link_hash = yield client.hgetall(_link_key(link_id))
+    return _decode_link_hash(link_hash) if link_hash else None
+
+def _kv_reminders_between_steps(client, low, high, limit):
+    max_score = f"({high}" if high is not None else '+inf'
+    index_key = _sort_index_key('reminder_time')
+    if limit is None:
+        link_ids = yield client.zrangebyscore(index_key, low, max_score)
+    else:
+        link_ids = yield client.zrangebyscore(index_key, low, max_score, start=0, num=limit)
+    return (yield from _kv_get_links_by_ids_steps(client, link_ids))
+
+def _kv_get_links_page(sort_by, sort_order, start_index, page_size):
+    try:
+        _ensure_kv_layout()
+        return _run_kv_steps(_kv_links_page_steps(kv_client, sort_by, sort_order, start_index, page_size))
+    except Exception as e:
+        logger.error("Error loading links page from Vercel KV: %s", e)
+        return [], 0
+
+def _kv_keyset_start(index_key, sort_by, desc, after):
+    # Rank just past the (value, id) key in the index. ZRANK finds it in O(log n) while
+    # the cursor's link is still there with the same value; otherwise the rank is
+    # counted from the key itself.
+    value, last_id = after
+    if sort_by == 'title':
+        member = f"{value}\x00{last_id}"
+        rank = kv_client.zrevrank(index_key, member) if desc else kv_client.zrank(index_key, member)
+        if rank is not None:
+            return rank + 1
+        # Every title member has score 0, so the lexical range counts what sorts up to the key
+        return kv_client.zlexcount(index_key, '[' + member, '+') if desc else kv_client.zlexcount(index_key, '-', '[' + member)
+    pipe = kv_client.pipeline(transaction=False)
+    if desc:
+        pipe.zrevrank(index_key, last_id)
+    else:
+        pipe.zrank(index_key, last_id)
+    pipe.zscore(index_key, last_id)
+    rank, score = pipe.execute()
+    if rank is not None and score == value:
+        return rank + 1
+    pipe = kv_client.pipeline(transaction=False)
+    if desc:
+        pipe.zcount(index_key, f"({value}", '+inf')
+    else:
+        pipe.zcount(index_key, '-inf', f"({value}")
+    pipe.zrangebyscore(index_key, value, value) # Ties on the value, ordered by id
+    before, ties = pipe.execute()
+    if desc:
+        return before + len(ties) - bisect.bisect_left(ties, last_id)
+    return before + bisect.bisect_right(ties, last_id)
+
+def _kv_get_links_after(sort_by, sort_order, after, limit):
+    try:
+        _ensure_kv_layout()
+        index_key = _sort_index_key(sort_by)
+        desc = sort_order == 'desc'
+        start = _kv_keyset_start(index_key, sort_by, desc, after) if after else 0
+        if desc:
+            members = kv_client.zrevrange(index_key, start, start + limit - 1)
+        else:
+            members = kv_client.zrange(index_key, start, start + limit - 1)
+        return _kv_get_links_by_ids(_sort_member_id(sort_by, member) for member in members)
+    except Exception as e:
+        logger.error("Error loading links from Vercel KV: %s", e)
+        return []
+
+def _kv_get_links_by_ids(link_ids):
+    return _run_kv_steps(_kv_get_links_by_ids_steps(kv_client, link_ids))
+
+def _kv_term_candidate_ids(term_lower):
+    return kv_client.sinter([_search_key(gram) for gram in _text_trigrams(term_lower)])
+
+def _kv_range_candidate_ids(sort_by, low, high):
+    # Half-open [low, high) over the sort index; None means unbounded
+    min_score = low if low is not None else '-inf'
+    max_score = f"({high}" if high is not None else '+inf'
+    return set(kv_client.zrangebyscore(_sort_index_key(sort_by), min_score, max_score))
+
+def _kv_reminders_between(low, high, limit):
+    try:
+        _ensure_kv_layout()
+        return _run_kv_steps(_kv_reminders_between_steps(kv_client, low, high, limit))
+    except Exception as e:
+        logger.error("Error loading reminders from Vercel KV: %s", e)
+        return []
+
+def _kv_search_links(term_lower):
     try:
-        kv_client.set(LINKS_DATA_KEY, json.dumps(links_data_list))
-        print(f"Saved {len(links_data_list)} links to Vercel KV.")
+        _ensure_kv_layout()
+        if len(term_lower) < 3:
+            return [link for link in _load_links_from_kv() if _link_matches_term(link, term_lower)]
+        candidates = _kv_get_links_by_ids(_kv_term_candidate_ids(term_lower))
+        return [link for link in candidates if _link_matches_term(link, term_lower)]
+    except Exception as e:
+        logger.error("Error searching links in Vercel KV: %s", e)
+        return []
+
+def _kv_get_link(link_id):
+    try:
+        _ensure_kv_layout()
+        return _run_kv_steps(_kv_get_link_steps(kv_client, link_id))
+    except Exception as e:
+        logger.error("Error loading link %s from Vercel KV: %s", link_id, e)
+        return None
+
+def _kv_claim_url_steps(client, url, link_id):
+    # HSETNX makes the uniqueness check and the claim a single atomic step. An index
+    # entry pointing at a link that no longer exists is stale and can be taken over.
+    if not url or (yield client.hsetnx(LINK_URLS_KEY, url, link_id)):
         return True
+    owner_id = yield client.hget(LINK_URLS_KEY, url)
+    if owner_id == link_id:
+        return True
+    if owner_id and (yield client.exists(_link_key(owner_id))):
+        return False
+    yield client.hset(LINK_URLS_KEY, url, link_id)
+    return True
+
+def _kv_add_link_steps(client, new_link):
+    if not (yield from _kv_claim_url_steps(client, new_link['url'], new_link['id'])):
+        return "duplicate_url"
+    pipe = client.pipeline(transaction=True)
+    pipe.hset(_link_key(new_link['id']), mapping=_encode_link_hash(new_link))
+    _kv_add_to_indexes(pipe, new_link)
+    pipe.incr(LINKS_VERSION_KEY)
+    yield pipe.execute()
+    return new_link
+
+def _kv_add_link(new_link):
+    try:
+        _ensure_kv_layout()
+        return _run_kv_steps(_kv_add_link_steps(kv_client, new_link))
     except Exception as e:
-        print(f"Error saving links to Vercel KV: {e}")
+        logger.error("Error saving link to Vercel KV: %s", e)
+        return None
+
+def _kv_cas_steps(pipe, watch_keys, apply):
+    # Optimistic concurrency: WATCH the keys, let the apply(pipe) steps read them and
+    # queue their writes after pipe.multi(), and retry (with a short backoff) if another
+    # client changed a watched key before EXEC. Writers to different links never wait on each other.
+    for attempt in range(KV_CAS_RETRIES):
+        try:
+            if watch_keys:
+                yield pipe.watch(*watch_keys)
+            return (yield from apply(pipe))
+        except redis.WatchError:
+            yield pipe.reset()
+            yield _KvSleep(0.002 * (2 ** attempt))
+    raise redis.WatchError(f"gave up after {KV_CAS_RETRIES} concurrent modifications")
+
+def _kv_cas(watch_keys, apply):
+    # For a plain apply(pipe) that does its own I/O on the sync client (the bulk mutations)
+    def apply_steps(pipe):
+        return apply(pipe)
+        yield # Unreachable; makes apply_steps a step generator
+    with kv_client.pipeline(transaction=True) as pipe:
+        return _run_kv_steps(_kv_cas_steps(pipe, watch_keys, apply_steps))
+
+def _kv_release_url_steps(client, url, link_id):
+    # Undo a url claim whose write never landed (best effort)
+    if url and (yield client.hget(LINK_URLS_KEY, url)) == link_id:
+        yield client.hdel(LINK_URLS_KEY, url)
+
+def _kv_release_url(url, link_id):
+    _run_kv_steps(_kv_release_url_steps(kv_client, url, link_id))
+
+def _kv_update_link_steps(client, pipe, link_id, updated_data):
+    key = _link_key(link_id)
+    claimed_url = None
+
+    def apply(pipe):
+        nonlocal claimed_url
+        old_hash = yield pipe.hgetall(key)
+        if not old_hash:
+            logger.warning("Link with ID %s not found for update.", link_id)
+            return None
+        old_link = _decode_link_hash(old_hash)
+        old_url = old_link['url'].strip()
+        new_url = updated_data['url'].strip() if 'url' in updated_data else old_url
+        if new_url != old_url and new_url != claimed_url:
+            if not (yield from _kv_claim_url_steps(client, new_url, link_id)):
+                return "duplicate_url"
+            claimed_url = new_url
+        new_link = dict(old_link, **updated_data)
+        old_grams = _link_trigrams(old_link)
+        new_grams = _link_trigrams(new_link)
+        pipe.multi()
+        if updated_data:
+            pipe.hset(key, mapping=_encode_link_hash(updated_data))
+        _kv_remove_from_indexes(pipe, old_link, grams=old_grams - new_grams)
+        _kv_add_to_indexes(pipe, new_link, grams=new_grams - old_grams)
+        if new_url != old_url and old_url:
+            pipe.hdel(LINK_URLS_KEY, old_url)
+        pipe.incr(LINKS_VERSION_KEY)
+        pipe.hgetall(key)
+        return _decode_link_hash((yield pipe.execute())[-1])
+
+    try:
+        return (yield from _kv_cas_steps(pipe, [key], apply))
+    except Exception:
+        try:
+            yield from _kv_release_url_steps(client, claimed_url, link_id)
+        except Exception:
+            pass
+        raise
+
+def _kv_update_link(link_id, updated_data):
+    try:
+        _ensure_kv_layout()
+        with kv_client.pipeline(transaction=True) as pipe:
+            return _run_kv_steps(_kv_update_link_steps(kv_client, pipe, link_id, updated_data))
+    except Exception as e:
+        logger.error("Error updating link %s in Vercel KV: %s", link_id, e)
+        return None
+
+def _kv_delete_link_steps(pipe, link_id):
+    key = _link_key(link_id)
+
+    def apply(pipe):
+        title, url, notes = yield pipe.hmget(key, ['title', 'url', 'notes'])
+        url_owned = bool(url and url.strip()) and (yield pipe.hget(LINK_URLS_KEY, url.strip())) == link_id
+        pipe.multi()
+        pipe.delete(key)
+        _kv_remove_from_indexes(pipe, {'id': link_id, 'title': title or '', 'url': url or '', 'notes': notes or ''})
+        if url_owned:
+            pipe.hdel(LINK_URLS_KEY, url.strip())
+        pipe.incr(LINKS_VERSION_KEY)
+        return (yield pipe.execute())[0] > 0
+
+    return (yield from _kv_cas_steps(pipe, [key], apply))
+
+def _kv_delete_link(link_id):
+    try:
+        _ensure_kv_layout()
+        with kv_client.pipeline(transaction=True) as pipe:
+            return _run_kv_steps(_kv_delete_link_steps(pipe, link_id))
+    except Exception as e:
+        logger.error("Error deleting link %s from Vercel KV: %s", link_id, e)
         return False
 
+# Visits run as one server-side script: the increment is atomic (no lost counts when
+# workers race), other links are never rewritten, and the url comes back in the same
+# round trip so the /visit redirect needs no separate lookup.
+_VISIT_LUA = """
+local url = redis.call('HGET', KEYS[1], 'url')
+if not url then
+    return false
+end
+if url == '' then
+    return ''
+end
+local visit_count = redis.call('HINCRBY', KEYS[1], 'visit_count', 1)
+redis.call('HSET', KEYS[1], 'last_visited_timestamp', ARGV[1])
+redis.call('ZADD', KEYS[2], visit_count, ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[1], ARGV[2])
+redis.call('INCR', KEYS[4])
+return url
+"""
+_kv_visit_script = None
+
+def _kv_run_visit_script(script, link_id):
+    # script is _VISIT_LUA registered on the sync or the async client
+    return script(keys=[_link_key(link_id), _sort_index_key('visit_count'), _sort_index_key('last_visited'), LINKS_VERSION_KEY],
+                  args=[int(time.time()), link_id])
+
+def _kv_visit_link(link_id):
+    global _kv_visit_script
+    try:
+        _ensure_kv_layout()
+        if _kv_visit_script is None:
+            _kv_visit_script = kv_client.register_script(_VISIT_LUA)
+        return _kv_run_visit_script(_kv_visit_script, link_id)
+    except Exception as e:
+        logger.error("Error recording visit for link %s in Vercel KV: %s", link_id, e)
+        return False
+
+# Flushes a batch of buffered visits (see Write-behind Visit Buffering): one script call
+# per link adds the buffered count, keeps the newest last-visited time and refreshes
+# both sort indexes; the version is bumped once for the whole batch.
+_VISIT_FLUSH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local visit_count = redis.call('HINCRBY', KEYS[1], 'visit_count', ARGV[3])
+local last_visited = tonumber(redis.call('HGET', KEYS[1], 'last_visited_timestamp')) or 0
+if tonumber(ARGV[1]) > last_visited then
+    redis.call('HSET', KEYS[1], 'last_visited_timestamp', ARGV[1])
+    redis.call('ZADD', KEYS[3], ARGV[1], ARGV[2])
+end
+redis.call('ZADD', KEYS[2], visit_count, ARGV[2])
+return 1
+"""
+_kv_visit_flush_script = None
+
+def _kv_apply_visits(visits):
+    global _kv_visit_flush_script
+    _ensure_kv_layout()
+    if _kv_visit_flush_script is None:
+        _kv_visit_flush_script = kv_client.register_script(_VISIT_FLUSH_LUA)
+    items = list(visits.items())
+    applied = 0
+    for start in range(0, len(items), KV_PIPELINE_BATCH):
+        pipe = kv_client.pipeline(transaction=False)
+        for link_id, (count, last_visited) in items[start:start + KV_PIPELINE_BATCH]:
+            _kv_visit_flush_script(keys=[_link_key(link_id), _sort_index_key('visit_count'),
+                                         _sort_index_key('last_visited'), LINKS_VERSION_KEY],
+                                   args=[last_visited, link_id, count], client=pipe)
+        applied += sum(pipe.execute())
+    kv_client.incr(LINKS_VERSION_KEY)
+    return applied
+
 # --- Local file fallbacks (for development when KV_URL is not set) ---
+# The parsed file is kept in memory together with its id and url indexes and is only
+# re-read when the file's (mtime, size, inode) signature changes, i.e. when another
+# process wrote it. Our own writes update the indexes in place. Sort indexes are
+# sorted lists of (sort value, id) built the first time a sort key is used and then
+# maintained with bisect on every mutation; the trigram search index works the same way.
+# Every mutation runs inside _local_write_lock(): an fcntl lock on a sidecar file
+# serializes writers across processes (the cached state is re-validated once the lock
+# is held, so nobody writes back a stale copy), and the file itself is replaced by an
+# atomic rename, so readers in other processes never see a half-written file. Within a
+# process the in-memory state is shared by every thread: readers hold _local_thread_lock
+# while they reload it, build a lazy index or turn ids back into links, and hand back
+# lists, never live views of links_by_id.
+_local_state = {'signature': None, 'links_by_id': {}, 'url_index': {}, 'sort_indexes': {}, 'search_index': None}
+_local_thread_lock = threading.RLock()
+_local_lock_depth = 0 # Only touched while holding _local_thread_lock
+
+@contextmanager
+def _local_write_lock():
+    global _local_lock_depth
+    with _local_thread_lock:
+        if fcntl is None or _local_lock_depth: # Re-entered: the file lock is already ours
+            _local_lock_depth += 1
+            try:
+                yield
+            finally:
+                _local_lock_depth -= 1
+            return
+        try:
+            lock_file = open(LOCAL_DATA_FILE + '.lock', 'a')
+        except OSError as e: # e.g. a read-only directory; the save itself will report the failure
+            logger.warning("Could not open local lock file: %s", e)
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            _local_lock_depth = 1
+            try:
+                yield
+            finally:
+                _local_lock_depth = 0
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _local_file_signature():
+    try:
+        st = os.stat(LOCAL_DATA_FILE)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        return None
+
+@instrumented('load_links_file')
 def _load_links_local():
     if not os.path.exists(LOCAL_DATA_FILE): return []
     try:
-        if os.path.getsize(LOCAL_DATA_FILE) == 0: return []
-        with open(LOCAL_DATA_FILE, 'r') as f:
-            links_data = json.load(f)
-        # ... (your existing default field logic from original load_links_data) ...
-        for link in links_data:
-            link.setdefault('id', str(uuid.uuid4())) # etc.
-        return links_data
+        with open(LOCAL_DATA_FILE, 'rb') as f:
+            data = f.read()
+        increment('link_core_serialized_bytes_total', len(data), direction='decode')
+        return decode_links(data) # Whatever codec wrote it
     except Exception as e:
-        print(f"Warning: Error loading local links: {e}")
+        logger.warning("Error loading local links: %s", e)
         return []
 
+@instrumented('save_links_file')
 def _save_links_local(links_data_list):
     try:
-        with open(LOCAL_DATA_FILE, 'w') as f:
-            json.dump(links_data_list, f, indent=4)
+        data = encode_links(links_data_list)
+        increment('link_core_serialized_bytes_total', len(data), direction='encode')
+        _atomic_write_bytes(LOCAL_DATA_FILE, data)
         return True
     except Exception as e:
-        print(f"ERROR saving local links: {e}")
+        logger.error("Error saving local links: %s", e)
         return False
 
-# --- Core Link Operations (Now use _load_links_from_kv and _save_links_to_kv) ---
+def _load_normalized_links_local():
+    # Returns (links, file signature they were read at). Records missing an id or
+    # created_timestamp are filled in and written back once, under the file lock, so
+    # they keep the same id and place in created order on every later load.
+    signature = _local_file_signature()
+    links = _load_links_local()
+    if _fill_missing_link_fields(links):
+        with _local_write_lock():
+            signature = _local_file_signature()
+            links = _load_links_local() # Another process may have filled them in meanwhile
+            if _fill_missing_link_fields(links) and _save_links_local(links):
+                signature = _local_file_signature()
+    return links, signature
+
+def _get_local_state():
+    signature = _local_file_signature()
+    if signature is None or signature != _local_state['signature']:
+        links_by_id = {}
+        url_index = {}
+        links, signature = _load_normalized_links_local()
+        for link in links:
+            links_by_id[link['id']] = link
+            url_index.setdefault(link.get('url', '').strip(), link['id'])
+        url_index.pop('', None)
+        _local_state.update(signature=signature, links_by_id=links_by_id, url_index=url_index,
+                            sort_indexes={}, search_index=None)
+    return _local_state
+
+def _commit_local_state(state):
+    if _save_links_local(list(state['links_by_id'].values())):
+        state['signature'] = _local_file_signature()
+        return True
+    state['signature'] = None # In-memory copy no longer matches the file, reload next time
+    return False
+
+def _local_sort_entry(link, sort_by):
+    if sort_by == 'title':
+        return (link.get('title', '').lower(), link['id'])
+    return (link.get(SORT_FIELDS[sort_by], 0) or 0, link['id'])
+
+def _local_sort_index(state, sort_by):
+    index = state['sort_indexes'].get(sort_by)
+    if index is None:
+        index = sorted(_local_sort_entry(link, sort_by) for link in state['links_by_id'].values())
+        state['sort_indexes'][sort_by] = index
+    return index
+
+def _local_search_index(state):
+    if state['search_index'] is None:
+        search_index = {}
+        for link in state['links_by_id'].values():
+            for gram in _link_trigrams(link):
+                search_index.setdefault(gram, set()).add(link['id'])
+        state['search_index'] = search_index
+    return state['search_index']
+
+def _local_index_add(state, link, include_search=True):
+    url = link.get('url', '').strip()
+    if url:
+        state['url_index'][url] = link['id']
+    for sort_by, index in state['sort_indexes'].items():
+        bisect.insort(index, _local_sort_entry(link, sort_by))
+    if include_search and state['search_index'] is not None:
+        for gram in _link_trigrams(link):
+            state['search_index'].setdefault(gram, set()).add(link['id'])
+
+def _local_index_remove(state, link, include_search=True):
+    url = link.get('url', '').strip()
+    if state['url_index'].get(url) == link['id']:
+        del state['url_index'][url]
+    for sort_by, index in state['sort_indexes'].items():
+        entry = _local_sort_entry(link, sort_by)
+        pos = bisect.bisect_left(index, entry)
+        if pos < len(index) and index[pos] == entry:
+            del index[pos]
+    if include_search and state['search_index'] is not None:
+        for gram in _link_trigrams(link):
+            postings = state['search_index'].get(gram)
+            if postings is not None:
+                postings.discard(link['id'])
+                if not postings:
+                    del state['search_index'][gram]
+
+def _local_links_for_ids(state, link_ids):
+    # Call with _local_thread_lock held; ids whose link has since been deleted are skipped
+    links_by_id = state['links_by_id']
+    return [link for link in map(links_by_id.get, link_ids) if link is not None]
+
+def _local_get_links_page(sort_by, sort_order, start_index, page_size):
+    with _local_thread_lock:
+        state = _get_local_state()
+        index = _local_sort_index(state, sort_by)
+        total = len(index)
+        if sort_order == 'desc':
+            stop = max(total - start_index, 0)
+            entries = reversed(index[max(stop - page_size, 0):stop])
+        else:
+            entries = index[start_index:start_index + page_size]
+        return _local_links_for_ids(state, [link_id for _value, link_id in entries]), total
+
+def _local_get_links_after(sort_by, sort_order, after, limit):
+    with _local_thread_lock:
+        state = _get_local_state()
+        index = _local_sort_index(state, sort_by)
+        if sort_order == 'desc':
+            stop = bisect.bisect_left(index, after) if after else len(index)
+            entries = reversed(index[max(stop - limit, 0):stop])
+        else:
+            start = bisect.bisect_right(index, after) if after else 0
+            entries = index[start:start + limit]
+        return _local_links_for_ids(state, [link_id for _value, link_id in entries])
+
+def _local_top_links(sort_by, k):
+    with _local_thread_lock:
+        state = _get_local_state()
+        index = state['sort_indexes'].get(sort_by)
+        if index is not None:
+            entries = reversed(index[max(len(index) - k, 0):])
+        else:
+            # Heap selection is O(N log k); building the whole sort index for one view is O(N log N)
+            entries = heapq.nlargest(k, (_local_sort_entry(link, sort_by) for link in state['links_by_id'].values()))
+        return _local_links_for_ids(state, [link_id for _value, link_id in entries])
+
+def _local_term_candidate_ids(state, term_lower):
+    search_index = _local_search_index(state)
+    postings = sorted((search_index.get(gram, set()) for gram in _text_trigrams(term_lower)), key=len)
+    candidate_ids = set(postings[0])
+    for posting in postings[1:]:
+        if not candidate_ids:
+            break
+        candidate_ids &= posting
+    return candidate_ids
+
+def _local_range_candidate_ids(state, sort_by, low, high):
+    # Half-open [low, high) over the sort index; (value,) sorts before every (value, id)
+    index = _local_sort_index(state, sort_by)
+    start = bisect.bisect_left(index, (low,)) if low is not None else 0
+    stop = bisect.bisect_left(index, (high,)) if high is not None else len(index)
+    return {link_id for _value, link_id in index[start:stop]}
+
+def _local_reminders_between(low, high, limit):
+    with _local_thread_lock:
+        state = _get_local_state()
+        index = _local_sort_index(state, 'reminder_time')
+        start = bisect.bisect_left(index, (low,))
+        stop = bisect.bisect_left(index, (high,)) if high is not None else len(index)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return _local_links_for_ids(state, [link_id for _value, link_id in index[start:stop]])
+
+def _local_search_links(term_lower):
+    with _local_thread_lock:
+        state = _get_local_state()
+        if len(term_lower) < 3:
+            candidates = list(state['links_by_id'].values())
+        else:
+            candidates = _local_links_for_ids(state, _local_term_candidate_ids(state, term_lower))
+    return [link for link in candidates if _link_matches_term(link, term_lower)]
+
+# --- Storage Backends ---
+# Every public link operation below dispatches to one StorageBackend, picked on first use
+# from LINK_STORAGE_BACKEND ('redis', 'json' or 'sqlite'). Left unset, it is redis when
+# KV_URL connected and the JSON file otherwise. RedisBackend and JsonFileBackend wrap the
+# _kv_* and _local_* implementations above; SqliteBackend keeps links in an indexed table
+# (see below). Backends return the same plain link dicts and status values.
+LINK_STORAGE_BACKEND = os.getenv('LINK_STORAGE_BACKEND', '').strip().lower()
+LOCAL_SQLITE_FILE = os.getenv('LINK_SQLITE_FILE', 'links.db')
+_storage_backend = None
+
+class StorageBackend:
+    """Interface implemented by every link store."""
+    name = None
+
+    def version(self):
+        """A stamp that changes whenever any link changes, or None if it can't be read."""
+        raise NotImplementedError
+
+    def all_links(self):
+        raise NotImplementedError
+
+    def links_page(self, sort_by, sort_order, start_index, page_size):
+        """(links, total) for one page of a SORT_FIELDS ordering."""
+        raise NotImplementedError
+
+    def links_after(self, sort_by, sort_order, after, limit):
+        """Up to limit links that follow the (sort value, id) key after (None: from the start)."""
+        raise NotImplementedError
+
+    def top_links(self, sort_by, k):
+        """The k links with the largest sort value, largest first (ties: largest id first)."""
+        return self.links_after(sort_by, 'desc', None, k)
+
+    def get_link(self, link_id):
+        raise NotImplementedError
+
+    def links_by_ids(self, link_ids):
+        raise NotImplementedError
+
+    def search(self, term_lower):
+        raise NotImplementedError
+
+    def term_candidate_ids(self, term_lower):
+        """Superset of the ids whose title/url/notes contain term_lower (3+ chars), or None."""
+        raise NotImplementedError
+
+    def range_candidate_ids(self, sort_by, low, high):
+        """Ids whose sort value is in [low, high); None means unbounded."""
+        raise NotImplementedError
+
+    def reminders_between(self, low, high, limit):
+        raise NotImplementedError
+
+    def add_link(self, new_link):
+        raise NotImplementedError
+
+    def update_link(self, link_id, updated_data):
+        raise NotImplementedError
+
+    def delete_link(self, link_id):
+        raise NotImplementedError
+
+    def visit_link(self, link_id):
+        raise NotImplementedError
+
+    def apply_visits(self, visits):
+        """Adds buffered visits, {link_id: (count, last_visited_timestamp)}; returns links updated."""
+        raise NotImplementedError
+
+    def add_links_bulk(self, new_links):
+        raise NotImplementedError
+
+    def update_links_bulk(self, updates):
+        raise NotImplementedError
+
+    def delete_links_bulk(self, link_ids):
+        raise NotImplementedError
+
+    def iter_links(self, batch_size):
+        raise NotImplementedError
+
+    def import_batches(self, batches, summary):
+        """Stores each batch of coerced links, counting into summary; raises on failure."""
+        raise NotImplementedError
+
+    def query_candidates(self, tree):
+        candidate_ids = _plan_candidate_ids(tree, self.term_candidate_ids, self.range_candidate_ids)
+        return self.all_links() if candidate_ids is None else self.links_by_ids(candidate_ids)
+
+class RedisBackend(StorageBackend):
+    name = 'redis'
+
+    def version(self):
+        try:
+            _ensure_kv_layout()
+            return _kv_links_version()
+        except Exception as e:
+            logger.error("Error reading links version from Vercel KV: %s", e)
+            return None
+
+    def all_links(self):
+        return _load_links_from_kv()
+
+    def links_page(self, sort_by, sort_order, start_index, page_size):
+        return _kv_get_links_page(sort_by, sort_order, start_index, page_size)
+
+    def links_after(self, sort_by, sort_order, after, limit):
+        return _kv_get_links_after(sort_by, sort_order, after, limit)
+
+    def get_link(self, link_id):
+        return _kv_get_link(link_id)
+
+    def links_by_ids(self, link_ids):
+        return _kv_get_links_by_ids(link_ids)
+
+    def search(self, term_lower):
+        return _kv_search_links(term_lower)
+
+    def term_candidate_ids(self, term_lower):
+        return _kv_term_candidate_ids(term_lower)
+
+    def range_candidate_ids(self, sort_by, low, high):
+        return _kv_range_candidate_ids(sort_by, low, high)
+
+    def reminders_between(self, low, high, limit):
+        return _kv_reminders_between(low, high, limit)
+
+    def add_link(self, new_link):
+        return _kv_add_link(new_link)
+
+    def update_link(self, link_id, updated_data):
+        return _kv_update_link(link_id, updated_data)
+
+    def delete_link(self, link_id):
+        return _kv_delete_link(link_id)
+
+    def visit_link(self, link_id):
+        return _kv_visit_link(link_id)
+
+    def apply_visits(self, visits):
+        return _kv_apply_visits(visits)
+
+    def _bulk(self, kv_apply, items, item_id):
+        # kv_apply reads every link before its MULTI, so an id repeated in the batch is
+        # left to a later round that sees the earlier occurrence applied, just as the
+        # other backends apply items one after another (a second delete is not_found)
+        _ensure_kv_layout()
+        results = [None] * len(items)
+        for positions in _bulk_rounds(items, item_id):
+            round_results = []
+            kv_apply([items[position] for position in positions], round_results)
+            for position, result in zip(positions, round_results):
+                results[position] = result
+        return results
+
+    def add_links_bulk(self, new_links):
+        return self._bulk(_kv_add_links_bulk, new_links, lambda link: link['id'])
+
+    def update_links_bulk(self, updates):
+        return self._bulk(_kv_update_links_bulk, updates, lambda update: update[0])
+
+    def delete_links_bulk(self, link_ids):
+        return self._bulk(_kv_delete_links_bulk, link_ids, lambda link_id: link_id)
+
+    def iter_links(self, batch_size):
+        _ensure_kv_layout()
+        start = 0
+        while True:
+            link_ids = kv_client.zrange(LINK_IDS_KEY, start, start + batch_size - 1)
+            if not link_ids:
+                return
+            yield from _kv_get_links_by_ids(link_ids)
+            start += batch_size
+
+    def import_batches(self, batches, summary):
+        _ensure_kv_layout()
+        for batch in batches:
+            _kv_import_batch(batch, summary)
+
+    def query_candidates(self, tree):
+        _ensure_kv_layout()
+        return super().query_candidates(tree)
+
+class JsonFileBackend(StorageBackend):
+    name = 'json'
+
+    def version(self):
+        signature = _local_file_signature()
+        return '-'.join(str(part) for part in signature) if signature else '0'
+
+    def all_links(self):
+        # The link dicts are shared with the in-memory state: callers copy before modifying them
+        with _local_thread_lock:
+            return list(_get_local_state()['links_by_id'].values())
+
+    def links_page(self, sort_by, sort_order, start_index, page_size):
+        return _local_get_links_page(sort_by, sort_order, start_index, page_size)
+
+    def links_after(self, sort_by, sort_order, after, limit):
+        return _local_get_links_after(sort_by, sort_order, after, limit)
+
+    def top_links(self, sort_by, k):
+        return _local_top_links(sort_by, k)
+
+    def get_link(self, link_id):
+        with _local_thread_lock:
+            link = _get_local_state()['links_by_id'].get(link_id)
+        return dict(link) if link else None
+
+    def links_by_ids(self, link_ids):
+        with _local_thread_lock:
+            return _local_links_for_ids(_get_local_state(), link_ids)
+
+    def search(self, term_lower):
+        return _local_search_links(term_lower)
+
+    def term_candidate_ids(self, term_lower):
+        with _local_thread_lock:
+            return _local_term_candidate_ids(_get_local_state(), term_lower)
+
+    def range_candidate_ids(self, sort_by, low, high):
+        with _local_thread_lock:
+            return _local_range_candidate_ids(_get_local_state(), sort_by, low, high)
+
+    def reminders_between(self, low, high, limit):
+        return _local_reminders_between(low, high, limit)
+
+    def add_link(self, new_link):
+        with _local_write_lock():
+            state = _get_local_state()
+            if new_link['url'] in state['url_index']:
+                return "duplicate_url"
+            state['links_by_id'][new_link['id']] = new_link
+            _local_index_add(state, new_link)
+            if _commit_local_state(state):
+                return new_link
+            else:
+                return None
+
+    def update_link(self, link_id, updated_data):
+        with _local_write_lock():
+            state = _get_local_state()
+            link = state['links_by_id'].get(link_id)
+            if not link:
+                logger.warning("Link with ID %s not found for update.", link_id)
+                return None
+            old_url = link.get('url', '').strip()
+            new_url = updated_data['url'].strip() if 'url' in updated_data else old_url
+            if new_url != old_url and state['url_index'].get(new_url, link_id) != link_id:
+                return "duplicate_url"
+            _local_index_remove(state, link)
+            for key, value in updated_data.items():
+                link[key] = value # Ensure you only update valid keys
+            _local_index_add(state, link)
+            if _commit_local_state(state):
+                return dict(link)
+            return None
+
+    def delete_link(self, link_id):
+        with _local_write_lock():
+            state = _get_local_state()
+            link = state['links_by_id'].pop(link_id, None)
+            if not link:
+                return False # Link not found
+            _local_index_remove(state, link)
+            return _commit_local_state(state)
+
+    def visit_link(self, link_id):
+        with _local_write_lock():
+            state = _get_local_state()
+            link_to_update = state['links_by_id'].get(link_id)
+            if not link_to_update:
+                return None
+            if not link_to_update.get('url'):
+                return ''
+            # A visit never changes searchable text, so only the sort indexes need touching
+            _local_index_remove(state, link_to_update, include_search=False)
+            link_to_update['visit_count'] += 1
+            link_to_update['last_visited_timestamp'] = int(time.time())
+            _local_index_add(state, link_to_update, include_search=False)
+            if _commit_local_state(state):
+                return link_to_update['url']
+            return False
+
+    def apply_visits(self, visits):
+        with _local_write_lock():
+            state = _get_local_state()
+            applied = 0
+            for link_id, (count, last_visited) in visits.items():
+                link = state['links_by_id'].get(link_id)
+                if not link:
+                    continue
+                _local_index_remove(state, link, include_search=False)
+                link['visit_count'] = (link.get('visit_count', 0) or 0) + count
+                link['last_visited_timestamp'] = max(link.get('last_visited_timestamp', 0) or 0, last_visited)
+                _local_index_add(state, link, include_search=False)
+                applied += 1
+            if applied and not _commit_local_state(state):
+                raise IOError(f"could not write {LOCAL_DATA_FILE}")
+            return applied
+
+    def _bulk(self, local_apply, items):
+        results = []
+        with _local_write_lock():
+            state = _get_local_state()
+            try:
+                local_apply(state, items, results)
+                if any(result['status'] == 'ok' for result in results) and not _commit_local_state(state):
+                    raise IOError(f"could not write {LOCAL_DATA_FILE}")
+            except Exception:
+                state['signature'] = None # Drop any half-applied batch from memory
+                raise
+        return results
+
+    def add_links_bulk(self, new_links):
+        return self._bulk(_local_add_links_bulk, new_links)
+
+    def update_links_bulk(self, updates):
+        return self._bulk(_local_update_links_bulk, updates)
+
+    def delete_links_bulk(self, link_ids):
+        return self._bulk(_local_delete_links_bulk, link_ids)
+
+    def iter_links(self, batch_size):
+        with _local_thread_lock:
+            links = list(_get_local_state()['links_by_id'].values())
+        yield from links
+
+    def import_batches(self, batches, summary):
+        # The write lock is held for the whole import and the file rewritten once at the end
+        with _local_write_lock():
+            state = _get_local_state()
+            try:
+                for batch in batches:
+                    _local_import_batch(state, batch, summary)
+                if summary['imported'] and not _commit_local_state(state):
+                    raise IOError(f"could not write {LOCAL_DATA_FILE}")
+            except Exception:
+                state['signature'] = None # Drop the half-applied import from memory
+                raise
+
+    def query_candidates(self, tree):
+        with _local_thread_lock:
+            state = _get_local_state()
+            candidate_ids = _plan_candidate_ids(tree, lambda term: _local_term_candidate_ids(state, term),
+                                                lambda *args: _local_range_candidate_ids(state, *args))
+            if candidate_ids is None:
+                return list(state['links_by_id'].values())
+            return _local_links_for_ids(state, candidate_ids)
+
+# SQLite keeps one row per link with a B-tree index per sort column (title via a
+# lowercased title_key, like the KV title index) and on the normalized url, plus an
+# FTS5 trigram table for substring search when the SQLite build has it. The database
+# runs in WAL mode: readers never block, every write is one short BEGIN IMMEDIATE
+# transaction touching only the affected rows, and a crash can't leave a partial file.
+# On first use an existing links.json is copied in.
+_SQLITE_LINK_COLUMNS = LINK_FIELDS
+_SQLITE_SORT_COLUMNS = {
+    'title': 'title_key',
+    'created': 'created_timestamp',
+    'reminder_time': 'reminder_timestamp',
+    'last_visited': 'last_visited_timestamp',
+    'visit_count': 'visit_count',
+}
+_SQLITE_SELECT = f"SELECT {', '.join(_SQLITE_LINK_COLUMNS)} FROM links"
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL DEFAULT '',
+    url_key TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    title_key TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    is_default INTEGER NOT NULL DEFAULT 0,
+    reminder_timestamp INTEGER NOT NULL DEFAULT 0,
+    last_visited_timestamp INTEGER NOT NULL DEFAULT 0,
+    visit_count INTEGER NOT NULL DEFAULT 0,
+    created_timestamp INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS links_url_key ON links (url_key);
+CREATE INDEX IF NOT EXISTS links_title_key ON links (title_key, id);
+CREATE INDEX IF NOT EXISTS links_created ON links (created_timestamp, id);
+CREATE INDEX IF NOT EXISTS links_reminder ON links (reminder_timestamp, id);
+CREATE INDEX IF NOT EXISTS links_last_visited ON links (last_visited_timestamp, id);
+CREATE INDEX IF NOT EXISTS links_visit_count ON links (visit_count, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('links_version', 0);
+"""
+_SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS links_fts USING fts5(
+    title, url, notes, content='links', content_rowid='seq', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS links_fts_insert AFTER INSERT ON links BEGIN
+    INSERT INTO links_fts (rowid, title, url, notes) VALUES (new.seq, new.title, new.url, new.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS links_fts_delete AFTER DELETE ON links BEGIN
+    INSERT INTO links_fts (links_fts, rowid, title, url, notes) VALUES ('delete', old.seq, old.title, old.url, old.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS links_fts_update AFTER UPDATE OF title, url, notes ON links BEGIN
+    INSERT INTO links_fts (links_fts, rowid, title, url, notes) VALUES ('delete', old.seq, old.title, old.url, old.notes);
+    INSERT INTO links_fts (rowid, title, url, notes) VALUES (new.seq, new.title, new.url, new.notes);
+END;
+"""
+SQLITE_IN_BATCH = 500 # Ids per "WHERE id IN (...)" query
+
+class SqliteBackend(StorageBackend):
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or LOCAL_SQLITE_FILE
+        self._thread_state = threading.local() # sqlite3 connections are per thread
+        self.has_fts = False
+        self._init_schema()
+
+    def _conn(self):
+        conn = getattr(self._thread_state, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._thread_state.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so check-then-write steps (url
+        # uniqueness) can't interleave with another writer; readers carry on under WAL
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            changes_before = conn.total_changes
+            yield conn
+            if conn.total_changes != changes_before:
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'links_version'")
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.executescript(_SQLITE_SCHEMA)
+        try:
+            conn.executescript(_SQLITE_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e: # No FTS5/trigram (SQLite < 3.34): search scans instead
+            logger.warning("SQLite full-text search unavailable (%s); search will scan all links.", e)
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        with self._write() as conn:
+            migrated = 0
+            if not conn.execute('SELECT 1 FROM links LIMIT 1').fetchone():
+                for link in _load_normalized_links_local()[0]:
+                    if not self._url_taken(conn, link.get('url', '').strip()):
+                        self._insert(conn, link)
+                        migrated += 1
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('json_migrated', 1)")
+        if migrated:
+            logger.info("Copied %s links from %s into %s.", migrated, LOCAL_DATA_FILE, self.path)
+
+    @staticmethod
+    def _row_to_link(row):
+        link = Link(*row) # _SQLITE_LINK_COLUMNS is LINK_FIELDS, in Link's argument order
+        link.is_default = bool(link.is_default)
+        return link
+
+    @staticmethod
+    def _link_params(link):
+        return (link['id'], link.get('url', ''), link.get('url', '').strip(), link.get('title', ''),
+                link.get('title', '').lower(), link.get('notes', ''), 1 if link.get('is_default') else 0,
+                link.get('reminder_timestamp', 0) or 0, link.get('last_visited_timestamp', 0) or 0,
+                link.get('visit_count', 0) or 0, link.get('created_timestamp', 0) or 0)
+
+    def _insert(self, conn, link):
+        conn.execute("INSERT INTO links (id, url, url_key, title, title_key, notes, is_default, reminder_timestamp,"
+                     " last_visited_timestamp, visit_count, created_timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     self._link_params(link))
+
+    def _update_row(self, conn, link):
+        params = self._link_params(link)
+        conn.execute("UPDATE links SET url = ?, url_key = ?, title = ?, title_key = ?, notes = ?, is_default = ?,"
+                     " reminder_timestamp = ?, last_visited_timestamp = ?, visit_count = ?, created_timestamp = ?"
+                     " WHERE id = ?", params[1:] + params[:1])
+
+    @staticmethod
+    def _url_taken(conn, url, link_id=None):
+        if not url:
+            return False
+        row = conn.execute('SELECT id FROM links WHERE url_key = ? AND id != ? LIMIT 1', (url, link_id or '')).fetchone()
+        return row is not None
+
+    def _select_one(self, conn, link_id):
+        row = conn.execute(_SQLITE_SELECT + ' WHERE id = ?', (link_id,)).fetchone()
+        return self._row_to_link(row) if row else None
+
+    def version(self):
+        try:
+            return str(self._conn().execute("SELECT value FROM meta WHERE key = 'links_version'").fetchone()[0])
+        except Exception as e:
+            logger.error("Error reading links version from SQLite: %s", e)
+            return None
+
+    def all_links(self):
+        try:
+            rows = self._conn().execute(_SQLITE_SELECT + ' ORDER BY created_timestamp, id').fetchall()
+            return [self._row_to_link(row) for row in rows]
+        except Exception as e:
+            logger.error("Error loading links from SQLite: %s. Returning empty list.", e)
+            return []
+
+    def links_page(self, sort_by, sort_order, start_index, page_size):
+        direction = 'DESC' if sort_order == 'desc' else 'ASC'
+        column = _SQLITE_SORT_COLUMNS[sort_by]
+        try:
+            conn = self._conn()
+            total = conn.execute('SELECT COUNT(*) FROM links').fetchone()[0]
+            rows = conn.execute(f"{_SQLITE_SELECT} ORDER BY {column} {direction}, id {direction} LIMIT ? OFFSET ?",
+                                (page_size, start_index)).fetchall()
+            return [self._row_to_link(row) for row in rows], total
+        except Exception as e:
+            logger.error("Error loading links page from SQLite: %s", e)
+            return [], 0
+
+    def links_after(self, sort_by, sort_order, after, limit):
+        direction = 'DESC' if sort_order == 'desc' else 'ASC'
+        column = _SQLITE_SORT_COLUMNS[sort_by]
+        try:
+            if after:
+                # Row-value comparison, answered from the (column, id) ordering
+                rows = self._conn().execute(f"{_SQLITE_SELECT} WHERE ({column}, id) {'<' if direction == 'DESC' else '>'} (?, ?)"
+                                            f" ORDER BY {column} {direction}, id {direction} LIMIT ?",
+                                            (after[0], after[1], limit)).fetchall()
+            else:
+                rows = self._conn().execute(f"{_SQLITE_SELECT} ORDER BY {column} {direction}, id {direction} LIMIT ?",
+                                            (limit,)).fetchall()
+            return [self._row_to_link(row) for row in rows]
+        except Exception as e:
+            logger.error("Error loading links from SQLite: %s", e)
+            return []
+
+    def get_link(self, link_id):
+        try:
+            return self._select_one(self._conn(), link_id)
+        except Exception as e:
+            logger.error("Error loading link %s from SQLite: %s", link_id, e)
+            return None
+
+    def links_by_ids(self, link_ids):
+        link_ids = list(link_ids)
+        links_by_id = {}
+        conn = self._conn()
+        for start in range(0, len(link_ids), SQLITE_IN_BATCH):
+            chunk = link_ids[start:start + SQLITE_IN_BATCH]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in conn.execute(f"{_SQLITE_SELECT} WHERE id IN ({placeholders})", chunk):
+                links_by_id[row['id']] = self._row_to_link(row)
+        return [links_by_id[link_id] for link_id in link_ids if link_id in links_by_id]
+
+    def _fts_rows(self, term_lower):
+        phrase = '"' + term_lower.replace('"', '""') + '"'
+        return self._conn().execute(
+            f"SELECT {', '.join('l.' + c for c in _SQLITE_LINK_COLUMNS)} FROM links_fts"
+            " JOIN links l ON l.seq = links_fts.rowid WHERE links_fts MATCH ?", (phrase,)).fetchall()
+
+    def search(self, term_lower):
+        try:
+            if len(term_lower) < 3 or not self.has_fts:
+                return [link for link in self.all_links() if _link_matches_term(link, term_lower)]
+            candidates = (self._row_to_link(row) for row in self._fts_rows(term_lower))
+            return [link for link in candidates if _link_matches_term(link, term_lower)]
+        except Exception as e:
+            logger.error("Error searching links in SQLite: %s", e)
+            return []
+
+    def term_candidate_ids(self, term_lower):
+        if not self.has_fts:
+            return None
+        return {row['id'] for row in self._fts_rows(term_lower)}
+
+    def range_candidate_ids(self, sort_by, low, high):
+        column = _SQLITE_SORT_COLUMNS[sort_by]
+        rows = self._conn().execute(f"SELECT id FROM links WHERE {column} >= ? AND {column} < ?",
+                                    (low if low is not None else -2**63, high if high is not None else 2**63 - 1))
+        return {row['id'] for row in rows}
+
+    def reminders_between(self, low, high, limit):
+        try:
+            rows = self._conn().execute(
+                f"{_SQLITE_SELECT} WHERE reminder_timestamp >= ? AND reminder_timestamp < ?"
+                " ORDER BY reminder_timestamp, id LIMIT ?",
+                (low, high if high is not None else 2**63 - 1, limit if limit is not None else -1)).fetchall()
+            return [self._row_to_link(row) for row in rows]
+        except Exception as e:
+            logger.error("Error loading reminders from SQLite: %s", e)
+            return []
+
+    def add_link(self, new_link):
+        try:
+            with self._write() as conn:
+                if self._url_taken(conn, new_link['url']):
+                    return "duplicate_url"
+                self._insert(conn, new_link)
+            return new_link
+        except Exception as e:
+            logger.error("Error saving link to SQLite: %s", e)
+            return None
+
+    def update_link(self, link_id, updated_data):
+        try:
+            with self._write() as conn:
+                link = self._select_one(conn, link_id)
+                if not link:
+                    logger.warning("Link with ID %s not found for update.", link_id)
+                    return None
+                old_url = link['url'].strip()
+                new_url = updated_data['url'].strip() if 'url' in updated_data else old_url
+                if new_url != old_url and self._url_taken(conn, new_url, link_id):
+                    return "duplicate_url"
+                link.update(updated_data)
+                self._update_row(conn, link)
+            return link
+        except Exception as e:
+            logger.error("Error updating link %s in SQLite: %s", link_id, e)
+            return None
+
+    def delete_link(self, link_id):
+        try:
+            with self._write() as conn:
+                return conn.execute('DELETE FROM links WHERE id = ?', (link_id,)).rowcount > 0
+        except Exception as e:
+            logger.error("Error deleting link %s from SQLite: %s", link_id, e)
+            return False
+
+    def visit_link(self, link_id):
+        try:
+            with self._write() as conn:
+                row = conn.execute('SELECT url FROM links WHERE id = ?', (link_id,)).fetchone()
+                if row is None:
+                    return None
+                if not row['url']:
+                    return ''
+                conn.execute('UPDATE links SET visit_count = visit_count + 1, last_visited_timestamp = ? WHERE id = ?',
+                             (int(time.time()), link_id))
+            return row['url']
+        except Exception as e:
+            logger.error("Error recording visit for link %s in SQLite: %s", link_id, e)
+            return False
+
+    def apply_visits(self, visits):
+        with self._write() as conn:
+            cursor = conn.executemany(
+                'UPDATE links SET visit_count = visit_count + ?, last_visited_timestamp = MAX(last_visited_timestamp, ?)'
+                ' WHERE id = ?', [(count, last_visited, link_id) for link_id, (count, last_visited) in visits.items()])
+            return cursor.rowcount
+
+    def add_links_bulk(self, new_links):
+        results = []
+        with self._write() as conn:
+            for link in new_links:
+                if self._url_taken(conn, link['url']):
+                    results.append(_bulk_result(link['id'], 'duplicate_url'))
+                    continue
+                self._insert(conn, link)
+                results.append(_bulk_result(link['id'], 'ok', link))
+        return results
+
+    def update_links_bulk(self, updates):
+        results = []
+        with self._write() as conn:
+            for link_id, updated_data in updates:
+                link = self._select_one(conn, link_id)
+                if not link:
+                    results.append(_bulk_result(link_id, 'not_found'))
+                    continue
+                old_url = link['url'].strip()
+                new_url = updated_data['url'].strip() if 'url' in updated_data else old_url
+                if new_url != old_url and self._url_taken(conn, new_url, link_id):
+                    results.append(_bulk_result(link_id, 'duplicate_url'))
+                    continue
+                link.update(updated_data)
+                self._update_row(conn, link)
+                results.append(_bulk_result(link_id, 'ok', link))
+        return results
+
+    def delete_links_bulk(self, link_ids):
+        results = []
+        with self._write() as conn:
+            for link_id in link_ids:
+                deleted = conn.execute('DELETE FROM links WHERE id = ?', (link_id,)).rowcount > 0
+                results.append(_bulk_result(link_id, 'ok' if deleted else 'not_found'))
+        return results
+
+    def iter_links(self, batch_size):
+        # Keyset pagination, so no read transaction stays open while the caller works
+        last_key = (-2**63, '')
+        while True:
+            rows = self._conn().execute(f"{_SQLITE_SELECT} WHERE (created_timestamp, id) > (?, ?)"
+                                        " ORDER BY created_timestamp, id LIMIT ?", (*last_key, batch_size)).fetchall()
+            if not rows:
+                return
+            last_key = (rows[-1]['created_timestamp'], rows[-1]['id'])
+            yield from (self._row_to_link(row) for row in rows)
+
+    def import_batches(self, batches, summary):
+        for batch in batches: # One transaction per batch
+            with self._write() as conn:
+                for link in batch:
+                    if self._url_taken(conn, link['url']):
+                        summary['duplicates'] += 1
+                        continue
+                    if conn.execute('SELECT 1 FROM links WHERE id = ?', (link['id'],)).fetchone():
+                        link['id'] = str(uuid.uuid4())
+                    self._insert(conn, link)
+                    summary['imported'] += 1
+
+STORAGE_BACKENDS = {'redis': RedisBackend, 'json': JsonFileBackend, 'sqlite': SqliteBackend}
+
+def get_storage_backend():
+    """Returns the process-wide StorageBackend, creating it on first use."""
+    global _storage_backend
+    if _storage_backend is None:
+        client = get_kv_client() if LINK_STORAGE_BACKEND in ('', 'redis') else None
+        name = LINK_STORAGE_BACKEND or ('redis' if client else 'json')
+        if name not in STORAGE_BACKENDS:
+            logger.warning("Unknown LINK_STORAGE_BACKEND '%s'. Using the local JSON file.", name)
+            name = 'json'
+        if name == 'redis' and not client:
+            logger.warning("LINK_STORAGE_BACKEND is 'redis' but Vercel KV is unavailable. Using the local JSON file.")
+            name = 'json'
+        _storage_backend = STORAGE_BACKENDS[name]()
+    return _storage_backend
+
+def set_storage_backend(backend):
+    """Replaces the process-wide StorageBackend (a StorageBackend instance, or None to re-detect)."""
+    global _storage_backend
+    _storage_backend = backend
+
+# --- Core Link Operations (dispatched to the configured storage backend) ---
+@instrumented('get_links_version')
+def get_links_version():
+    """Returns a cheap stamp that changes whenever any link changes, or None if it can't be read."""
+    return get_storage_backend().version()
+
+@instrumented('get_all_links')
 def get_all_links():
-    return _load_links_from_kv() # Changed
+    # The link dicts may be shared with an in-process cache: copy before modifying them
+    return get_storage_backend().all_links()
 
-def add_new_link(url, title, notes, is_default, reminder_timestamp):
-    links = _load_links_from_kv() # Changed
+@instrumented('get_links_page')
+def get_links_page(sort_by, sort_order, page, page_size):
+    """Returns (links on the requested page, total number of links), read from the sort indexes."""
+    sort_by, start_index = _links_page_start(sort_by, page, page_size)
+    return get_storage_backend().links_page(sort_by, sort_order, start_index, page_size)
+
+def _links_page_start(sort_by, page, page_size):
+    # (sort key, index of the page's first link) for get_links_page's arguments
+    return (sort_by if sort_by in SORT_FIELDS else 'created'), (max(page, 1) - 1) * page_size
+
+# Keyset pagination: a cursor holds the (sort value, id) of the last link returned, so
+# the next page starts right after it however many links were added or removed in
+# front of it, and no backend has to skip over an offset.
+class CursorError(ValueError):
+    pass
+
+def encode_links_cursor(sort_by, sort_order, link):
+    key = _local_sort_entry(link, sort_by)
+    raw = json.dumps([sort_by, sort_order, key[0], key[1]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_links_cursor(cursor, sort_by, sort_order):
+    """Returns the (sort value, id) key in cursor; raises CursorError if it is malformed or for another ordering."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort_by, cursor_sort_order, value, link_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise CursorError("malformed cursor")
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise CursorError(f"cursor belongs to sort_by={cursor_sort_by} sort_order={cursor_sort_order}")
+    if not isinstance(link_id, str) or not isinstance(value, str if sort_by == 'title' else (int, float)):
+        raise CursorError("malformed cursor")
+    return (value, link_id)
+
+@instrumented('get_links_after')
+def get_links_after(sort_by, sort_order, cursor=None, limit=50):
+    """Returns (up to limit links following cursor in the ordering, cursor for the next page or None)."""
+    if sort_by not in SORT_FIELDS:
+        sort_by = 'created'
+    sort_order = 'desc' if sort_order == 'desc' else 'asc'
+    after = decode_links_cursor(cursor, sort_by, sort_order) if cursor else None
+    links = get_storage_backend().links_after(sort_by, sort_order, after, limit + 1)
+    if len(links) <= limit:
+        return links, None
+    links = links[:limit]
+    return links, encode_links_cursor(sort_by, sort_order, links[-1])
+
+# Top-K views ("most visited", "recently visited") read the head of a sort index: a
+# ZREVRANGE on KV and an index scan with LIMIT in SQLite, O(log N + k); the JSON file
+# uses its sort index when it is already built and heapq.nlargest, O(N log k), otherwise.
+TOP_LINKS_DEFAULT_K = 10
+
+@instrumented('top_links')
+def top_links(by, k=TOP_LINKS_DEFAULT_K):
+    """The k links with the largest value of a SORT_FIELDS key, largest first; zero values are left out."""
+    if by not in SORT_FIELDS:
+        raise ValueError(f"unknown sort field: {by}")
+    if k <= 0:
+        return []
+    links = get_storage_backend().top_links(by, k)
+    if by == 'title':
+        return links
+    # 0 means "never" (not visited, no reminder); zeros sort last, so this only trims the tail
+    field = SORT_FIELDS[by]
+    return [link for link in links if link.get(field)]
+
+@instrumented('search_links')
+def search_links(search_term):
+    """Basic search over title/url/notes of the whole collection, answered from the trigram index."""
+    term_lower = search_term.strip().lower()
+    if not term_lower:
+        return []
+    matches = get_storage_backend().search(term_lower)
+    matches.sort(key=lambda link: (link.get('created_timestamp', 0), link['id']))
+    return matches
+
+# Reminders are read from the reminder_time sort index (a ZSET on KV, a sorted list
+# locally, a B-tree in SQLite), so both views cost O(log N + k) in the number returned.
+# A reminder_timestamp of 0 means no reminder is set.
+@instrumented('due_reminders')
+def due_reminders(now=None, limit=None):
+    """Links whose reminder time is at or before now, oldest first."""
+    now_ts = int(time.time()) if now is None else int(now)
+    return get_storage_backend().reminders_between(1, now_ts + 1, limit)
+
+@instrumented('upcoming_reminders')
+def upcoming_reminders(now=None, limit=None):
+    """Links whose reminder time is after now, soonest first."""
+    now_ts = int(time.time()) if now is None else int(now)
+    return get_storage_backend().reminders_between(now_ts + 1, None, limit)
+
+def _new_link_record(url, title, notes, is_default, reminder_timestamp):
     normalized_url = url.strip()
-    for existing_link in links:
-        if existing_link.get('url', '').strip() == normalized_url:
-            return "duplicate_url"
-    new_link = {
-        "id": str(uuid.uuid4()), "url": normalized_url,
-        "title": title.strip() if title.strip() else normalized_url,
-        "notes": notes.strip(), "is_default": is_default,
-        "reminder_timestamp": reminder_timestamp if reminder_timestamp else 0,
-        "last_visited_timestamp": 0, "visit_count": 0,
-        "created_timestamp": int(time.time())
-    }
-    links.append(new_link)
-    if _save_links_to_kv(links): # Changed
-        return new_link
-    else:
-        return None
+    return Link(
+        id=str(uuid.uuid4()), url=normalized_url,
+        title=title.strip() if title.strip() else normalized_url,
+        notes=notes.strip(), is_default=is_default,
+        reminder_timestamp=reminder_timestamp if reminder_timestamp else 0,
+        last_visited_timestamp=0, visit_count=0,
+        created_timestamp=int(time.time())
+    )
+
+@instrumented('add_new_link')
+def add_new_link(url, title, notes, is_default, reminder_timestamp):
+    # Returns the new link, "duplicate_url" if the url is already stored, or None
+    new_link = _new_link_record(url, title, notes, is_default, reminder_timestamp)
+    return _link_dict(get_storage_backend().add_link(new_link))
 
+@instrumented('get_link_by_id')
 def get_link_by_id(link_id):
-    links = _load_links_from_kv() # Changed
-    for link in links:
-        if link.get('id') == link_id:
-            return link
-    return None
+    return _link_dict(get_storage_backend().get_link(link_id))
 
+@instrumented('update_link')
 def update_link(link_id, updated_data):
-    links = _load_links_from_kv() # Changed
-    link_found = False
-    updated_link_details = None
-    for i, link in enumerate(links):
-        if link.get('id') == link_id:
-            # Your existing update logic for link keys
-            for key, value in updated_data.items():
-                link[key] = value # Ensure you only update valid keys
-            links[i] = link # Update the link in the list
-            updated_link_details = link
-            link_found = True
-            break
-    if link_found and _save_links_to_kv(links): # Changed
-        return updated_link_details
-    elif not link_found:
-        print(f"Error: Link with ID {link_id} not found for update.")
-    return None
+    # Returns the updated link, "duplicate_url" if the new url belongs to another link, or None
+    return _link_dict(get_storage_backend().update_link(link_id, updated_data))
 
+@instrumented('delete_link_by_id')
 def delete_link_by_id(link_id):
-    all_links = _load_links_from_kv() # Changed
-    if all_links is None: return False # Should ideally not happen if _load_links_from_kv returns [] on error
-    original_length = len(all_links)
-    links_to_keep = [link for link in all_links if link.get('id') != link_id]
-    if len(links_to_keep) < original_length:
-        if _save_links_to_kv(links_to_keep): # Changed
-            return True
-        else:
-            return False
-    else:
-        return False # Link not found
+    return get_storage_backend().delete_link(link_id)
+
+@instrumented('visit_link')
+def visit_link(link_id):
+    # Returns the link's url after counting the visit, None if the link doesn't exist,
+    # False on a storage error. Links without a url are returned as '' and not counted.
+    if VISIT_WRITE_BEHIND:
+        link = get_link_by_id(link_id) # A read only; the count is buffered
+        if not link:
+            return None
+        if not link.get('url'):
+            return ''
+        buffer_visit(link_id)
+        return link['url']
+    return get_storage_backend().visit_link(link_id)
 
 def record_link_visit(link_id):
-    links = _load_links_from_kv() # Changed
-    link_to_update = None
-    for current_link in links:
-        if current_link.get('id') == link_id:
-            link_to_update = current_link
-            break
-    if link_to_update:
-        link_to_update.setdefault('visit_count', 0) # Ensure keys exist before incrementing
-        link_to_update.setdefault('last_visited_timestamp', 0)
-        link_to_update['visit_count'] += 1
-        link_to_update['last_visited_timestamp'] = int(time.time())
-        if _save_links_to_kv(links): # Changed
-            return True
+    return bool(visit_link(link_id))
+
+# --- Write-behind Visit Buffering ---
+# Optional (LINK_VISIT_WRITE_BEHIND=1): visit_link only reads the link and bumps an
+# in-process counter, and a background thread flushes the counters to storage in one
+# batch every VISIT_FLUSH_INTERVAL seconds, as soon as VISIT_FLUSH_THRESHOLD visits are
+# pending, and at interpreter exit. Visit counts shown to users lag by up to one
+# interval, and visits still buffered when a process is killed outright are lost.
+VISIT_WRITE_BEHIND = os.getenv('LINK_VISIT_WRITE_BEHIND', '').strip().lower() in ('1', 'true', 'yes', 'on')
+VISIT_FLUSH_INTERVAL = float(os.getenv('LINK_VISIT_FLUSH_INTERVAL', '5'))
+VISIT_FLUSH_THRESHOLD = int(os.getenv('LINK_VISIT_FLUSH_THRESHOLD', '500'))
+_visit_buffer = {} # link_id -> [pending visit count, newest visit timestamp]
+_visit_buffer_state = {'pending': 0, 'flusher_pid': None}
+_visit_buffer_lock = threading.Lock()
+_visit_flush_lock = threading.Lock() # One flush at a time, so batches reach storage in order
+_visit_flush_wakeup = threading.Event()
+
+def _visit_flusher_loop():
+    while True:
+        _visit_flush_wakeup.wait(VISIT_FLUSH_INTERVAL)
+        _visit_flush_wakeup.clear()
+        flush_visits()
+
+def _ensure_visit_flusher():
+    # Started lazily, and again in a forked worker (threads don't survive fork)
+    if _visit_buffer_state['flusher_pid'] == os.getpid():
+        return
+    _visit_buffer_state['flusher_pid'] = os.getpid()
+    threading.Thread(target=_visit_flusher_loop, name='visit-flusher', daemon=True).start()
+
+def buffer_visit(link_id, timestamp=None):
+    """Counts one visit in memory; it reaches storage on the next flush_visits()."""
+    timestamp = int(time.time()) if timestamp is None else int(timestamp)
+    with _visit_buffer_lock:
+        _ensure_visit_flusher()
+        entry = _visit_buffer.get(link_id)
+        if entry is None:
+            _visit_buffer[link_id] = [1, timestamp]
         else:
-            return False
+            entry[0] += 1
+            entry[1] = max(entry[1], timestamp)
+        _visit_buffer_state['pending'] += 1
+        if _visit_buffer_state['pending'] >= VISIT_FLUSH_THRESHOLD:
+            _visit_flush_wakeup.set()
+
+@instrumented('flush_visits')
+def flush_visits():
+    """Writes all buffered visits to storage in one batch. Returns the number of links updated."""
+    with _visit_flush_lock:
+        with _visit_buffer_lock:
+            if not _visit_buffer:
+                return 0
+            visits = {link_id: tuple(entry) for link_id, entry in _visit_buffer.items()}
+            _visit_buffer.clear()
+            _visit_buffer_state['pending'] = 0
+        try:
+            return get_storage_backend().apply_visits(visits)
+        except Exception as e:
+            logger.warning("Error flushing %s buffered visits: %s. Will retry.", len(visits), e)
+            with _visit_buffer_lock: # Merge back so the next flush retries them
+                for link_id, (count, last_visited) in visits.items():
+                    entry = _visit_buffer.setdefault(link_id, [0, 0])
+                    entry[0] += count
+                    entry[1] = max(entry[1], last_visited)
+                    _visit_buffer_state['pending'] += count
+            return 0
+
+atexit.register(flush_visits)
+
+# --- Batch Mutations ---
+# add_links_bulk / update_links_bulk / delete_links_bulk apply a whole batch with one
+# local file write, or a fixed handful of pipelined KV round trips ending in a single
+# MULTI, instead of one load-modify-save cycle per link. Each returns one result per
+# input item: {'id': ..., 'status': 'ok' | 'duplicate_url' | 'not_found' | 'invalid' | 'error', 'link': ...}
+def _bulk_result(link_id, status, link=None):
+    return {'id': link_id, 'status': status, 'link': _link_dict(link)}
+
+def _kv_claim_urls(claims):
+    # Pipelined version of _kv_claim_url_steps for a list of (url, link_id) pairs. Ids claimed
+    # earlier in the same batch count as live owners even though they aren't written yet.
+    pipe = kv_client.pipeline(transaction=False)
+    for url, link_id in claims:
+        pipe.hsetnx(LINK_URLS_KEY, url, link_id)
+    claimed = [bool(ok) for ok in pipe.execute()]
+    retry = [i for i, ok in enumerate(claimed) if not ok]
+    if not retry:
+        return claimed
+    live_ids = {link_id for (_url, link_id), ok in zip(claims, claimed) if ok}
+    owners = kv_client.hmget(LINK_URLS_KEY, [claims[i][0] for i in retry])
+    pipe = kv_client.pipeline(transaction=False)
+    for owner_id in owners:
+        pipe.exists(_link_key(owner_id or ''))
+    owner_exists = pipe.execute()
+    taken_over = set()
+    pipe = kv_client.pipeline(transaction=False)
+    for i, owner_id, exists in zip(retry, owners, owner_exists):
+        url, link_id = claims[i]
+        if owner_id == link_id:
+            claimed[i] = True
+        elif not exists and owner_id not in live_ids and url not in taken_over:
+            pipe.hset(LINK_URLS_KEY, url, link_id) # Stale entry left by a deleted link
+            taken_over.add(url)
+            claimed[i] = True
+    pipe.execute()
+    return claimed
+
+def _kv_add_links_bulk(new_links, results):
+    claimed = _kv_claim_urls([(link['url'], link['id']) for link in new_links])
+    pipe = kv_client.pipeline(transaction=True)
+    for link, url_claimed in zip(new_links, claimed):
+        if not url_claimed:
+            results.append(_bulk_result(link['id'], 'duplicate_url'))
+            continue
+        pipe.hset(_link_key(link['id']), mapping=_encode_link_hash(link))
+        _kv_add_to_indexes(pipe, link)
+        results.append(_bulk_result(link['id'], 'ok', link))
+    pipe.incr(LINKS_VERSION_KEY)
+    pipe.execute()
+
+def _kv_update_links_bulk(updates, results):
+    # Every touched link key is WATCHed; the reads go through a separate pipeline so a
+    # large batch still costs one round trip, and a conflict re-runs the whole batch.
+    claimed_urls = {}
+
+    def apply(pipe):
+        del results[:]
+        reader = kv_client.pipeline(transaction=False)
+        for link_id, _updated_data in updates:
+            reader.hgetall(_link_key(link_id))
+        old_hashes = reader.execute()
+        changes = []
+        claims = []
+        for (link_id, updated_data), old_hash in zip(updates, old_hashes):
+            if not old_hash:
+                changes.append(None)
+                continue
+            old_link = _decode_link_hash(old_hash)
+            new_link = dict(old_link, **updated_data)
+            new_url = new_link['url'].strip()
+            url_changed = new_url != old_link['url'].strip()
+            if url_changed:
+                claims.append((new_url, link_id))
+            changes.append((old_link, new_link, url_changed))
+        claimed = iter(_kv_claim_urls(claims) if claims else [])
+        pipe.multi()
+        for (link_id, updated_data), change in zip(updates, changes):
+            if change is None:
+                results.append(_bulk_result(link_id, 'not_found'))
+                continue
+            old_link, new_link, url_changed = change
+            if url_changed:
+                if not next(claimed):
+                    results.append(_bulk_result(link_id, 'duplicate_url'))
+                    continue
+                claimed_urls[new_link['url'].strip()] = link_id
+            old_grams = _link_trigrams(old_link)
+            new_grams = _link_trigrams(new_link)
+            if updated_data:
+                pipe.hset(_link_key(link_id), mapping=_encode_link_hash(updated_data))
+            _kv_remove_from_indexes(pipe, old_link, grams=old_grams - new_grams)
+            _kv_add_to_indexes(pipe, new_link, grams=new_grams - old_grams)
+            if url_changed and old_link['url'].strip():
+                pipe.hdel(LINK_URLS_KEY, old_link['url'].strip())
+            results.append(_bulk_result(link_id, 'ok', new_link))
+        pipe.incr(LINKS_VERSION_KEY)
+        pipe.execute()
+
+    try:
+        _kv_cas([_link_key(link_id) for link_id, _updated_data in updates], apply)
+    except Exception:
+        for url, link_id in claimed_urls.items():
+            _kv_release_url(url, link_id)
+        raise
+
+def _kv_delete_links_bulk(link_ids, results):
+    def apply(pipe):
+        del results[:]
+        reader = kv_client.pipeline(transaction=False)
+        for link_id in link_ids:
+            reader.hmget(_link_key(link_id), ['title', 'url', 'notes'])
+        fields = reader.execute()
+        urls = [(url or '').strip() for _title, url, _notes in fields]
+        owners = kv_client.hmget(LINK_URLS_KEY, urls) if urls else []
+        pipe.multi()
+        for link_id, (title, url, notes), owner_id in zip(link_ids, fields, owners):
+            if url is None:
+                results.append(_bulk_result(link_id, 'not_found'))
+                continue
+            pipe.delete(_link_key(link_id))
+            _kv_remove_from_indexes(pipe, {'id': link_id, 'title': title or '', 'url': url, 'notes': notes or ''})
+            if url.strip() and owner_id == link_id:
+                pipe.hdel(LINK_URLS_KEY, url.strip())
+            results.append(_bulk_result(link_id, 'ok'))
+        pipe.incr(LINKS_VERSION_KEY)
+        pipe.execute()
+
+    _kv_cas([_link_key(link_id) for link_id in link_ids], apply)
+
+def _bulk_rounds(items, item_id):
+    # Positions of items split into rounds in which no id repeats; the nth occurrence
+    # of an id goes in round n
+    rounds = []
+    occurrences = {}
+    for position, item in enumerate(items):
+        occurrence = occurrences.get(item_id(item), 0)
+        occurrences[item_id(item)] = occurrence + 1
+        if occurrence == len(rounds):
+            rounds.append([])
+        rounds[occurrence].append(position)
+    return rounds
+
+def _run_bulk(apply, items, item_id):
+    try:
+        return apply(items)
+    except Exception as e:
+        logger.error("Error applying bulk change: %s", e)
+        return [_bulk_result(item_id(item), 'error') for item in items]
+
+def _local_add_links_bulk(state, new_links, results):
+    for link in new_links:
+        if link['url'] in state['url_index']:
+            results.append(_bulk_result(link['id'], 'duplicate_url'))
+            continue
+        state['links_by_id'][link['id']] = link
+        _local_index_add(state, link)
+        results.append(_bulk_result(link['id'], 'ok', link))
+
+def _local_update_links_bulk(state, updates, results):
+    for link_id, updated_data in updates:
+        link = state['links_by_id'].get(link_id)
+        if not link:
+            results.append(_bulk_result(link_id, 'not_found'))
+            continue
+        old_url = link.get('url', '').strip()
+        new_url = updated_data['url'].strip() if 'url' in updated_data else old_url
+        if new_url != old_url and state['url_index'].get(new_url, link_id) != link_id:
+            results.append(_bulk_result(link_id, 'duplicate_url'))
+            continue
+        _local_index_remove(state, link)
+        link.update(updated_data)
+        _local_index_add(state, link)
+        results.append(_bulk_result(link_id, 'ok', dict(link)))
+
+def _local_delete_links_bulk(state, link_ids, results):
+    for link_id in link_ids:
+        link = state['links_by_id'].pop(link_id, None)
+        if not link:
+            results.append(_bulk_result(link_id, 'not_found'))
+            continue
+        _local_index_remove(state, link)
+        results.append(_bulk_result(link_id, 'ok'))
+
+@instrumented('add_links_bulk')
+def add_links_bulk(items):
+    """Adds many links at once; items are dicts with add_new_link's arguments (url, title, notes, ...)."""
+    new_links = []
+    invalid = []
+    for position, item in enumerate(items):
+        if not str(item.get('url', '')).strip():
+            invalid.append(position)
+            continue
+        new_links.append(_new_link_record(item['url'], item.get('title', ''), item.get('notes', ''),
+                                          item.get('is_default', False), item.get('reminder_timestamp', 0)))
+    results = _run_bulk(get_storage_backend().add_links_bulk, new_links, lambda link: link['id'])
+    for position in invalid: # Slot the rejected items back in at their original positions
+        results.insert(position, _bulk_result(None, 'invalid'))
+    return results
+
+@instrumented('update_links_bulk')
+def update_links_bulk(updates):
+    """Applies many updates at once; updates is a list of (link_id, updated_data) pairs."""
+    return _run_bulk(get_storage_backend().update_links_bulk, list(updates), lambda update: update[0])
+
+@instrumented('delete_links_bulk')
+def delete_links_bulk(link_ids):
+    """Deletes many links at once."""
+    return _run_bulk(get_storage_backend().delete_links_bulk, list(link_ids), lambda link_id: link_id)
+
+# --- Bulk Import / Export (streaming) ---
+# Exports are written one record at a time (KV links are fetched a batch of ids at a
+# time), and imports are parsed incrementally and committed in batches, so neither
+# side ever holds a whole backup file in memory. Supported formats: 'json' (an array
+# of link objects, as written by older versions) and 'ndjson' (one object per line).
+IMPORT_BATCH_SIZE = 1000
+_JSON_WHITESPACE = ' \t\r\n'
+
+def iter_links(batch_size=KV_PIPELINE_BATCH):
+    """Yields every link in creation order without materializing the whole collection."""
+    return get_storage_backend().iter_links(batch_size)
+
+@instrumented('export_links')
+def export_links(path, fmt='json'):
+    """Streams every link to path as a JSON array or NDJSON. Returns the number written, or None on error."""
+    count = 0
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            if fmt == 'json':
+                f.write('[')
+            for link in iter_links():
+                if fmt == 'json':
+                    f.write(',\n' if count else '\n')
+                f.write(json.dumps(link, default=_json_default))
+                if fmt == 'ndjson':
+                    f.write('\n')
+                count += 1
+            if fmt == 'json':
+                f.write('\n]\n')
+        return count
+    except Exception as e:
+        logger.error("Error exporting links to %s: %s", path, e)
+        return None
+
+def _iter_json_array(f, chunk_size=1 << 16):
+    # Incremental parser for a top-level JSON array of objects: only the current chunk
+    # and the object being decoded are held in memory.
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def skip(chars):
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+    skip(_JSON_WHITESPACE)
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise ValueError("Expected a JSON array of links.")
+    pos += 1
+    while True:
+        skip(_JSON_WHITESPACE + ',')
+        if pos >= len(buffer):
+            raise ValueError("Unterminated JSON array.")
+        if buffer[pos] == ']':
+            return
+        if buffer[pos] != '{':
+            raise ValueError(f"Expected a link object, found {buffer[pos]!r}.")
+        while True:
+            try:
+                # An object cut off at the chunk boundary always fails to decode, so
+                # a successful decode is never a truncated record.
+                obj, pos = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+        yield obj
+
+def _iter_ndjson(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def _coerce_imported_link(raw):
+    # Normalizes one imported record into the stored link shape, or None if unusable
+    if not isinstance(raw, dict):
+        return None
+    url = str(raw.get('url') or '').strip()
+    if not url:
+        return None
+    link = Link(id=str(raw.get('id') or uuid.uuid4()), url=url,
+                title=str(raw.get('title') or '').strip() or url,
+                notes=str(raw.get('notes') or ''),
+                is_default=bool(raw.get('is_default', False)))
+    for field in LINK_INT_FIELDS:
+        try:
+            link[field] = int(float(raw.get(field) or 0))
+        except (TypeError, ValueError):
+            link[field] = 0
+    if not link['created_timestamp']:
+        link['created_timestamp'] = int(time.time())
+    return link
+
+def _kv_import_batch(batch, summary):
+    # One round trip for id collisions, one (occasionally three) for the url claims, one for the writes
+    pipe = kv_client.pipeline(transaction=False)
+    for link in batch:
+        pipe.exists(_link_key(link['id']))
+    for link, id_taken in zip(batch, pipe.execute()):
+        if id_taken:
+            link['id'] = str(uuid.uuid4())
+    claimed = _kv_claim_urls([(link['url'], link['id']) for link in batch])
+    pipe = kv_client.pipeline(transaction=False)
+    for link, url_claimed in zip(batch, claimed):
+        if not url_claimed:
+            summary['duplicates'] += 1
+            continue
+        pipe.hset(_link_key(link['id']), mapping=_encode_link_hash(link))
+        _kv_add_to_indexes(pipe, link)
+        summary['imported'] += 1
+    pipe.incr(LINKS_VERSION_KEY)
+    pipe.execute()
+
+def _local_import_batch(state, batch, summary):
+    for link in batch:
+        if link['url'] in state['url_index']:
+            summary['duplicates'] += 1
+            continue
+        if link['id'] in state['links_by_id']:
+            link['id'] = str(uuid.uuid4())
+        state['links_by_id'][link['id']] = link
+        _local_index_add(state, link)
+        summary['imported'] += 1
+
+def _import_batches(records, summary, batch_size):
+    batch = []
+    for raw in records:
+        link = _coerce_imported_link(raw)
+        if link is None:
+            summary['invalid'] += 1
+            continue
+        batch.append(link)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+@instrumented('import_links')
+def import_links(path, fmt=None, batch_size=IMPORT_BATCH_SIZE):
+    """Streams links from a JSON array or NDJSON file (fmt=None detects it), skipping urls that already exist."""
+    # Returns {'imported': n, 'duplicates': n, 'invalid': n}, or None on error
+    summary = {'imported': 0, 'duplicates': 0, 'invalid': 0}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if fmt is None:
+                first_char = f.read(1)
+                while first_char and first_char in _JSON_WHITESPACE:
+                    first_char = f.read(1)
+                f.seek(0)
+                fmt = 'json' if first_char == '[' else 'ndjson'
+            records = _iter_json_array(f) if fmt == 'json' else _iter_ndjson(f)
+            get_storage_backend().import_batches(_import_batches(records, summary, batch_size), summary)
+        return summary
+    except Exception as e:
+        logger.error("Error importing links from %s: %s", path, e)
+        return None
+
+# --- Advanced Query Engine (shared by the CLI and the web /links?q= filter) ---
+# Syntax: whitespace-separated terms are ANDed; OR, NOT / -term and parentheses work
+# as expected. Terms are plain words (matched against title/url/notes like basic
+# search), text filters (title:work, url:"some site", notes:x), is:default /
+# is:not-default, or ranges on visits/visit_count and on the created, last_visited and
+# reminder timestamps: visits:>5, visits:2..10, created:>=2025-01-01, reminder:<2025-06-01T09:00.
+# A query is parsed once into a tree of tuples, compiled into a predicate, and the
+# trigram and sort indexes narrow the candidates before the predicate runs.
+class QueryError(ValueError):
+    pass
+
+QUERY_TEXT_FIELDS = ('title', 'url', 'notes')
+QUERY_RANGE_FIELDS = {
+    'visits': 'visit_count', 'visit_count': 'visit_count',
+    'created': 'created', 'last_visited': 'last_visited',
+    'reminder': 'reminder_time', 'reminder_time': 'reminder_time',
+}
+_QUERY_TOKEN_RE = re.compile(r'\(|\)|[^\s()"]*"[^"]*"|[^\s()]+')
+
+def _query_tokens(query_str):
+    if query_str.count('"') % 2:
+        raise QueryError("Unbalanced quotes in query.")
+    return _QUERY_TOKEN_RE.findall(query_str)
+
+def _query_value_span(value, field):
+    # Returns the half-open span [start, end) a single value covers: an exact number,
+    # a whole day for YYYY-MM-DD, or a minute for YYYY-MM-DDTHH:MM.
+    try:
+        number = int(value)
+        return number, number + 1
+    except ValueError:
+        pass
+    if field == 'visit_count':
+        raise QueryError(f"Invalid number for visits: '{value}'.")
+    for fmt, width in (('%Y-%m-%d', 86400), ('%Y-%m-%dt%H:%M', 60), ('%Y-%m-%d %H:%M', 60)):
+        try:
+            start = int(datetime.strptime(value, fmt).timestamp())
+            return start, start + width
+        except ValueError:
+            continue
+    raise QueryError(f"Invalid date '{value}'. Use YYYY-MM-DD, YYYY-MM-DDTHH:MM or a unix timestamp.")
+
+def _parse_range_term(field, value):
+    low = high = None
+    if '..' in value:
+        low_str, high_str = value.split('..', 1)
+        if low_str: low = _query_value_span(low_str, field)[0]
+        if high_str: high = _query_value_span(high_str, field)[1]
+    elif value.startswith('>='):
+        low = _query_value_span(value[2:], field)[0]
+    elif value.startswith('<='):
+        high = _query_value_span(value[2:], field)[1]
+    elif value.startswith('>'):
+        low = _query_value_span(value[1:], field)[1]
+    elif value.startswith('<'):
+        high = _query_value_span(value[1:], field)[0]
     else:
-        return False
+        low, high = _query_value_span(value.lstrip('='), field)
+    if field != 'visit_count':
+        low = max(low or 1, 1) # A timestamp of 0 means "never"/"not set" and never matches a range
+    return ('range', field, low, high)
 
-# --- Your existing helper functions (format_web_timestamp, get_daily_time_status, search, sort) ---
-# These should largely remain the same as they operate on the data after it's loaded.
-# Make sure they use the global CONFIG variable which is now loaded from KV.
+def _parse_query_atom(token):
+    token = token.lower()
+    if ':' not in token or token.startswith('"'):
+        value = token.strip('"')
+        if not value:
+            raise QueryError("Empty search term.")
+        return ('text', None, value)
+    field, value = token.split(':', 1)
+    value = value.strip('"')
+    if not value:
+        raise QueryError(f"Missing value for '{field}'.")
+    if field in QUERY_TEXT_FIELDS:
+        return ('text', field, value)
+    if field == 'is':
+        if value not in ('default', 'not-default'):
+            raise QueryError(f"Invalid value for 'is': '{value}'.")
+        return ('default', value == 'default')
+    if field in QUERY_RANGE_FIELDS:
+        return _parse_range_term(QUERY_RANGE_FIELDS[field], value)
+    raise QueryError(f"Invalid field: '{field}'.")
 
-def format_web_timestamp(ts):
-    global CONFIG
-    if not CONFIG: load_config() # Ensure config is loaded
-    if not ts or ts == 0: return "N/A"
-    date_format_str = get_active_date_format_str()
+def parse_link_query(query_str):
+    """Parses an advanced query string into a tree of ('and'|'or'|'not'|'text'|'default'|'range', ...) tuples."""
+    tokens = _query_tokens(query_str)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def parse_or():
+        nonlocal pos
+        children = [parse_and()]
+        while peek() is not None and peek().upper() == 'OR':
+            pos += 1
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else ('or', children)
+
+    def parse_and():
+        nonlocal pos
+        children = []
+        while peek() is not None and peek() != ')' and peek().upper() != 'OR':
+            if peek().upper() == 'AND':
+                pos += 1
+                continue
+            children.append(parse_unary())
+        if not children:
+            raise QueryError("Expected a search term.")
+        return children[0] if len(children) == 1 else ('and', children)
+
+    def parse_unary():
+        nonlocal pos
+        token = peek()
+        if token == ')':
+            raise QueryError("Unexpected ')' in query.")
+        if token.upper() == 'NOT':
+            pos += 1
+            if peek() is None:
+                raise QueryError("NOT must be followed by a term.")
+            return ('not', parse_unary())
+        if token == '(':
+            pos += 1
+            node = parse_or()
+            if peek() != ')':
+                raise QueryError("Missing closing parenthesis.")
+            pos += 1
+            return node
+        pos += 1
+        if token.startswith('-') and len(token) > 1:
+            return ('not', _parse_query_atom(token[1:]))
+        return _parse_query_atom(token)
+
+    if not tokens:
+        raise QueryError("Query is empty.")
+    tree = parse_or()
+    if pos != len(tokens):
+        raise QueryError(f"Unexpected '{tokens[pos]}' in query.")
+    return tree
+
+def compile_link_query(query):
+    """Compiles a query string (or a tree from parse_link_query) into a predicate taking a link dict."""
+    node = parse_link_query(query) if isinstance(query, str) else query
+    kind = node[0]
+    if kind == 'and':
+        predicates = [compile_link_query(child) for child in node[1]]
+        return lambda link: all(predicate(link) for predicate in predicates)
+    if kind == 'or':
+        predicates = [compile_link_query(child) for child in node[1]]
+        return lambda link: any(predicate(link) for predicate in predicates)
+    if kind == 'not':
+        inner = compile_link_query(node[1])
+        return lambda link: not inner(link)
+    if kind == 'text':
+        _kind, field, value = node
+        if field is None:
+            return lambda link: _link_matches_term(link, value)
+        return lambda link: value in str(link.get(field, '')).lower()
+    if kind == 'default':
+        wanted = node[1]
+        return lambda link: bool(link.get('is_default')) == wanted
+    _kind, sort_by, low, high = node
+    link_field = SORT_FIELDS[sort_by]
+    return lambda link: (low is None or (link.get(link_field, 0) or 0) >= low) and \
+                        (high is None or (link.get(link_field, 0) or 0) < high)
+
+def _plan_candidate_ids(node, term_candidates, range_candidates):
+    # Returns a superset of the ids matching node using the indexes, or None when the
+    # node can't be answered from an index (NOT, is:default, short text).
+    kind = node[0]
+    if kind == 'text':
+        return term_candidates(node[2]) if len(node[2]) >= 3 else None
+    if kind == 'range':
+        return range_candidates(node[1], node[2], node[3])
+    if kind == 'and':
+        # Trigram postings are usually far more selective than a range, so prefer them
+        text_sets = [_plan_candidate_ids(c, term_candidates, range_candidates) for c in node[1] if c[0] == 'text']
+        candidate_sets = [ids for ids in text_sets if ids is not None]
+        if not candidate_sets:
+            candidate_sets = [_plan_candidate_ids(c, term_candidates, range_candidates) for c in node[1] if c[0] != 'text']
+            candidate_sets = [ids for ids in candidate_sets if ids is not None]
+        if not candidate_sets:
+            return None
+        candidate_sets.sort(key=len)
+        result = set(candidate_sets[0])
+        for ids in candidate_sets[1:]:
+            result &= ids
+        return result
+    if kind == 'or':
+        result = set()
+        for child in node[1]:
+            ids = _plan_candidate_ids(child, term_candidates, range_candidates)
+            if ids is None:
+                return None
+            result |= ids
+        return result
+    return None
+
+@instrumented('query_links')
+def query_links(query_str):
+    """Returns every link matching an advanced query string. Raises QueryError on bad syntax."""
+    tree = parse_link_query(query_str)
+    predicate = compile_link_query(tree)
+    candidates = get_storage_backend().query_candidates(tree)
+    matches = [link for link in candidates if predicate(link)]
+    matches.sort(key=lambda link: (link.get('created_timestamp', 0), link['id']))
+    return matches
+
+# --- Render cache ---
+# Formatting a timestamp only depends on (timestamp, format), and the same timestamps
+# come back page after page, so the strings are memoized; only the elapsed/upcoming
+# status depends on the current time, and that is a plain comparison against one
+# "now" per request. The caches are bounded LRUs, so they stay small however many
+# links pass through.
+RENDER_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _format_timestamp_cached(ts, date_format_str):
     try:
         return datetime.fromtimestamp(ts).strftime(date_format_str)
     except (ValueError, OSError):
         return "Invalid Date"
 
-def get_daily_time_status(reminder_timestamp):
-    # This function seems fine as is, assuming reminder_timestamp is correct
-    if not reminder_timestamp or reminder_timestamp == 0:
-        return {'display_time': "N/A", 'status': "n_a"}
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _reminder_display_time(reminder_timestamp):
+    # "9:05 AM" for a reminder timestamp, or None if it cannot be converted
     try:
         reminder_datetime_obj = datetime.fromtimestamp(reminder_timestamp)
-        hour_12 = reminder_datetime_obj.strftime('%I')
-        if hour_12.startswith('0'):
-            hour_12 = hour_12[1:]
-        display_time = f"{hour_12}:{reminder_datetime_obj.strftime('%M %p')}"
-        now = datetime.now()
-        reminder_time_of_day = reminder_datetime_obj.time()
-        # Check if reminder_datetime_obj's date is today, or if it's just a time
-        # For simplicity, assuming reminder_timestamp is an absolute point in time
-        if reminder_datetime_obj < now:
-            status = "elapsed" # Changed from "elapsed_today" for clarity if ts is absolute
-        else:
-            status = "upcoming" # Changed from "upcoming_today"
-        return {'display_time': display_time, 'status': status}
-    except (ValueError, OSError) as e:
-        print(f"Error processing reminder timestamp {reminder_timestamp}: {e}")
+    except (ValueError, OSError, OverflowError) as e:
+        logger.error("Error processing reminder timestamp %s: %s", reminder_timestamp, e)
+        return None
+    hour_12 = reminder_datetime_obj.strftime('%I')
+    if hour_12.startswith('0'):
+        hour_12 = hour_12[1:]
+    return f"{hour_12}:{reminder_datetime_obj.strftime('%M %p')}"
+
+def format_web_timestamp(ts, date_format_str=None):
+    # Pass date_format_str (from get_active_date_format_str()) when formatting many
+    # timestamps, e.g. once per request, so no call has to look at the config
+    if not ts or ts == 0: return "N/A"
+    if date_format_str is None:
+        date_format_str = get_active_date_format_str()
+    return _format_timestamp_cached(ts, date_format_str)
+
+def get_daily_time_status(reminder_timestamp, now=None):
+    # Pass now (a datetime or a timestamp) when formatting many links so it is only computed once
+    if not reminder_timestamp or reminder_timestamp == 0:
+        return {'display_time': "N/A", 'status': "n_a"}
+    display_time = _reminder_display_time(reminder_timestamp)
+    if display_time is None:
         return {'display_time': "Invalid Date", 'status': "n_a"}
+    if now is None:
+        now = time.time()
+    elif isinstance(now, datetime):
+        now = now.timestamp()
+    # reminder_timestamp is an absolute point in time
+    status = "elapsed" if reminder_timestamp < now else "upcoming"
+    return {'display_time': display_time, 'status': status}
+
+def prepare_links_for_display(links, now=None):
+    """Returns copies of links with the fields the templates render precomputed."""
+    # One "now" for the whole page; every per-row string comes out of the render cache
+    now_ts = time.time() if now is None else (now.timestamp() if isinstance(now, datetime) else now)
+    return [dict(link, reminder_status_info=get_daily_time_status(link.get('reminder_timestamp', 0), now=now_ts))
+            for link in links]
+
+# --- Columnar link table ---
+# A column-per-field, in-memory view of many links, used by core_sort_links to order
+# hundreds of thousands of rows with one argsort instead of a key call per record.
+# Numeric fields live in typed arrays, NumPy int64 arrays when NumPy is installed
+# (pip install numpy) and not turned off with LINK_TABLE_NUMPY=0, array('q') otherwise;
+# strings stay in parallel lists. Filtering is left to the storage indexes (reminders,
+# query_links ranges), which answer in O(log N + k) without building a table.
+LINK_TABLE_NUMPY = os.getenv('LINK_TABLE_NUMPY', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+LINK_STR_FIELDS = ('id', 'url', 'title', 'notes')
+_numpy_module = None
+
+def _table_numpy():
+    # Imported on first use, so importing link_core stays cheap; None when unavailable
+    global _numpy_module
+    if not LINK_TABLE_NUMPY:
+        return None
+    if _numpy_module is None:
+        try:
+            import numpy # Optional dependency, only used to vectorize LinkTable
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+def _int_column(values, typecode='q'):
+    try:
+        return array(typecode, values)
+    except (TypeError, OverflowError):
+        # Legacy records can hold None, floats or numeric strings
+        return array(typecode, (int(float(value or 0)) for value in values))
+
+class LinkTable:
+    """Links held column by column, for argsort-based ordering."""
+    __slots__ = ('columns', 'size', 'np', '_title_keys')
+
+    def __init__(self, columns, size, np=None):
+        self.columns = columns
+        self.size = size
+        self.np = np
+        self._title_keys = None
+
+    @classmethod
+    def from_links(cls, links, fields=LINK_FIELDS, use_numpy=None):
+        """Builds a table from link records or dicts (only the given fields are stored)."""
+        np = _table_numpy() if use_numpy is None or use_numpy else None
+        links = links if isinstance(links, list) else list(links)
+        try:
+            # attrgetter reads a whole column in C; plain dicts take the slower .get path
+            values_by_field = [list(map(attrgetter(field), links)) for field in fields]
+        except AttributeError:
+            values_by_field = [[link.get(field, '' if field in LINK_STR_FIELDS else 0) for link in links]
+                               for field in fields]
+        columns = {}
+        for field, values in zip(fields, values_by_field):
+            if field in LINK_STR_FIELDS:
+                columns[field] = values
+            else:
+                column = _int_column(values, 'b' if field == 'is_default' else 'q')
+                # frombuffer shares the array's memory instead of copying it
+                columns[field] = np.frombuffer(column, dtype=np.int8 if column.typecode == 'b' else np.int64) if np else column
+        return cls(columns, len(links), np)
+
+    def __len__(self):
+        return self.size
+
+    def _sort_column(self, sort_by):
+        field = SORT_FIELDS.get(sort_by, sort_by)
+        if field == 'title':
+            if self._title_keys is None:
+                self._title_keys = list(map(str.lower, self.columns['title']))
+            return self._title_keys
+        return self.columns[field]
+
+    def argsort(self, sort_by, descending=False):
+        """Orders row positions by a SORT_FIELDS key or numeric field; ties keep row order."""
+        column = self._sort_column(sort_by)
+        if self.np is not None and not isinstance(column, list):
+            # A stable sort of the negated values keeps ties in row order, like sort(reverse=True)
+            return self.np.argsort(-column if descending else column, kind='stable')
+        # Sorting on a list of ints avoids boxing an array item on every key lookup
+        keys = column if isinstance(column, list) else column.tolist()
+        return sorted(range(self.size), key=keys.__getitem__, reverse=descending)
 
 # --- Search and Sort Logic (no changes needed here for KV, they work on the loaded list) ---
 def core_search_links(all_links, search_term, search_type="basic", criteria=None):
     # ... your existing code ...
+    # Scans the given list; use search_links()/query_links() to search the whole collection via the indexes.
+    # For search_type="advanced", criteria is a query string or parse_link_query() tree (defaults to search_term).
     filtered = []
     if search_type == "basic":
         st_lower = search_term.lower()
         for link in all_links:
-            if st_lower in link.get('title', '').lower() or \
-               st_lower in link.get('url', '').lower() or \
-               st_lower in link.get('notes', '').lower():
+            if _link_matches_term(link, st_lower):
                 filtered.append(link)
+    elif search_type == "advanced":
+        predicate = compile_link_query(criteria if criteria is not None else search_term)
+        filtered = [link for link in all_links if predicate(link)]
     return filtered
 
 def core_sort_links(links_to_sort, sort_by, sort_order):
-    # ... your existing complex sorting code ...
     # This operates on the list in memory, so no direct KV changes needed.
+    # Only the sort column is extracted and argsorted; ties keep their input order.
     sorted_list = list(links_to_sort)
-    if sort_by:
-        reverse = (sort_order == 'desc')
-        if sort_by == 'title':
-            sorted_list.sort(key=lambda x: x.get('title','').lower(), reverse=reverse)
-        elif sort_by == 'created':
-            sorted_list.sort(key=lambda x: x.get('created_timestamp',0), reverse=reverse)
-        # ... other sort conditions from your original code ...
-        elif sort_by == 'reminder_time':
-             sorted_list.sort(key=lambda x: x.get('reminder_timestamp', float('-inf') if reverse else float('inf')), reverse=reverse)
-
+    if sort_by in SORT_FIELDS and len(sorted_list) > 1:
+        table = LinkTable.from_links(sorted_list, fields=(SORT_FIELDS[sort_by],))
+        order = table.argsort(sort_by, descending=(sort_order == 'desc'))
+        sorted_list = [sorted_list[i] for i in order]
     return sorted_list
 
 
-# Load config when this module is imported
-# This will attempt to load from KV first, then local file (for dev), then defaults.
-load_config()
-
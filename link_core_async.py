@@ -0,0 +1,264 @@
+# link_core_async.py
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+from functools import wraps
+
+import link_core
+
+# --- Async link operations (used by asgi_app.py) ---
+# Same operations and return values as link_core. With KV configured, the request hot
+# paths (page and point reads, reminders, visits, add/update/delete) talk to Redis through
+# a pooled redis.asyncio client by running link_core's step generators (see
+# link_core._run_kv_steps), so the Flask app, the CLI and the ASGI app share one
+# implementation of the KV reads and writes. Everything else, and every call on the
+# JSON-file or SQLite backends, runs the synchronous link_core function in a worker
+# thread. The storage backend is resolved once, off the event loop, by the app's
+# lifespan (asgi_app.py); until then calls take the worker-thread path.
+KV_ASYNC_MAX_CONNECTIONS = int(os.getenv('KV_ASYNC_MAX_CONNECTIONS', '100'))
+async_kv_client = None
+_async_visit_script = None
+logger = logging.getLogger('link_core.async') # Inherits link_core's level and handler
+
+def _instrumented(op):
+    # Async twin of link_core.instrumented for the KV-native operations. Without the async
+    # client they run the link_core function in a thread, which times itself.
+    def decorate(func):
+        if not link_core.METRICS_ENABLED:
+            return func
+        @wraps(func)
+        async def timed_call(*args, **kwargs):
+            if get_async_kv_client() is None:
+                return await func(*args, **kwargs)
+            with link_core.timed('link_core_storage_seconds', op, op=op):
+                return await func(*args, **kwargs)
+        return timed_call
+    return decorate
+
+def _instrument_async_kv_client(client):
+    # See link_core._instrument_kv_client: one observation per command or pipeline execute()
+    if not link_core.METRICS_ENABLED:
+        return client
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    async def timed_execute_command(*args, **options):
+        with link_core.timed('link_core_kv_round_trip_seconds', 'kv', kind='command'):
+            return await execute_command(*args, **options)
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        pipe_execute = pipe.execute
+        async def timed_execute(*exec_args, **exec_kwargs):
+            with link_core.timed('link_core_kv_round_trip_seconds', 'kv', kind='pipeline'):
+                return await pipe_execute(*exec_args, **exec_kwargs)
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+    return client
+
+def get_async_kv_client():
+    global async_kv_client
+    # Only looks at the backend that is already resolved: resolving it may connect to KV
+    if async_kv_client is None and link_core.KV_URL and isinstance(link_core._storage_backend, link_core.RedisBackend):
+        import redis.asyncio as aioredis
+        # A blocking pool makes bursts beyond max_connections wait for a free connection
+        # instead of failing with "Too many connections"
+        pool = aioredis.BlockingConnectionPool.from_url(link_core.KV_URL, decode_responses=True,
+                                                        max_connections=KV_ASYNC_MAX_CONNECTIONS)
+        async_kv_client = _instrument_async_kv_client(aioredis.Redis(connection_pool=pool))
+    return async_kv_client
+
+async def close_async_kv_client():
+    global async_kv_client, _async_visit_script
+    if async_kv_client is not None:
+        await async_kv_client.aclose()
+    async_kv_client = None
+    _async_visit_script = None
+
+async def _ensure_kv_layout():
+    # Migration/rebuild is rare and one-off, so it stays on the sync client in a thread
+    if not link_core._kv_layout_checked:
+        await asyncio.to_thread(link_core._ensure_kv_layout)
+
+async def _run_kv_steps(steps):
+    # Awaiting twin of link_core._run_kv_steps. A failed call is thrown back into the
+    # generator at the yield that made it, just where it raises on the sync client.
+    result, error = None, None
+    while True:
+        try:
+            step = steps.send(result) if error is None else steps.throw(error)
+        except StopIteration as done:
+            return done.value
+        result, error = None, None
+        try:
+            if isinstance(step, link_core._KvSleep):
+                await asyncio.sleep(step)
+            elif inspect.isawaitable(step):
+                result = await step
+            else:
+                result = step
+        except Exception as e:
+            error = e
+
+@_instrumented('get_links_version')
+async def get_links_version():
+    client = get_async_kv_client()
+    if client is None:
+        return await asyncio.to_thread(link_core.get_links_version)
+    try:
+        await _ensure_kv_layout()
+        return await client.get(link_core.LINKS_VERSION_KEY) or '0'
+    except Exception as e:
+        logger.error("Error reading links version from Vercel KV: %s", e)
+        return None
+
+@_instrumented('get_links_page')
+async def get_links_page(sort_by, sort_order, page, page_size):
+    client = get_async_kv_client()
+    if client is None:
+        return await asyncio.to_thread(link_core.get_links_page, sort_by, sort_order, page, page_size)
+    sort_by, start_index = link_core._links_page_start(sort_by, page, page_size)
+    try:
+        await _ensure_kv_layout()
+        return await _run_kv_steps(link_core._kv_links_page_steps(client, sort_by, sort_order, start_index, page_size))
+    except Exception as e:
+        logger.error("Error loading links page from Vercel KV: %s", e)
+        return [], 0
+
+@_instrumented('get_link_by_id')
+async def get_link_by_id(link_id):
+    client = get_async_kv_client()
+    if client is None:
+        return await asyncio.to_thread(link_core.get_link_by_id, link_id)
+    try:
+        await _ensure_kv_layout()
+        link = await _run_kv_steps(link_core._kv_get_link_steps(client, link_id))
+        return link.to_dict() if link else None
+    except Exception as e:
+        logger.error("Error loading link %s from Vercel KV: %s", link_id, e)
+        return None
+
+async def _reminders_between(low, high, limit):
+    client = get_async_kv_client()
+    try:
+        await _ensure_kv_layout()
+        return await _run_kv_steps(link_core._kv_reminders_between_steps(client, low, high, limit))
+    except Exception as e:
+        logger.error("Error loading reminders from Vercel KV: %s", e)
+        return []
+
+@_instrumented('due_reminders')
+async def due_reminders(now=None, limit=None):
+    if get_async_kv_client() is None:
+        return await asyncio.to_thread(link_core.due_reminders, now, limit)
+    now_ts = int(time.time()) if now is None else int(now)
+    return await _reminders_between(1, now_ts + 1, limit)
+
+@_instrumented('upcoming_reminders')
+async def upcoming_reminders(now=None, limit=None):
+    if get_async_kv_client() is None:
+        return await asyncio.to_thread(link_core.upcoming_reminders, now, limit)
+    now_ts = int(time.time()) if now is None else int(now)
+    return await _reminders_between(now_ts + 1, None, limit)
+
+@_instrumented('add_new_link')
+async def add_new_link(url, title, notes, is_default, reminder_timestamp):
+    client = get_async_kv_client()
+    if client is None:
+        return await asyncio.to_thread(link_core.add_new_link, url, title, notes, is_default, reminder_timestamp)
+    new_link = link_core._new_link_record(url, title, notes, is_default, reminder_timestamp)
+    try:
+        await _ensure_kv_layout()
+        return link_core._link_dict(await _run_kv_steps(link_core._kv_add_link_steps(client, new_link)))
+    except Exception as e:
+        logger.error("Error saving link to Vercel KV: %s", e)
+        return None
+
+@_instrumented('update_link')
+async def update_link(link_id, updated_data):
+    client = get_async_kv_client()
+    if client is None:
+        return await asyncio.to_thread(link_core.update_link, link_id, updated_data)
+    try:
+        await _ensure_kv_layout()
+        async with client.pipeline(transaction=True) as pipe:
+            return link_core._link_dict(await _run_kv_steps(link_core._kv_update_link_steps(client, pipe, link_id, updated_data)))
+    except Exception as e:
+        logger.error("Error updating link %s in Vercel KV: %s", link_id, e)
+        return None
+
+@_instrumented('delete_link_by_id')
+async def delete_link_by_id(link_id):
+    client = get_async_kv_client()
+    if client is None:
+        return await asyncio.to_thread(link_core.delete_link_by_id, link_id)
+    try:
+        await _ensure_kv_layout()
+        async with client.pipeline(transaction=True) as pipe:
+            return await _run_kv_steps(link_core._kv_delete_link_steps(pipe, link_id))
+    except Exception as e:
+        logger.error("Error deleting link %s from Vercel KV: %s", link_id, e)
+        return False
+
+@_instrumented('visit_link')
+async def visit_link(link_id):
+    # Same server-side script as link_core.visit_link: one round trip per redirect
+    global _async_visit_script
+    if link_core.VISIT_WRITE_BEHIND:
+        link = await get_link_by_id(link_id) # The count itself only goes to link_core's in-memory buffer
+        if not link:
+            return None
+        if not link.get('url'):
+            return ''
+        link_core.buffer_visit(link_id)
+        return link['url']
+    client = get_async_kv_client()
+    if client is None:
+        return await asyncio.to_thread(link_core.visit_link, link_id)
+    try:
+        await _ensure_kv_layout()
+        if _async_visit_script is None:
+            _async_visit_script = client.register_script(link_core._VISIT_LUA)
+        return await link_core._kv_run_visit_script(_async_visit_script, link_id)
+    except Exception as e:
+        logger.error("Error recording visit for link %s in Vercel KV: %s", link_id, e)
+        return False
+
+# Less frequent operations reuse the synchronous implementation off the event loop
+async def query_links(query_str):
+    return await asyncio.to_thread(link_core.query_links, query_str)
+
+async def get_links_after(sort_by, sort_order, cursor=None, limit=50):
+    return await asyncio.to_thread(link_core.get_links_after, sort_by, sort_order, cursor, limit)
+
+async def top_links(by, k=link_core.TOP_LINKS_DEFAULT_K):
+    return await asyncio.to_thread(link_core.top_links, by, k)
+
+async def search_links(search_term):
+    return await asyncio.to_thread(link_core.search_links, search_term)
+
+async def update_links_bulk(updates):
+    return await asyncio.to_thread(link_core.update_links_bulk, updates)
+
+async def delete_links_bulk(link_ids):
+    return await asyncio.to_thread(link_core.delete_links_bulk, link_ids)
+
+async def load_config():
+    return await asyncio.to_thread(link_core.load_config)
+
+async def get_config():
+    if link_core.config_is_fresh():
+        return link_core.CONFIG
+    return await asyncio.to_thread(link_core.get_config)
+
+async def save_config():
+    return await asyncio.to_thread(link_core.save_config)
+
+async def flush_visits():
+    return await asyncio.to_thread(link_core.flush_visits)
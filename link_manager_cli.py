@@ -3,10 +3,10 @@ import os
 import uuid # For unique link IDs later
 import time
 from datetime import datetime # For formatting timestamp and parsing reminder input
+import link_core # Shared storage, indexes and search
 # import shlex # Kept for potential future use
 
-# Define the name of our data files
-DATA_FILE = "links.json"
+# Define the name of our config file (links are stored through link_core's storage backend)
 CONFIG_FILE = "config.json"
 
 # Global variable to hold loaded configuration
@@ -81,8 +81,9 @@ def format_timestamp(ts):
     except ValueError: return "Invalid Date"
     except OSError: return "Date out of range"
 
-# load_links and save_links for DATA_FILE remain largely the same,
-# but export/import will use config for default export path.
+def load_links():
+    """Returns every link from link_core's configured storage backend (KV, JSON file or SQLite)."""
+    return [link.copy() for link in link_core.get_all_links()]
 
 # --- display_links needs to use CONFIG['page_size'] ---
 def display_links(links_to_show, sort_by=None, sort_order='asc', title_prefix="--- Links ---", 
@@ -94,15 +95,7 @@ def display_links(links_to_show, sort_by=None, sort_order='asc', title_prefix="-
     if not links_to_show:
         print(f"\n{title_prefix.replace('---', '--- No')} to display ---")
         return False
-    links_to_sort = list(links_to_show)
-    if sort_by:
-        reverse_order = (sort_order == 'desc')
-        if sort_by == 'title': links_to_sort.sort(key=lambda x: x.get('title', '').lower(), reverse=reverse_order)
-        elif sort_by == 'created': links_to_sort.sort(key=lambda x: x.get('created_timestamp', 0), reverse=reverse_order)
-        # ... other sort keys ...
-        elif sort_by == 'last_visited': links_to_sort.sort(key=lambda x: x.get('last_visited_timestamp', 0), reverse=reverse_order)
-        elif sort_by == 'visit_count': links_to_sort.sort(key=lambda x: x.get('visit_count', 0), reverse=reverse_order)
-        elif sort_by == 'reminder_time': links_to_sort.sort(key=lambda x: x.get('reminder_timestamp', 0), reverse=reverse_order)
+    links_to_sort = link_core.core_sort_links(links_to_show, sort_by, sort_order)
 
     total_items = len(links_to_sort)
     if not paginate or total_items <= page_size:
@@ -181,13 +174,7 @@ def basic_search_links_interactive():
     print("\n--- Basic Search Links ---")
     search_term = input("Enter search term: ").strip().lower()
     if not search_term: print("Search term empty."); return
-    all_links = load_links(); filtered_links = []
-    if not all_links: print("No links to search."); return
-    for link in all_links:
-        if search_term in link.get('title', '').lower() or \
-           search_term in link.get('url', '').lower() or \
-           search_term in link.get('notes', '').lower():
-            filtered_links.append(link)
+    filtered_links = link_core.search_links(search_term) # Answered from link_core's trigram index
     if not filtered_links: print(f"No links found for '{search_term}'.")
     else:
         print(f"\nFound {len(filtered_links)} link(s) for '{search_term}':")
@@ -203,29 +190,13 @@ def advanced_search_links_interactive():
     # display_links(filtered_links, ..., paginate=True)
     print("\n--- Advanced Search Links ---")
     print("Syntax: field:value (e.g., title:work notes:important is:default)")
+    print("        visits:>5 created:>=2025-01-01 reminder:..2025-06-01, OR / NOT / -term / ( )")
     query_str = input("Enter advanced search query: ").strip().lower()
     if not query_str: print("Query empty."); return
-    all_links = load_links(); filtered_links = []
-    if not all_links: print("No links to search."); return
-    criteria_parts = query_str.split(); parsed_criteria = []; valid_query = True
-    for part in criteria_parts:
-        if ':' not in part: print(f"Invalid: '{part}'. Expected 'field:value'."); valid_query = False; break
-        field, value = part.split(':', 1)
-        if field not in ['title', 'url', 'notes', 'is']: print(f"Invalid field: '{field}'."); valid_query = False; break
-        if field == 'is' and value not in ['default', 'not-default']: print(f"Invalid value for 'is': '{value}'."); valid_query = False; break
-        parsed_criteria.append({'field': field, 'value': value})
-    if not valid_query or not parsed_criteria: return
-    for link in all_links: # Corrected variable name
-        match_all = True
-        for crit in parsed_criteria:
-            f, v = crit['field'], crit['value']
-            if f == 'title' and v not in link.get('title','').lower(): match_all=False; break
-            elif f == 'url' and v not in link.get('url','').lower(): match_all=False; break
-            elif f == 'notes' and v not in link.get('notes','').lower(): match_all=False; break
-            elif f == 'is':
-                if v == 'default' and not link.get('is_default'): match_all=False; break
-                if v == 'not-default' and link.get('is_default'): match_all=False; break
-        if match_all: filtered_links.append(link) # Corrected variable name
+    try:
+        filtered_links = link_core.query_links(query_str) # Parsed once, narrowed by link_core's indexes
+    except link_core.QueryError as e:
+        print(f"Invalid query: {e}"); return
     if not filtered_links: print(f"No links found for '{query_str}'.")
     else:
         print(f"\nFound {len(filtered_links)} link(s) for '{query_str}':")
@@ -240,13 +211,9 @@ def view_reminders_interactive():
     # display_links(due_overdue_reminders, ..., paginate=True)
     # display_links(upcoming_reminders, ..., paginate=True)
     print("\n--- View Reminders ---")
-    all_links = load_links(); now_ts = int(time.time()); due = []; upcoming = []
-    if not all_links: print("No links for reminders."); return
-    for link in all_links:
-        rem_ts = link.get('reminder_timestamp', 0)
-        if rem_ts > 0:
-            if rem_ts <= now_ts: due.append(link)
-            else: upcoming.append(link)
+    now_ts = int(time.time())
+    # Read from link_core's reminder index instead of scanning every link
+    due = link_core.due_reminders(now_ts); upcoming = link_core.upcoming_reminders(now_ts)
     rem_found = False
     if due:
         rem_found = True
@@ -265,8 +232,7 @@ def view_reminders_interactive():
 def export_links_interactive():
     global CONFIG
     print("\n--- Export Links ---")
-    current_links = load_links()
-    if not current_links and input("No links. Create empty export? (y/n): ").lower() != 'y': return
+    if not link_core.get_links_page('created', 'asc', 1, 1)[1] and input("No links. Create empty export? (y/n): ").lower() != 'y': return
 
     # Use configured default path, then timestamped filename
     default_export_dir = os.path.expanduser(CONFIG.get("default_export_path", "~/"))
@@ -276,6 +242,7 @@ def export_links_interactive():
 
     print(f"\nTip: To save to shared storage, ensure 'termux-setup-storage' has been run.")
     print(f"Default export directory is: {default_export_dir}")
+    print("Use a .ndjson extension to export one link per line.")
     export_filepath_str = input(f"Enter filename or full path for export (default: {suggested_path}): ").strip()
     
     export_filepath = os.path.expanduser(export_filepath_str or suggested_path)
@@ -287,10 +254,27 @@ def export_links_interactive():
     except OSError as e: print(f"Error creating directory: {e}"); return
     except Exception as e: print(f"Invalid path: {e}"); return
 
-    if save_links(current_links, export_filepath): print(f"Exported {len(current_links)} links to: {export_filepath}")
+    export_format = 'ndjson' if export_filepath.lower().endswith(('.ndjson', '.jsonl')) else 'json'
+    exported_count = link_core.export_links(export_filepath, fmt=export_format) # Streams, never builds the full list
+    if exported_count is not None: print(f"Exported {exported_count} links to: {export_filepath}")
     else: print(f"Failed to export to: {export_filepath}")
     print("--------------------")
 
+def import_links_interactive():
+    """Imports links from a JSON or NDJSON backup, skipping URLs that already exist."""
+    print("\n--- Import Links ---")
+    import_filepath_str = input("Enter path of the backup file to import (.json or .ndjson): ").strip()
+    if not import_filepath_str: print("No file given."); return
+    import_filepath = os.path.expanduser(import_filepath_str)
+    if not os.path.isfile(import_filepath): print(f"File not found: {import_filepath}"); return
+
+    summary = link_core.import_links(import_filepath) # Parsed incrementally, committed in batches
+    if summary is None: print(f"Failed to import from: {import_filepath}")
+    else:
+        print(f"Imported {summary['imported']} link(s). Skipped {summary['duplicates']} duplicate URL(s)"
+              f" and {summary['invalid']} invalid record(s).")
+    print("--------------------")
+
 # --- New Settings Function ---
 def configure_settings_interactive():
     """Allows user to configure application settings."""
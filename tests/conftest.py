@@ -0,0 +1,93 @@
+# tests/conftest.py
+#
+# Every test runs against throwaway storage: fakeredis for the redis backend, a JSON
+# file and a SQLite database in pytest's tmp_path for the others. The repo's links.json,
+# config.json and any real KV store are never touched.
+#
+#   pip install -r requirements-dev.txt
+#   python -m pytest
+
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.environ.pop('KV_URL', None) # Never reach a real Redis from the tests
+
+import link_core
+
+BACKENDS = ('redis', 'json', 'sqlite')
+
+@pytest.fixture
+def kv(monkeypatch):
+    """A fresh fakeredis database wired into link_core as its KV client."""
+    fakeredis = pytest.importorskip('fakeredis')
+    import redis
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    monkeypatch.setattr(link_core, 'redis', redis, raising=False)
+    monkeypatch.setattr(link_core, 'kv_client', client)
+    monkeypatch.setattr(link_core, '_kv_connect_attempted', True)
+    monkeypatch.setattr(link_core, '_kv_layout_checked', False)
+    monkeypatch.setattr(link_core, '_kv_cache', {'version': None, 'links': []})
+    # Scripts register on the client they were first run with
+    monkeypatch.setattr(link_core, '_kv_visit_script', None)
+    monkeypatch.setattr(link_core, '_kv_visit_flush_script', None)
+    return client
+
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(link_core, 'LOCAL_DATA_FILE', str(tmp_path / 'links.json'))
+    monkeypatch.setattr(link_core, 'LOCAL_SQLITE_FILE', str(tmp_path / 'links.db'))
+    monkeypatch.setattr(link_core, 'LOCAL_CONFIG_FILE', str(tmp_path / 'config.json'))
+    monkeypatch.setattr(link_core, 'CONFIG', {})
+    monkeypatch.setattr(link_core, '_config_signature', None)
+    monkeypatch.setattr(link_core, '_config_checked_at', 0.0)
+    monkeypatch.setattr(link_core, '_local_state', {'signature': None, 'links_by_id': {}, 'url_index': {},
+                                                    'sort_indexes': {}, 'search_index': None})
+    monkeypatch.setattr(link_core, '_storage_backend', None)
+    monkeypatch.setattr(link_core, '_ensure_visit_flusher', lambda: None) # Tests flush explicitly
+    link_core._visit_buffer.clear()
+    link_core._visit_buffer_state['pending'] = 0
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    """Each storage backend in turn, installed as link_core's process-wide backend."""
+    if request.param == 'redis':
+        request.getfixturevalue('kv')
+    backend = link_core.STORAGE_BACKENDS[request.param]()
+    link_core.set_storage_backend(backend)
+    return backend
+
+@pytest.fixture
+def redis_backend(kv):
+    """RedisBackend on the kv fixture's fakeredis, for the KV-only tests."""
+    backend = link_core.RedisBackend()
+    link_core.set_storage_backend(backend)
+    return backend
+
+@pytest.fixture
+def json_backend():
+    """JsonFileBackend on the isolated links.json, for the local-file-only tests."""
+    backend = link_core.JsonFileBackend()
+    link_core.set_storage_backend(backend)
+    return backend
+
+@pytest.fixture
+def client():
+    """Flask test client for app.py, with an empty rendered-page cache."""
+    import app as flask_app
+    flask_app._page_cache.clear()
+    return flask_app.app.test_client()
+
+@pytest.fixture
+def asgi_client():
+    """Starlette test client for asgi_app.py, with an empty rendered-page cache."""
+    pytest.importorskip('httpx') # fastapi.testclient runs on httpx
+    from fastapi.testclient import TestClient
+    import app as flask_app
+    import asgi_app
+    flask_app._page_cache.clear() # Shared with app.py
+    return TestClient(asgi_app.app)
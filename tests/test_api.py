@@ -0,0 +1,87 @@
+# tests/test_api.py
+
+import pytest
+
+import link_core
+
+def add(url, title=''):
+    link = link_core.add_new_link(url, title, '', False, 0)
+    assert isinstance(link, dict), link
+    return link
+
+# --- Cursor pagination ---
+def page_through(sort_by, sort_order, limit, between_pages=None):
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        links, cursor = link_core.get_links_after(sort_by, sort_order, cursor, limit)
+        seen.extend(link['id'] for link in links)
+        pages += 1
+        if cursor is None:
+            return seen
+        if between_pages:
+            between_pages(pages)
+
+@pytest.mark.parametrize('sort_by,sort_order', [('created', 'asc'), ('title', 'asc'), ('title', 'desc'), ('visit_count', 'desc')])
+def test_cursor_pagination_survives_inserts(backend, sort_by, sort_order):
+    original = [add(f"https://example.com/{i}", f"Title {i:02d}")['id'] for i in range(10)]
+    for link_id in original[:4]:
+        link_core.record_link_visit(link_id)
+
+    def insert(page):
+        # Lands both before and after the cursor in every ordering
+        add(f"https://example.com/new/{page}/a", f"Title {page:02d}a")
+        add(f"https://example.com/new/{page}/z", f"Title zz {page}")
+
+    seen = page_through(sort_by, sort_order, 3, insert)
+    assert len(seen) == len(set(seen)) # Nothing is returned twice
+    assert set(original) <= set(seen) # Nothing that was there before is skipped
+
+def test_cursor_pages_match_the_full_ordering(backend):
+    for i in range(7):
+        add(f"https://example.com/{i}", f"Title {i}")
+    full = [link['id'] for link in link_core.core_sort_links(link_core.get_all_links(), 'title', 'desc')]
+    assert page_through('title', 'desc', 2) == full
+
+def test_cursor_for_another_ordering_is_rejected(backend):
+    for i in range(3):
+        add(f"https://example.com/{i}")
+    _links, cursor = link_core.get_links_after('title', 'asc', None, 1)
+    with pytest.raises(link_core.CursorError):
+        link_core.get_links_after('created', 'asc', cursor, 1)
+    with pytest.raises(link_core.CursorError):
+        link_core.get_links_after('title', 'asc', 'not-a-cursor', 1)
+
+# --- GET /api/links ---
+def test_api_pages_through_every_link(backend, client):
+    for i in range(5):
+        add(f"https://example.com/{i}", f"Title {i}")
+    seen = []
+    cursor = None
+    while True:
+        query = {'sort_by': 'created', 'limit': 2, 'fields': 'id,title'}
+        if cursor:
+            query['cursor'] = cursor
+        body = client.get('/api/links', query_string=query).get_json()
+        assert all(set(link) == {'id', 'title'} for link in body['links'])
+        seen.extend(link['id'] for link in body['links'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    # Links added in the same second are ordered by id
+    assert seen == [link['id'] for link in sorted(link_core.get_all_links(), key=lambda link: (link['created_timestamp'], link['id']))]
+
+@pytest.mark.parametrize('query', [{'sort_by': 'colour'}, {'sort_order': 'up'}, {'limit': 'many'},
+                                   {'fields': 'id,secret'}, {'cursor': 'not-a-cursor'}])
+def test_api_rejects_bad_arguments(backend, client, query):
+    add('https://example.com/a')
+    response = client.get('/api/links', query_string=query)
+    assert response.status_code == 400
+    assert response.get_json()['error']
+
+def test_api_limit_is_clamped(backend, client):
+    for i in range(3):
+        add(f"https://example.com/{i}")
+    assert len(client.get('/api/links?limit=0').get_json()['links']) == 1
+    assert len(client.get('/api/links?limit=100000').get_json()['links']) == 3
@@ -0,0 +1,75 @@
+# tests/test_bulk.py
+
+import link_core
+
+def add(url, title=''):
+    return link_core.add_new_link(url, title, '', False, 0)
+
+def statuses(results):
+    return [result['status'] for result in results]
+
+def test_add_links_bulk(backend):
+    add('https://example.com/taken')
+    results = link_core.add_links_bulk([
+        {'url': 'https://example.com/a', 'title': 'A'},
+        {'url': '   '},
+        {'url': 'https://example.com/taken'},
+        {'url': 'https://example.com/b', 'reminder_timestamp': 5},
+    ])
+    assert statuses(results) == ['ok', 'invalid', 'duplicate_url', 'ok']
+    assert results[0]['link']['title'] == 'A'
+    assert results[3]['link']['reminder_timestamp'] == 5
+    assert len(link_core.get_all_links()) == 3
+
+def test_update_links_bulk(backend):
+    a = add('https://example.com/a', 'A')
+    b = add('https://example.com/b', 'B')
+    results = link_core.update_links_bulk([
+        (a['id'], {'is_default': True, 'title': 'A2'}),
+        ('missing', {'title': 'x'}),
+        (b['id'], {'url': 'https://example.com/a'}),
+    ])
+    assert statuses(results) == ['ok', 'not_found', 'duplicate_url']
+    assert results[0]['link']['title'] == 'A2'
+    assert link_core.get_link_by_id(a['id'])['is_default'] is True
+    assert link_core.get_link_by_id(b['id'])['url'] == 'https://example.com/b'
+
+def test_update_links_bulk_applies_a_repeated_id_in_order(backend):
+    a = add('https://example.com/a', 'A')
+    add('https://example.com/b', 'B')
+    results = link_core.update_links_bulk([
+        (a['id'], {'title': 'First', 'url': 'https://example.com/a1'}),
+        (a['id'], {'title': 'Second', 'url': 'https://example.com/a2'}),
+    ])
+    assert statuses(results) == ['ok', 'ok']
+    assert [r['link']['title'] for r in results] == ['First', 'Second']
+    page, total = link_core.get_links_page('title', 'asc', 1, 10)
+    assert ([link['title'] for link in page], total) == (['B', 'Second'], 2) # No index entry left for 'First'
+    assert link_core.search_links('first') == []
+    add('https://example.com/a') # Both earlier urls were released
+    add('https://example.com/a1')
+    assert add('https://example.com/a2') == "duplicate_url"
+
+def test_delete_links_bulk_reports_a_repeat_as_not_found(backend):
+    a = add('https://example.com/a')
+    b = add('https://example.com/b')
+    keep = add('https://example.com/keep')
+    results = link_core.delete_links_bulk([a['id'], 'missing', a['id'], b['id']])
+    assert statuses(results) == ['ok', 'not_found', 'not_found', 'ok']
+    assert [result['id'] for result in results] == [a['id'], 'missing', a['id'], b['id']]
+    assert [link['id'] for link in link_core.get_all_links()] == [keep['id']]
+    add('https://example.com/a')
+
+def test_bulk_on_an_empty_batch(backend):
+    assert link_core.add_links_bulk([]) == []
+    assert link_core.update_links_bulk([]) == []
+    assert link_core.delete_links_bulk([]) == []
+
+def test_bulk_route(backend, client):
+    a = add('https://example.com/a')
+    b = add('https://example.com/b')
+    response = client.post('/bulk', data={'action': 'set_default', 'link_ids': [a['id'], b['id']]})
+    assert response.status_code == 302
+    assert all(link['is_default'] for link in link_core.get_all_links())
+    client.post('/bulk', data={'action': 'delete', 'link_ids': [a['id'], 'missing']})
+    assert [link['id'] for link in link_core.get_all_links()] == [b['id']]
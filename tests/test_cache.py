@@ -0,0 +1,49 @@
+# tests/test_cache.py
+
+import link_core
+
+def add(url, title=''):
+    link = link_core.add_new_link(url, title, '', False, 0)
+    assert isinstance(link, dict), link
+    return link
+
+def test_version_changes_on_every_write(backend):
+    versions = [link_core.get_links_version()]
+    link = add('https://example.com/a')
+    versions.append(link_core.get_links_version())
+    link_core.update_link(link['id'], {'title': 'B'})
+    versions.append(link_core.get_links_version())
+    link_core.record_link_visit(link['id'])
+    versions.append(link_core.get_links_version())
+    link_core.delete_link_by_id(link['id'])
+    versions.append(link_core.get_links_version())
+    assert None not in versions
+    assert len(set(versions)) == len(versions)
+    assert link_core.get_links_version() == versions[-1] # Reading doesn't change it
+
+def test_kv_reads_reuse_the_cache_until_the_version_moves(kv, redis_backend, monkeypatch):
+    link = add('https://example.com/a', 'A')
+    link_core.get_all_links()
+    zrange_calls = []
+    zrange = kv.zrange
+    monkeypatch.setattr(kv, 'zrange', lambda *args, **kwargs: zrange_calls.append(args) or zrange(*args, **kwargs))
+
+    assert [link['title'] for link in link_core.get_all_links()] == ['A']
+    assert zrange_calls == [] # Served from the cache
+    kv.hset(link_core._link_key(link['id']), 'title', 'Changed elsewhere') # Another worker's write
+    kv.incr(link_core.LINKS_VERSION_KEY)
+    assert [link['title'] for link in link_core.get_all_links()] == ['Changed elsewhere']
+    assert zrange_calls
+
+def test_json_reads_reload_when_another_process_rewrites_the_file(json_backend):
+    link = add('https://example.com/a', 'A')
+    stored = link_core.get_link_by_id(link['id'])
+    stored['title'] = 'Edited elsewhere'
+    with open(link_core.LOCAL_DATA_FILE, 'wb') as f: # Bigger file, so the signature differs
+        f.write(link_core.encode_links([stored]))
+    assert link_core.get_link_by_id(link['id'])['title'] == 'Edited elsewhere'
+
+def test_returned_links_are_copies(backend):
+    link = add('https://example.com/a', 'A')
+    link_core.get_link_by_id(link['id'])['title'] = 'Scribbled on'
+    assert link_core.get_link_by_id(link['id'])['title'] == 'A'
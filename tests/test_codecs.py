@@ -0,0 +1,57 @@
+# tests/test_codecs.py
+
+import json
+
+import pytest
+
+import link_core
+
+CODECS = ['json', 'columnar', 'msgpack', 'json+zlib', 'columnar+zlib', 'msgpack+zlib', 'json+brotli', 'msgpack+brotli']
+
+def sample_links():
+    links = [link_core._new_link_record(f"https://example.com/{i}", f"Title {i} ünïcode", f"notes {i}", i % 2 == 0, i * 1000)
+             for i in range(5)]
+    links[1]['visit_count'] = 7
+    links[2]['custom_field'] = 'kept' # Fields outside LINK_FIELDS survive every codec
+    return links
+
+def skip_missing_codec_dependency(codec):
+    if 'msgpack' in codec:
+        pytest.importorskip('msgpack')
+    if 'brotli' in codec:
+        pytest.importorskip('brotli')
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_codec_round_trip(codec):
+    skip_missing_codec_dependency(codec)
+    links = sample_links()
+    decoded = link_core.decode_links(link_core.encode_links(links, codec))
+    assert [link.to_dict() for link in decoded] == [link.to_dict() for link in links]
+
+def test_decode_reads_legacy_array_and_empty_input():
+    links = [link.to_dict() for link in sample_links()]
+    legacy = json.dumps(links)
+    assert [link.to_dict() for link in link_core.decode_links(legacy)] == links
+    assert link_core.decode_links(b'') == []
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        link_core.encode_links(sample_links(), 'yaml')
+    with pytest.raises(ValueError):
+        link_core.decode_links(b'LINKS/json+lz4\n[]')
+
+@pytest.mark.parametrize('codec', ['columnar', 'msgpack+zlib'])
+def test_links_file_is_written_with_the_configured_codec(json_backend, monkeypatch, codec):
+    skip_missing_codec_dependency(codec)
+    link_core.add_new_link('https://example.com/old', 'Old', '', False, 0) # Written as plain json
+    monkeypatch.setattr(link_core, 'LINKS_CODEC', codec)
+    link_core.add_new_link('https://example.com/new', 'New', '', False, 0) # Read as json, written as codec
+
+    with open(link_core.LOCAL_DATA_FILE, 'rb') as f:
+        data = f.read()
+    if '+' in codec:
+        assert data.startswith(b'LINKS/' + codec.encode('ascii') + b'\n')
+    else:
+        assert json.loads(data)['format'] == 'links-columnar'
+    link_core._local_state['signature'] = None
+    assert sorted(link['title'] for link in link_core.get_all_links()) == ['New', 'Old']
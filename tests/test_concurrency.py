@@ -0,0 +1,120 @@
+# tests/test_concurrency.py
+
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+import link_core
+
+def add_links(prefix, count):
+    for i in range(count):
+        assert isinstance(link_core.add_new_link(f"https://example.com/{prefix}/{i}", '', '', False, 0), dict)
+
+# --- Local file: atomic writes and the cross-process lock ---
+def test_save_keeps_the_file_mode(tmp_path):
+    path = str(tmp_path / 'links.json')
+    link_core._atomic_write_bytes(path, b'[]')
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~link_core._PROCESS_UMASK
+    os.chmod(path, 0o644)
+    link_core._atomic_write_bytes(path, b'[1]')
+    assert os.stat(path).st_mode & 0o777 == 0o644
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+def test_threads_writing_the_json_file_lose_nothing(json_backend):
+    threads = [threading.Thread(target=add_links, args=(t, 20)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(link_core.get_all_links()) == 80
+
+def _add_in_child(prefix):
+    link_core._local_state['signature'] = None # Start from the file, as a fresh worker would
+    add_links(prefix, 15)
+
+@pytest.mark.skipif(link_core.fcntl is None or 'fork' not in multiprocessing.get_all_start_methods(),
+                    reason="needs fcntl and fork")
+def test_processes_writing_the_json_file_lose_nothing(json_backend):
+    add_links('parent', 1)
+    context = multiprocessing.get_context('fork')
+    children = [context.Process(target=_add_in_child, args=(f"child{n}",)) for n in range(3)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+        assert child.exitcode == 0
+    link_core._local_state['signature'] = None
+    assert len(link_core.get_all_links()) == 46
+
+def test_readers_see_consistent_state_while_writers_run(json_backend):
+    add_links('seed', 10)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                link_core.get_links_page('title', 'asc', 1, 5)
+                link_core.search_links('example')
+                link_core.due_reminders()
+            except Exception as e: # A torn read shows up as RuntimeError/KeyError
+                errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    add_links('write', 30)
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+
+# --- KV: WATCH/CAS ---
+def test_kv_update_retries_after_a_concurrent_write(kv, redis_backend, monkeypatch):
+    link = link_core.add_new_link('https://example.com/a', 'A', '', False, 0)
+    cas_steps = link_core._kv_cas_steps
+    conflicts = []
+
+    def conflicting_cas_steps(pipe, watch_keys, apply):
+        def apply_after_a_write(pipe):
+            if len(conflicts) < 2: # Another client touches the watched link hash
+                conflicts.append(kv.hset(watch_keys[0], 'notes', f"written by someone else {len(conflicts)}"))
+            return (yield from apply(pipe))
+        return (yield from cas_steps(pipe, watch_keys, apply_after_a_write))
+
+    monkeypatch.setattr(link_core, '_kv_cas_steps', conflicting_cas_steps)
+    updated = link_core.update_link(link['id'], {'title': 'B'})
+    assert len(conflicts) == 2
+    assert updated['title'] == 'B'
+    assert updated['notes'] == "written by someone else 1" # Re-read, not overwritten
+
+def test_kv_update_gives_up_and_releases_the_url_claim(kv, redis_backend, monkeypatch):
+    link = link_core.add_new_link('https://example.com/a', 'A', '', False, 0)
+    cas_steps = link_core._kv_cas_steps
+
+    def always_conflicting_cas_steps(pipe, watch_keys, apply):
+        def apply_after_a_write(pipe):
+            kv.hincrby(watch_keys[0], 'visit_count', 1)
+            return (yield from apply(pipe))
+        return (yield from cas_steps(pipe, watch_keys, apply_after_a_write))
+
+    monkeypatch.setattr(link_core, '_kv_cas_steps', always_conflicting_cas_steps)
+    assert link_core.update_link(link['id'], {'url': 'https://example.com/b'}) is None
+    assert kv.hget(link_core.LINK_URLS_KEY, 'https://example.com/b') is None
+    assert kv.hget(link_core.LINK_URLS_KEY, 'https://example.com/a') == link['id']
+
+def test_concurrent_visits_are_all_counted(backend):
+    link = link_core.add_new_link('https://example.com/a', 'A', '', False, 0)
+
+    def visit():
+        for _ in range(25):
+            assert link_core.record_link_visit(link['id'])
+
+    threads = [threading.Thread(target=visit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert link_core.get_link_by_id(link['id'])['visit_count'] == 100
@@ -0,0 +1,73 @@
+# tests/test_config.py
+
+import json
+
+import pytest
+
+import link_core
+
+@pytest.fixture
+def load_calls(monkeypatch):
+    calls = []
+    load_config = link_core.load_config
+    monkeypatch.setattr(link_core, 'load_config', lambda: calls.append(1) or load_config())
+    return calls
+
+def write_config_elsewhere(**settings):
+    # Another process saving settings; a different size, so the file signature changes
+    with open(link_core.LOCAL_CONFIG_FILE) as f:
+        config = json.load(f)
+    config.update(settings)
+    with open(link_core.LOCAL_CONFIG_FILE, 'w') as f:
+        json.dump(config, f, indent=2)
+
+def expire_ttl():
+    link_core._config_checked_at -= link_core.CONFIG_TTL + 1
+
+def test_local_config_is_cached_until_the_ttl_runs_out(load_calls):
+    assert link_core.get_config()['page_size'] == link_core.DEFAULT_CONFIG['page_size']
+    assert load_calls == [1]
+    write_config_elsewhere(page_size=7)
+    assert link_core.get_config()['page_size'] == 20 # Still within the TTL
+    expire_ttl()
+    assert link_core.get_config()['page_size'] == 7
+    assert load_calls == [1, 1]
+
+def test_unchanged_config_is_revalidated_without_a_reload(load_calls):
+    link_core.get_config()
+    expire_ttl()
+    link_core.get_config()
+    assert load_calls == [1]
+    assert link_core.config_is_fresh()
+
+def test_kv_config_reloads_when_another_worker_saves(kv, load_calls):
+    link_core.get_config()
+    assert kv.get(link_core.CONFIG_VERSION_KEY) == '1' # Defaults saved on first use
+    kv.set(link_core.CONFIG_DATA_KEY, json.dumps(dict(link_core.DEFAULT_CONFIG, page_size=9)))
+    kv.incr(link_core.CONFIG_VERSION_KEY)
+    assert link_core.get_config()['page_size'] == 20
+    expire_ttl()
+    assert link_core.get_config()['page_size'] == 9
+    assert load_calls == [1, 1]
+
+    link_core.CONFIG['page_size'] = 11
+    assert link_core.save_config()
+    expire_ttl()
+    assert link_core.get_config()['page_size'] == 11 # Its own save is not a change
+    assert load_calls == [1, 1]
+
+def test_failed_version_check_keeps_the_cached_config(kv, monkeypatch):
+    link_core.get_config()['page_size'] = 13
+
+    def unreachable(key):
+        raise ConnectionError("KV is down")
+
+    monkeypatch.setattr(kv, 'get', unreachable)
+    expire_ttl()
+    assert link_core.get_config()['page_size'] == 13
+
+def test_date_format_follows_the_config():
+    link_core.get_config()
+    write_config_elsewhere(date_format_choice='2')
+    expire_ttl()
+    assert link_core.get_active_date_format_str() == link_core.DEFAULT_CONFIG['date_formats']['2']
@@ -0,0 +1,83 @@
+# tests/test_http_cache.py
+
+import pytest
+
+import app as flask_app
+import link_core
+
+def add(url, title=''):
+    link = link_core.add_new_link(url, title, '', False, 0)
+    assert isinstance(link, dict), link
+    return link
+
+def test_etag_matching():
+    assert flask_app.etag_matches('W/"abc"', 'W/"abc"')
+    assert flask_app.etag_matches('"abc"', 'W/"abc"') # Weak comparison
+    assert flask_app.etag_matches('"x", W/"abc"', 'W/"abc"')
+    assert flask_app.etag_matches('*', 'W/"abc"')
+    assert not flask_app.etag_matches('W/"abd"', 'W/"abc"')
+    assert not flask_app.etag_matches(None, 'W/"abc"')
+    assert not flask_app.etag_matches('*', None)
+
+def test_listing_etag_depends_on_version_and_parameters(backend):
+    etag = flask_app.listing_etag('1', 'title', 'asc', 1)
+    assert etag.startswith('W/"')
+    assert flask_app.listing_etag('1', 'title', 'asc', 1) == etag
+    assert flask_app.listing_etag('2', 'title', 'asc', 1) != etag
+    assert flask_app.listing_etag('1', 'title', 'asc', 2) != etag
+    assert flask_app.listing_etag(None, 'title', 'asc', 1) is None
+
+@pytest.mark.parametrize('path', ['/', '/api/links'])
+def test_unchanged_listing_revalidates_with_304(backend, client, path):
+    add('https://example.com/a', 'Alpha')
+    first = client.get(path)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get(path, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert again.get_data() == b''
+
+    add('https://example.com/b', 'Beta') # A write moves the links version
+    changed = client.get(path, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert 'Beta' in changed.get_data(as_text=True)
+
+def test_rendered_pages_are_cached_by_etag(backend, client, monkeypatch):
+    add('https://example.com/a', 'Alpha')
+    first = client.get('/?sort_by=title')
+    renders = []
+    render_template = flask_app.render_template
+    monkeypatch.setattr(flask_app, 'render_template', lambda *args, **kwargs: renders.append(args) or render_template(*args, **kwargs))
+
+    second = client.get('/?sort_by=title')
+    assert renders == [] # Served from the page cache
+    assert second.get_data() == first.get_data()
+    assert client.get('/?sort_by=visit_count').status_code == 200
+    assert len(renders) == 1 # Another page is another entry
+
+def test_page_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(flask_app, 'PAGE_CACHE_SIZE', 2)
+    for etag in ('a', 'b', 'c'):
+        flask_app.cache_page(etag, etag * 3)
+    assert flask_app.cached_page('a') is None
+    assert flask_app.cached_page('b') == 'bbb'
+    flask_app.cache_page('d', 'ddd') # 'c' is now the least recently used
+    assert flask_app.cached_page('c') is None
+    assert flask_app.cached_page('b') == 'bbb'
+
+def test_pages_with_flashed_messages_are_not_tagged(backend, client):
+    add('https://example.com/a', 'Alpha')
+    response = client.get('/', query_string={'q': 'colour:red'}) # Flashes "Invalid search query"
+    assert 'ETag' not in response.headers
+    assert not flask_app._page_cache
+
+@pytest.mark.parametrize('path', ['/', '/api/links'])
+def test_asgi_listing_revalidates_with_304(backend, asgi_client, path):
+    add('https://example.com/a', 'Alpha')
+    etag = asgi_client.get(path).headers['ETag']
+    assert asgi_client.get(path, headers={'If-None-Match': etag}).status_code == 304
+    add('https://example.com/b', 'Beta')
+    assert asgi_client.get(path, headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,64 @@
+# tests/test_import_export.py
+
+import io
+import json
+
+import pytest
+
+import link_core
+
+def add(url, title=''):
+    link = link_core.add_new_link(url, title, '', False, 0)
+    assert isinstance(link, dict), link
+    return link
+
+def stored_links():
+    return sorted((link.to_dict() for link in link_core.get_all_links()), key=lambda link: link['id'])
+
+@pytest.mark.parametrize('fmt', ['json', 'ndjson'])
+def test_export_then_import_round_trips(backend, tmp_path, fmt):
+    for i in range(7):
+        link = add(f"https://example.com/{i}", f"Title {i} ünïcode")
+        link_core.record_link_visit(link['id'])
+    before = stored_links()
+    path = str(tmp_path / f"backup.{fmt}")
+    assert link_core.export_links(path, fmt) == 7
+    link_core.delete_links_bulk([link['id'] for link in before])
+
+    # Format detected from the file, committed in several batches
+    assert link_core.import_links(path, batch_size=3) == {'imported': 7, 'duplicates': 0, 'invalid': 0}
+    assert stored_links() == before
+    assert link_core.import_links(path, fmt) == {'imported': 0, 'duplicates': 7, 'invalid': 0}
+
+def test_import_skips_invalid_records_and_fills_defaults(backend, tmp_path):
+    taken = add('https://example.com/taken')
+    records = [{'url': 'https://example.com/a', 'visit_count': '3', 'created_timestamp': 'soon'},
+               {'url': '  '}, 'not an object', {'title': 'no url'},
+               {'id': taken['id'], 'url': 'https://example.com/b'}, # Id collision: gets a new id
+               {'url': 'https://example.com/taken'}]
+    path = tmp_path / 'backup.ndjson'
+    path.write_text('\n'.join(json.dumps(record) for record in records) + '\n\n')
+    assert link_core.import_links(str(path)) == {'imported': 2, 'duplicates': 1, 'invalid': 3}
+
+    by_url = {link['url']: link for link in link_core.get_all_links()}
+    assert by_url['https://example.com/a']['visit_count'] == 3
+    assert by_url['https://example.com/a']['title'] == 'https://example.com/a'
+    assert by_url['https://example.com/a']['created_timestamp'] > 0
+    assert by_url['https://example.com/b']['id'] != taken['id']
+    assert link_core.get_link_by_id(taken['id'])['url'] == 'https://example.com/taken'
+
+def test_json_array_parser_reads_across_chunk_boundaries():
+    records = [{'id': str(i), 'title': 'x' * i, 'notes': 'brace } and bracket ] inside'} for i in range(20)]
+    text = ' \n[ ' + ' ,\n'.join(json.dumps(record) for record in records) + ' ]\n'
+    assert list(link_core._iter_json_array(io.StringIO(text), chunk_size=7)) == records
+    assert list(link_core._iter_json_array(io.StringIO('[]'))) == []
+
+@pytest.mark.parametrize('text', ['{"url": "x"}', '[{"url": "x"}', '[1, 2]', '[{"url": '])
+def test_malformed_json_import_fails_cleanly(json_backend, tmp_path, text):
+    path = tmp_path / 'broken.json'
+    path.write_text(text)
+    assert link_core.import_links(str(path), 'json') is None
+
+def test_export_to_an_unwritable_path_returns_none(backend, tmp_path):
+    add('https://example.com/a')
+    assert link_core.export_links(str(tmp_path / 'missing-dir' / 'backup.json')) is None
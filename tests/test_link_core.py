@@ -0,0 +1,125 @@
+# tests/test_link_core.py
+
+import pytest
+
+import link_core
+
+def add(url, title='', notes='', reminder_timestamp=0):
+    link = link_core.add_new_link(url, title, notes, False, reminder_timestamp)
+    assert isinstance(link, dict), link
+    return link
+
+# --- Duplicate urls ---
+def test_add_rejects_duplicate_url(backend):
+    add('https://example.com/a')
+    assert link_core.add_new_link('  https://example.com/a ', 'Again', '', False, 0) == "duplicate_url"
+    assert len(link_core.get_all_links()) == 1
+
+def test_update_rejects_another_links_url(backend):
+    first = add('https://example.com/a')
+    second = add('https://example.com/b')
+    assert link_core.update_link(second['id'], {'url': 'https://example.com/a'}) == "duplicate_url"
+    assert link_core.get_link_by_id(second['id'])['url'] == 'https://example.com/b'
+    # Keeping its own url is not a duplicate
+    assert link_core.update_link(first['id'], {'url': 'https://example.com/a', 'title': 'Renamed'})['title'] == 'Renamed'
+
+def test_url_is_free_again_after_delete_or_change(backend):
+    first = add('https://example.com/a')
+    second = add('https://example.com/b')
+    assert link_core.update_link(second['id'], {'url': 'https://example.com/c'})['url'] == 'https://example.com/c'
+    assert link_core.delete_link_by_id(first['id'])
+    add('https://example.com/a')
+    add('https://example.com/b')
+
+def test_bulk_add_rejects_duplicates_within_the_batch(backend):
+    add('https://example.com/a')
+    new_links = [link_core._new_link_record(url, '', '', False, 0)
+                 for url in ('https://example.com/a', 'https://example.com/b', 'https://example.com/b')]
+    statuses = [result['status'] for result in link_core.get_storage_backend().add_links_bulk(new_links)]
+    assert statuses == ['duplicate_url', 'ok', 'duplicate_url']
+
+# --- KV legacy-blob migration and layout rebuild ---
+def index_snapshot(kv):
+    snapshot = {}
+    for key in kv.scan_iter():
+        kind = kv.type(key)
+        if kind == 'zset':
+            snapshot[key] = kv.zrange(key, 0, -1, withscores=True)
+        elif kind == 'set':
+            snapshot[key] = sorted(kv.smembers(key))
+        elif kind == 'hash':
+            snapshot[key] = kv.hgetall(key)
+    return snapshot
+
+def sample_links():
+    links = [link_core._new_link_record(f"https://example.com/{i}", f"Title {i}", '', False, 0) for i in range(5)]
+    links[1]['visit_count'] = 7
+    links[2]['custom_field'] = 'kept'
+    return links
+
+def test_legacy_blob_is_migrated_on_first_use(kv, redis_backend):
+    links = sample_links()
+    kv.set(link_core.LINKS_DATA_KEY, link_core.encode_links(links, 'json'))
+
+    stored = sorted((link['id'], link['url'], link['visit_count']) for link in link_core.get_all_links())
+    assert stored == sorted((link['id'], link['url'], link['visit_count']) for link in links)
+    assert not kv.exists(link_core.LINKS_DATA_KEY)
+    assert kv.exists(link_core.LINKS_DATA_KEY + ":migrated") # Kept as a backup
+    assert int(kv.get(link_core.KV_LAYOUT_VERSION_KEY)) == link_core.KV_LAYOUT_VERSION
+    assert kv.hget(link_core.LINK_URLS_KEY, links[0]['url']) == links[0]['id']
+    assert link_core.add_new_link(links[0]['url'], '', '', False, 0) == "duplicate_url"
+    assert [link['id'] for link in link_core.search_links('Title 3')] == [links[3]['id']]
+    page, total = link_core.get_links_page('visit_count', 'desc', 1, 1)
+    assert (page[0]['id'], total) == (links[1]['id'], len(links))
+
+def test_rebuild_restores_indexes(kv, redis_backend):
+    for i in range(5):
+        add(f"https://example.com/{i}", f"Title {i}")
+    expected = index_snapshot(kv)
+    kv.delete(link_core.LINK_URLS_KEY, link_core._sort_index_key('title'))
+    kv.sadd(link_core._search_key('zzz'), 'stale-id')
+    kv.zadd(link_core.LINK_IDS_KEY, {'deleted-id': 0}) # Left behind by an interrupted delete
+
+    assert link_core.rebuild_kv_indexes() == 5
+    rebuilt = index_snapshot(kv)
+    for key in (link_core.LINKS_VERSION_KEY, link_core.KV_LAYOUT_VERSION_KEY):
+        rebuilt.pop(key, None)
+        expected.pop(key, None)
+    assert rebuilt == expected
+    assert not list(kv.scan_iter(match=link_core.REBUILD_KEY_PREFIX + '*'))
+
+def test_rebuild_keeps_links_written_while_it_runs(kv, redis_backend, monkeypatch):
+    for i in range(3):
+        add(f"https://example.com/{i}", f"Title {i}")
+    stage_indexes = link_core._kv_stage_indexes
+    racing = []
+
+    def stage_with_concurrent_add(link_ids):
+        staged = stage_indexes(link_ids)
+        if not racing:
+            racing.append(add('https://example.com/racer', 'Racer'))
+        return staged
+
+    monkeypatch.setattr(link_core, '_kv_stage_indexes', stage_with_concurrent_add)
+    assert link_core.rebuild_kv_indexes() == 4 # Retried with the new link in the snapshot
+    racer = racing[0]
+    assert kv.hget(link_core.LINK_URLS_KEY, 'https://example.com/racer') == racer['id']
+    assert [link['id'] for link in link_core.search_links('racer')] == [racer['id']]
+    assert link_core.add_new_link('https://example.com/racer', '', '', False, 0) == "duplicate_url"
+
+def test_rebuild_refuses_while_migrating(kv, redis_backend):
+    add('https://example.com/a')
+    kv.delete(link_core.KV_LAYOUT_VERSION_KEY)
+    kv.set(link_core.LINKS_DATA_KEY + ":migrating", '[]')
+    before = index_snapshot(kv)
+
+    assert link_core.rebuild_kv_indexes() is None
+    assert index_snapshot(kv) == before
+    link_core._kv_layout_checked = False
+    link_core._ensure_kv_layout()
+    assert not link_core._kv_layout_checked # Tried again on the next call
+
+    kv.delete(link_core.LINKS_DATA_KEY + ":migrating")
+    link_core._ensure_kv_layout()
+    assert link_core._kv_layout_checked
+    assert int(kv.get(link_core.KV_LAYOUT_VERSION_KEY)) == link_core.KV_LAYOUT_VERSION
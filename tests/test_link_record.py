@@ -0,0 +1,51 @@
+# tests/test_link_record.py
+
+import json
+
+import link_core
+
+LEGACY = [{'url': 'https://example.com/a', 'title': 'A'},
+          {'id': 'kept-id', 'url': 'https://example.com/b', 'created_timestamp': 5}]
+
+def write_legacy_file():
+    with open(link_core.LOCAL_DATA_FILE, 'w') as f:
+        json.dump(LEGACY, f)
+
+def test_link_does_not_make_up_an_id_or_created_time():
+    link = link_core.Link(url='https://example.com/a')
+    assert link['id'] is None
+    assert link['created_timestamp'] == 0
+    assert link_core._fill_missing_link_fields([link]) == 1
+    assert link['id'] and link['created_timestamp'] > 0
+
+def test_legacy_json_records_are_filled_once_and_written_back(json_backend):
+    write_legacy_file()
+    first = {link['url']: link for link in link_core.get_all_links()}
+    assert first['https://example.com/b']['id'] == 'kept-id'
+    assert first['https://example.com/b']['created_timestamp'] == 5
+    filled = first['https://example.com/a']
+    assert filled['id'] and filled['created_timestamp'] > 0
+
+    with open(link_core.LOCAL_DATA_FILE) as f:
+        on_disk = {link['url']: link for link in link_core.decode_links(f.read())}
+    assert on_disk['https://example.com/a']['id'] == filled['id']
+
+    link_core._local_state['signature'] = None # Reload from the file
+    again = link_core.get_link_by_id(filled['id'])
+    assert again['created_timestamp'] == filled['created_timestamp']
+
+def test_sqlite_copy_of_a_legacy_json_file_is_filled():
+    write_legacy_file()
+    link_core.set_storage_backend(link_core.STORAGE_BACKENDS['sqlite']())
+    links = link_core.get_all_links()
+    assert len(links) == 2
+    assert all(link['id'] and link['created_timestamp'] for link in links)
+
+def test_kv_migration_fills_legacy_records(kv, redis_backend):
+    kv.set(link_core.LINKS_DATA_KEY, json.dumps(LEGACY))
+    links = {link['url']: link for link in link_core.get_all_links()}
+    filled = links['https://example.com/a']
+    assert filled['id'] and filled['created_timestamp'] > 0
+    assert links['https://example.com/b']['id'] == 'kept-id'
+    link_core._kv_cache['version'] = None
+    assert link_core.get_link_by_id(filled['id'])['created_timestamp'] == filled['created_timestamp']
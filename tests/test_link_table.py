@@ -0,0 +1,60 @@
+# tests/test_link_table.py
+
+import random
+
+import pytest
+
+import link_core
+
+def sample_links(count=200, seed=7):
+    rng = random.Random(seed)
+    links = []
+    for i in range(count):
+        link = link_core._new_link_record(f"https://example.com/{i}", rng.choice(['alpha', 'Beta', 'gamma', 'ALPHA']) + f" {i % 5}",
+                                          '', False, rng.choice([0, 0, rng.randint(1, 10 ** 9)]))
+        link['visit_count'] = rng.randint(0, 5) # Plenty of ties
+        link['last_visited_timestamp'] = rng.choice([0, rng.randint(1, 10 ** 9)])
+        link['created_timestamp'] = rng.randint(1, 10 ** 9)
+        links.append(link)
+    return links
+
+def reference_sort(links, sort_by, sort_order):
+    field = link_core.SORT_FIELDS[sort_by]
+    key = (lambda link: link[field].lower()) if field == 'title' else (lambda link: link[field])
+    return sorted(links, key=key, reverse=(sort_order == 'desc'))
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort_by', sorted(link_core.SORT_FIELDS))
+def test_argsort_matches_a_stable_sort(sort_by, sort_order, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    links = sample_links()
+    table = link_core.LinkTable.from_links(links, fields=(link_core.SORT_FIELDS[sort_by],), use_numpy=use_numpy)
+    assert (table.np is not None) == use_numpy
+    ordered = [links[i]['id'] for i in table.argsort(sort_by, descending=(sort_order == 'desc'))]
+    assert ordered == [link['id'] for link in reference_sort(links, sort_by, sort_order)]
+
+def test_core_sort_links_accepts_dicts_records_and_legacy_values():
+    links = sample_links(20)
+    dicts = [link.to_dict() for link in links]
+    expected = [link['id'] for link in reference_sort(links, 'visit_count', 'desc')]
+    assert [link['id'] for link in link_core.core_sort_links(links, 'visit_count', 'desc')] == expected
+    assert [link['id'] for link in link_core.core_sort_links(dicts, 'visit_count', 'desc')] == expected
+    legacy = [{'id': 'a', 'visit_count': None}, {'id': 'b', 'visit_count': '3'}, {'id': 'c'}, {'id': 'd', 'visit_count': 2.0}]
+    assert [link['id'] for link in link_core.core_sort_links(legacy, 'visit_count', 'desc')] == ['b', 'd', 'a', 'c']
+
+def test_core_sort_links_leaves_unknown_keys_and_the_input_alone():
+    links = sample_links(5)
+    ids = [link['id'] for link in links]
+    assert link_core.core_sort_links(links, 'no_such_key', 'asc') == links
+    assert link_core.core_sort_links(links, 'created', 'desc') is not links
+    assert [link['id'] for link in links] == ids
+
+def test_cli_listing_uses_core_sort_links(monkeypatch, capsys):
+    import link_manager_cli
+    monkeypatch.setattr(link_manager_cli, 'CONFIG', {'page_size': 50})
+    links = sample_links(6)
+    link_manager_cli.display_links(links, sort_by='title', sort_order='desc')
+    printed_titles = [line.split('Title: ', 1)[1].strip() for line in capsys.readouterr().out.splitlines() if 'Title: ' in line]
+    assert printed_titles == [link['title'] for link in link_core.core_sort_links(links, 'title', 'desc')]
@@ -0,0 +1,97 @@
+# tests/test_metrics.py
+
+import re
+
+import pytest
+
+import link_core
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    link_core.reset_metrics()
+    yield
+    link_core.reset_metrics()
+
+def metric_lines(name):
+    return [line for line in link_core.render_metrics().splitlines() if line.startswith(name)]
+
+def test_render_metrics_exposition_format():
+    link_core.increment('link_core_serialized_bytes_total', 10, direction='encode')
+    link_core.increment('link_core_serialized_bytes_total', 5, direction='encode')
+    link_core.observe('link_core_storage_seconds', 0.003, op='get_link_by_id')
+    link_core.observe('link_core_storage_seconds', 20.0, op='get_link_by_id') # Past the last bucket
+    link_core.increment('odd_labels_total', path='a"b\\c\nd')
+    text = link_core.render_metrics()
+
+    assert '# TYPE link_core_serialized_bytes_total counter' in text
+    assert 'link_core_serialized_bytes_total{direction="encode"} 15' in text
+    assert '# HELP link_core_storage_seconds Time spent in link_core storage calls.' in text
+    assert 'link_core_storage_seconds_bucket{op="get_link_by_id",le="0.0025"} 0' in text
+    assert 'link_core_storage_seconds_bucket{op="get_link_by_id",le="0.005"} 1' in text
+    assert 'link_core_storage_seconds_bucket{op="get_link_by_id",le="10.0"} 1' in text
+    assert 'link_core_storage_seconds_bucket{op="get_link_by_id",le="+Inf"} 2' in text
+    assert 'link_core_storage_seconds_sum{op="get_link_by_id"} 20.003000' in text
+    assert 'link_core_storage_seconds_count{op="get_link_by_id"} 2' in text
+    assert 'odd_labels_total{path="a\\"b\\\\c\\nd"} 1' in text
+
+def test_storage_calls_are_timed(backend):
+    link = link_core.add_new_link('https://example.com/a', 'A', '', False, 0)
+    link_core.get_link_by_id(link['id'])
+    link_core.get_link_by_id(link['id'])
+    assert 'link_core_storage_seconds_count{op="get_link_by_id"} 2' in metric_lines('link_core_storage_seconds_count')
+    assert 'link_core_storage_seconds_count{op="add_new_link"} 1' in metric_lines('link_core_storage_seconds_count')
+
+def test_kv_round_trips_are_timed(kv):
+    client = link_core._instrument_kv_client(kv)
+    client.set('a', 1)
+    pipe = client.pipeline()
+    pipe.get('a')
+    pipe.get('b')
+    assert pipe.execute() == ['1', None]
+    counts = metric_lines('link_core_kv_round_trip_seconds_count')
+    assert 'link_core_kv_round_trip_seconds_count{kind="command"} 1' in counts
+    assert 'link_core_kv_round_trip_seconds_count{kind="pipeline"} 1' in counts
+
+def test_request_timings_collect_per_request():
+    token = link_core.start_request_timing()
+    with link_core.timed('link_core_storage_seconds', 'load', op='load'):
+        pass
+    with link_core.timed('link_core_storage_seconds', 'load', op='load'):
+        pass
+    timings = link_core.finish_request_timing(token)
+    assert list(timings) == ['load'] and timings['load'][1] == 2
+    with link_core.timed('link_core_storage_seconds', 'load', op='load'): # Outside a request: histogram only
+        pass
+    assert link_core.finish_request_timing(None) == {}
+    assert link_core.server_timing_header({'load': [0.0015, 2], 'kv': [0.0005, 1]}, 0.01) == \
+        'load;desc="2 calls";dur=1.50, kv;desc="1 call";dur=0.50, total;dur=10.00'
+
+def test_disabled_metrics_leave_functions_undecorated(monkeypatch):
+    monkeypatch.setattr(link_core, 'METRICS_ENABLED', False)
+    func = lambda: 1
+    assert link_core.instrumented('op')(func) is func
+    assert link_core.timed('link_core_storage_seconds') is link_core._NO_TIMER
+    link_core.increment('link_core_serialized_bytes_total', 5)
+    assert link_core.render_metrics() == '\n'
+
+SERVER_TIMING_RE = re.compile(r'^(\w+;desc="\d+ calls?";dur=[\d.]+, )*total;dur=[\d.]+$')
+
+def test_flask_server_timing_and_metrics(backend, client):
+    link = link_core.add_new_link('https://example.com/a', 'A', '', False, 0)
+    response = client.get('/')
+    server_timing = response.headers['Server-Timing']
+    assert SERVER_TIMING_RE.match(server_timing), server_timing
+    assert 'get_links_page;' in server_timing
+    client.get(f"/edit/{link['id']}")
+
+    metrics = client.get('/metrics')
+    assert metrics.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = metrics.get_data(as_text=True)
+    assert 'link_http_request_seconds_count{method="GET",route="/",status="200"} 1' in text
+    assert 'route="/edit/<link_id>"' in text # The rule, not the path
+
+def test_asgi_server_timing_and_metrics(backend, asgi_client):
+    link_core.add_new_link('https://example.com/a', 'A', '', False, 0)
+    server_timing = asgi_client.get('/').headers['Server-Timing']
+    assert SERVER_TIMING_RE.match(server_timing), server_timing
+    assert 'link_http_request_seconds_count{method="GET",route="/",status="200"} 1' in asgi_client.get('/metrics').text
@@ -0,0 +1,76 @@
+# tests/test_query.py
+
+import random
+from datetime import datetime
+
+import pytest
+
+import link_core
+
+DAY = 86400
+JAN_1 = int(datetime(2025, 1, 1).timestamp())
+
+def seed_links(count=40):
+    rng = random.Random(11)
+    links = []
+    for i in range(count):
+        words = rng.sample(['python', 'redis', 'work', 'home', 'recipe', 'news'], 2)
+        link = link_core._new_link_record(f"https://{words[0]}.example.com/{i}", ' '.join(words),
+                                          rng.choice(['', 'read later', 'work stuff']), rng.random() < 0.3,
+                                          rng.choice([0, JAN_1 + rng.randrange(60) * DAY]))
+        link['visit_count'] = rng.randrange(12)
+        link['last_visited_timestamp'] = JAN_1 + rng.randrange(90) * DAY if link['visit_count'] else 0
+        link['created_timestamp'] = JAN_1 - rng.randrange(1, 400) * DAY
+        links.append(link)
+    statuses = [result['status'] for result in link_core.get_storage_backend().add_links_bulk(links)]
+    assert statuses == ['ok'] * count
+    return links
+
+# --- Parsing ---
+def test_parse_builds_a_tree():
+    assert link_core.parse_link_query('title:Work') == ('text', 'title', 'work')
+    assert link_core.parse_link_query('a b OR c') == ('or', [('and', [('text', None, 'a'), ('text', None, 'b')]),
+                                                            ('text', None, 'c')])
+    assert link_core.parse_link_query('NOT (a OR -b)') == ('not', ('or', [('text', None, 'a'), ('not', ('text', None, 'b'))]))
+    assert link_core.parse_link_query('url:"some site" is:not-default') == \
+        ('and', [('text', 'url', 'some site'), ('default', False)])
+
+def test_parse_ranges():
+    assert link_core.parse_link_query('visits:>5') == ('range', 'visit_count', 6, None)
+    assert link_core.parse_link_query('visits:2..10') == ('range', 'visit_count', 2, 11)
+    assert link_core.parse_link_query('visits:<=3') == ('range', 'visit_count', None, 4)
+    assert link_core.parse_link_query('created:2025-01-01') == ('range', 'created', JAN_1, JAN_1 + DAY)
+    assert link_core.parse_link_query('reminder:<2025-01-01') == ('range', 'reminder_time', 1, JAN_1)
+
+@pytest.mark.parametrize('query', ['', '   ', '"open', '(a', 'a)', 'NOT', 'colour:red', 'is:maybe',
+                                   'visits:lots', 'created:yesterday', 'title:', 'a OR'])
+def test_bad_queries_raise_query_error(query):
+    with pytest.raises(link_core.QueryError):
+        link_core.parse_link_query(query)
+
+# --- Matching ---
+def test_compiled_predicate():
+    link = link_core._new_link_record('https://example.com/py', 'Python Tips', 'read later', True, 0)
+    link['visit_count'] = 3
+    matches = lambda query: link_core.compile_link_query(query)(link)
+    assert matches('python is:default visits:3')
+    assert matches('title:tips OR nothing')
+    assert matches('-notes:work visits:1..5')
+    assert not matches('python NOT later')
+    assert not matches('reminder:>2000-01-01') # No reminder set never matches a range
+
+@pytest.mark.parametrize('query', ['work', 'title:python visits:>3', 'redis OR recipe', 'NOT news', '-work is:default',
+                                   'visits:2..5 OR is:default', 'created:>=2024-06-01', 'last_visited:2025-01-01..2025-02-01',
+                                   'reminder:<2025-02-01 (home OR python)', 'py', 'notes:"read later" visits:0'])
+def test_query_links_matches_a_scan(backend, query):
+    links = seed_links()
+    expected = sorted(link['id'] for link in link_core.core_search_links(links, query, 'advanced'))
+    assert sorted(link['id'] for link in link_core.query_links(query)) == expected
+
+def test_listing_filters_with_q_and_flashes_bad_queries(backend, client):
+    link_core.add_new_link('https://example.com/a', 'Alpha', '', False, 0)
+    link_core.add_new_link('https://example.com/b', 'Beta', '', False, 0)
+    body = client.get('/', query_string={'q': 'title:alpha'}).get_data(as_text=True)
+    assert 'Alpha' in body and 'Beta' not in body
+    body = client.get('/', query_string={'q': 'colour:red'}).get_data(as_text=True)
+    assert 'Invalid search query' in body
@@ -0,0 +1,51 @@
+# tests/test_reminders.py
+
+import link_core
+
+NOW = 1_750_000_000
+
+def add(title, reminder_timestamp):
+    link = link_core.add_new_link(f"https://example.com/{title}", title, '', False, reminder_timestamp)
+    assert isinstance(link, dict), link
+    return link
+
+def titles(links):
+    return [link['title'] for link in links]
+
+def test_due_and_upcoming_split_at_now(backend):
+    add('none', 0)
+    add('later', NOW + 500)
+    add('overdue', NOW - 500)
+    add('exactly-now', NOW)
+    add('soon', NOW + 10)
+    add('long-overdue', NOW - 5000)
+    assert titles(link_core.due_reminders(NOW)) == ['long-overdue', 'overdue', 'exactly-now']
+    assert titles(link_core.upcoming_reminders(NOW)) == ['soon', 'later']
+    assert titles(link_core.upcoming_reminders(NOW, limit=1)) == ['soon']
+
+def test_reminder_index_follows_updates_and_deletes(backend):
+    link = add('a', NOW + 100)
+    other = add('b', NOW - 100)
+    link_core.update_link(link['id'], {'reminder_timestamp': NOW - 200})
+    assert titles(link_core.due_reminders(NOW)) == ['a', 'b']
+    assert link_core.upcoming_reminders(NOW) == []
+    link_core.update_link(other['id'], {'reminder_timestamp': 0}) # Reminder cleared
+    link_core.delete_link_by_id(link['id'])
+    assert link_core.due_reminders(NOW) == []
+
+def test_reminders_page_lists_both_groups(backend, client):
+    add('Overdue thing', 1)
+    add('Future thing', 4_000_000_000)
+    add('No reminder', 0)
+    body = client.get('/reminders').get_data(as_text=True)
+    assert 'Overdue thing' in body and 'Future thing' in body
+    assert 'No reminder' not in body
+
+def test_cli_reminders_view(backend, monkeypatch, capsys):
+    import link_manager_cli
+    monkeypatch.setattr(link_manager_cli, 'CONFIG', {'page_size': 50})
+    add('Overdue thing', 1)
+    link_manager_cli.view_reminders_interactive()
+    out = capsys.readouterr().out
+    assert 'Due/Overdue Reminders' in out and 'Overdue thing' in out
+    assert 'No upcoming reminders.' in out
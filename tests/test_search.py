@@ -0,0 +1,39 @@
+# tests/test_search.py
+
+import random
+
+import link_core
+
+WORDS = ['python', 'redis', 'flask', 'async', 'index', 'cache', 'Ünïcode', 'py']
+
+def add(url, title='', notes=''):
+    link = link_core.add_new_link(url, title, notes, False, 0)
+    assert isinstance(link, dict), link
+    return link
+
+def ids(links):
+    return [link['id'] for link in links]
+
+def test_indexed_search_matches_a_scan(backend):
+    rng = random.Random(7)
+    for i in range(30):
+        add(f"https://example.com/{rng.choice(WORDS)}/{i}", ' '.join(rng.sample(WORDS, 2)), rng.choice(WORDS + ['']))
+    all_links = link_core.core_sort_links(link_core.get_all_links(), 'created', 'asc')
+    for term in WORDS + ['PYTHON', 'hon red', 'ex', 'example.com/py', 'nothing-like-this', '  cache  ']:
+        expected = link_core.core_search_links(all_links, term.strip())
+        expected.sort(key=lambda link: (link['created_timestamp'], link['id']))
+        assert ids(link_core.search_links(term)) == ids(expected), term
+
+def test_search_follows_updates_and_deletes(backend):
+    link = add('https://example.com/a', 'Old title')
+    other = add('https://example.com/b', 'Other', 'old notes')
+    assert set(ids(link_core.search_links('old'))) == {link['id'], other['id']}
+    link_core.update_link(link['id'], {'title': 'New title'})
+    assert ids(link_core.search_links('old')) == [other['id']]
+    assert ids(link_core.search_links('new title')) == [link['id']]
+    link_core.delete_link_by_id(other['id'])
+    assert link_core.search_links('old') == []
+
+def test_blank_term_finds_nothing(backend):
+    add('https://example.com/a', 'A')
+    assert link_core.search_links('   ') == []
@@ -0,0 +1,61 @@
+# tests/test_top_links.py
+
+import random
+
+import pytest
+
+import link_core
+
+def seed_links(count=25):
+    rng = random.Random(5)
+    links = []
+    for i in range(count):
+        link = link_core._new_link_record(f"https://example.com/{i}", f"Title {rng.randrange(100):02d}", '', False, 0)
+        link['visit_count'] = rng.choice([0, 0, 1, 2, 2, 5, 9]) # Ties and never-visited links
+        link['last_visited_timestamp'] = 1_700_000_000 + rng.randrange(50) if link['visit_count'] else 0
+        links.append(link)
+    assert all(r['status'] == 'ok' for r in link_core.get_storage_backend().add_links_bulk(links))
+    return links
+
+def expected_top(links, by, k):
+    field = link_core.SORT_FIELDS[by]
+    ranked = sorted(links, key=lambda link: (link[field], link['id']), reverse=True)
+    if by != 'title':
+        ranked = [link for link in ranked if link[field]]
+    return [link['id'] for link in ranked[:k]]
+
+@pytest.mark.parametrize('by', ['visit_count', 'last_visited', 'title'])
+@pytest.mark.parametrize('k', [1, 5, 100])
+def test_top_links_matches_a_full_sort(backend, by, k):
+    links = seed_links()
+    assert [link['id'] for link in link_core.top_links(by, k)] == expected_top(links, by, k)
+
+def test_json_top_links_with_and_without_the_sort_index(json_backend):
+    links = seed_links()
+    expected = expected_top(links, 'visit_count', 6)
+    link_core._local_state['signature'] = None # Fresh state: no sort index built yet
+    assert [link['id'] for link in link_core.top_links('visit_count', 6)] == expected
+    link_core.get_links_page('visit_count', 'desc', 1, 5) # Builds the index
+    assert link_core._local_state['sort_indexes']
+    assert [link['id'] for link in link_core.top_links('visit_count', 6)] == expected
+
+def test_top_links_follow_visits(backend):
+    first = link_core.add_new_link('https://example.com/a', 'A', '', False, 0)
+    second = link_core.add_new_link('https://example.com/b', 'B', '', False, 0)
+    assert link_core.top_links('visit_count') == [] # Nobody has visited anything yet
+    for _ in range(2):
+        link_core.record_link_visit(second['id'])
+    link_core.record_link_visit(first['id'])
+    assert [link['id'] for link in link_core.top_links('visit_count')] == [second['id'], first['id']]
+
+def test_top_links_rejects_unknown_keys_and_empty_k(backend):
+    seed_links(3)
+    with pytest.raises(ValueError):
+        link_core.top_links('popularity')
+    assert link_core.top_links('visit_count', 0) == []
+
+def test_dashboard_lists_only_on_the_first_unfiltered_page(backend, client):
+    link = link_core.add_new_link('https://example.com/a', 'Popular one', '', False, 0)
+    link_core.record_link_visit(link['id'])
+    assert 'Most visited' in client.get('/').get_data(as_text=True)
+    assert 'Most visited' not in client.get('/?q=popular').get_data(as_text=True)
@@ -0,0 +1,72 @@
+# tests/test_visit_buffer.py
+
+import link_core
+
+def add(url):
+    link = link_core.add_new_link(url, '', '', False, 0)
+    assert isinstance(link, dict), link
+    return link
+
+# --- Write-behind visits ---
+def test_flush_visits_counts(backend):
+    first = add('https://example.com/a')
+    second = add('https://example.com/b')
+    for timestamp in (100, 300, 200):
+        link_core.buffer_visit(first['id'], timestamp)
+    link_core.buffer_visit(second['id'], 50)
+    link_core.buffer_visit('no-such-link', 50)
+
+    assert link_core.flush_visits() == 2
+    assert link_core.flush_visits() == 0 # The buffer was drained
+    first = link_core.get_link_by_id(first['id'])
+    second = link_core.get_link_by_id(second['id'])
+    assert (first['visit_count'], first['last_visited_timestamp']) == (3, 300)
+    assert (second['visit_count'], second['last_visited_timestamp']) == (1, 50)
+    assert [link['id'] for link in link_core.top_links('visit_count')] == [first['id'], second['id']]
+
+def test_flush_visits_adds_to_existing_counts(backend):
+    link = add('https://example.com/a')
+    link_core.record_link_visit(link['id'])
+    link_core.buffer_visit(link['id'], 10) # Older than the direct visit, so last_visited stays
+    assert link_core.flush_visits() == 1
+    stored = link_core.get_link_by_id(link['id'])
+    assert stored['visit_count'] == 2
+    assert stored['last_visited_timestamp'] > 10
+
+def test_write_behind_visit_only_reaches_storage_on_flush(backend, monkeypatch):
+    monkeypatch.setattr(link_core, 'VISIT_WRITE_BEHIND', True)
+    link = add('https://example.com/a')
+    assert link_core.visit_link(link['id']) == 'https://example.com/a'
+    assert link_core.visit_link('no-such-link') is None
+    assert link_core.get_link_by_id(link['id'])['visit_count'] == 0
+    assert link_core.flush_visits() == 1
+    assert link_core.get_link_by_id(link['id'])['visit_count'] == 1
+
+def test_threshold_wakes_the_flusher(monkeypatch):
+    monkeypatch.setattr(link_core, 'VISIT_FLUSH_THRESHOLD', 3)
+    link_core._visit_flush_wakeup.clear()
+    link_core.buffer_visit('a')
+    link_core.buffer_visit('b')
+    assert not link_core._visit_flush_wakeup.is_set()
+    link_core.buffer_visit('a')
+    assert link_core._visit_flush_wakeup.is_set()
+    link_core._visit_flush_wakeup.clear()
+
+def test_failed_flush_keeps_the_visits_for_the_next_one(backend, monkeypatch):
+    link = add('https://example.com/a')
+    link_core.buffer_visit(link['id'], 100)
+    apply_visits = backend.apply_visits
+    storage_down = [True]
+
+    def apply_unless_down(visits):
+        if storage_down[0]:
+            raise OSError("storage is down")
+        return apply_visits(visits)
+
+    monkeypatch.setattr(backend, 'apply_visits', apply_unless_down)
+    assert link_core.flush_visits() == 0
+    link_core.buffer_visit(link['id'], 200) # Arrives while storage is down
+    storage_down[0] = False
+    assert link_core.flush_visits() == 1
+    stored = link_core.get_link_by_id(link['id'])
+    assert (stored['visit_count'], stored['last_visited_timestamp']) == (2, 200)